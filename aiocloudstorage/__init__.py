@@ -6,15 +6,18 @@
 import logging
 import os
 import asyncio
+import time
 from enum import Enum, unique
 from typing import Dict
 import tempfile
 
 from aiocloudstorage.base import Blob, Container, Driver
-from aiocloudstorage.exceptions import CloudStorageError,CredentialsError
+from aiocloudstorage.exceptions import CloudStorageError,ContainerNotFoundError,CredentialsError
 from aiocloudstorage.typed import FileLike
 from aiocloudstorage.messages import STORAGE_NOT_ENABLED
 from aiocloudstorage.helpers import parse_file_url,is_file_url
+from aiocloudstorage.instrumentation import MetricsCollector
+from aiocloudstorage.breaker import CircuitBreaker
 
 __all__ = [
     'Blob',
@@ -53,11 +56,20 @@ _DRIVER_IMPORTS = {
     DriverName.MINIO: ('aiocloudstorage.drivers.minio', 'MinioDriver'),
     #DriverName.S3: ('aiocloudstorage.drivers.amazon', 'S3Driver'),
 }
+#: Default number of transfers bulk_upload/bulk_download run at once
+DEFAULT_BULK_CONCURRENCY = 32
+#: Default seconds a resolved container is reused before it is looked up again
+DEFAULT_CONTAINER_CACHE_TTL = 60
+
 _m = {}
 def _init_config():
     global _m
     _m={
         "confs":{},
+        "drivers":{},
+        "containers":{},
+        "metrics":None,
+        "container_cache_ttl":DEFAULT_CONTAINER_CACHE_TTL,
         "default_store":None,
         "default_container":None,
         "storage_enabled":False
@@ -66,31 +78,92 @@ def _check_storage_enabled():
     if not _m['storage_enabled']:
         raise CloudStorageError(STORAGE_NOT_ENABLED)
 
-async def _check_driver_valid(conf):
+async def _check_driver_valid(conf) -> Driver:
     klass = conf['klass']
     driver = klass(**conf)
     try:
         async for container in driver.get_containers():
             break
     except Exception as err:
+        await driver.close()
         raise CloudStorageError("Error Connecting to driver %s : %s"%(conf['driver'],str(err)))
+    return driver
 
-async def _ensure_container(conf,container_name):
+async def _ensure_container(driver,container_name):
     """
     Ensure that default container exists in default store
     """
-    klass = conf['klass']
-    driver = klass(**conf)
     container = await driver.create_container(container_name)
     return container
 
+def _get_driver(store_name) -> Driver:
+    """
+    Driver instance shared by every call targeting the store, so
+    connection pools survive between upload/download calls
+    """
+    return _m['drivers'][store_name]
 
+def get_circuit_breaker(store_name) -> CircuitBreaker:
+    """
+    Circuit breaker of a configured store, None when CIRCUIT_BREAKER is not
+    enabled for it. Subscribe to state changes with add_listener()
+    """
+    _check_storage_enabled()
+    if store_name not in _m['drivers']:
+        raise CloudStorageError("store name %s not configured"%(store_name))
+    return _m['drivers'][store_name].circuit_breaker
+
+def get_metrics() -> MetricsCollector:
+    """
+    Metrics collected for all configured stores when STORAGE_METRICS is
+    enabled, None otherwise. Export with get_metrics().to_prometheus()
+    """
+    return _m.get('metrics')
+
+async def _resolve_container(store_name,container_name) -> Container:
+    """
+    Container of the store, reused for CONTAINER_CACHE_TTL seconds so the
+    hot upload/download path does not look it up on every call
+    """
+    key = (store_name,container_name)
+    cached = _m['containers'].get(key)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+    container = await _get_driver(store_name).get_container(container_name)
+    ttl = _m['container_cache_ttl']
+    if ttl:
+        _m['containers'][key] = (container,time.monotonic()+ttl)
+    return container
+
+def _invalidate_container(container:Container):
+    """
+    Forget a cached container, e.g. after the backend reported it missing
+    """
+    key = (container.driver.alias_name,container.name)
+    cached = _m.get('containers',{}).get(key)
+    if cached is not None and cached[0] is container:
+        del _m['containers'][key]
+
+async def shutdown():
+    """
+    Close the drivers of all configured stores
+    """
+    drivers = _m.get('drivers',{})
+    while drivers:
+        _, driver = drivers.popitem()
+        if driver.circuit_breaker is not None:
+            await driver.circuit_breaker.close()
+        await driver.close()
 
 async def configure(configuration):
+    await shutdown()
     _init_config()
     if not configuration.get('STORAGE_ENABLED'):
         return False
     _m['storage_enabled'] = True
+    _m['container_cache_ttl'] = configuration.get('CONTAINER_CACHE_TTL',DEFAULT_CONTAINER_CACHE_TTL)
+    if configuration.get('STORAGE_METRICS'):
+        _m['metrics'] = MetricsCollector()
     if not configuration.get('STORAGE_CONFIG'):
         raise Exception("No storage configuration found in %s"%(str(configuration)))
     store_conf = configuration['STORAGE_CONFIG']
@@ -114,7 +187,11 @@ async def configure(configuration):
         conf['alias_name'] = name
         klass = get_driver_by_name(driver_name)
         conf['klass'] = klass
-        await _check_driver_valid(conf)
+        breaker_conf = conf.get('circuit_breaker',configuration.get('CIRCUIT_BREAKER'))
+        _m['drivers'][name] = await _check_driver_valid(conf)
+        if _m['metrics'] is not None:
+            _m['drivers'][name].add_instrument(_m['metrics'])
+        _m['drivers'][name].set_circuit_breaker(CircuitBreaker.from_config(breaker_conf))
         _m['confs'][name] = conf
     if len(_m['confs'])<=0:
         raise Exception("No storage driver has been installed.Please check storage configuration")
@@ -126,11 +203,64 @@ async def configure(configuration):
     if default_store is not None and default_store not in _m['confs']:
         raise Exception("Default Store %s not found in configuration or driver not enabled :final configuration %s"%(default_store,_m['confs']))
     if default_store and default_container:
-        await _ensure_container(_m['confs'][default_store],default_container)
+        await _ensure_container(_get_driver(default_store),default_container)
     return _m
 
 
 
+async def _iter_pairs(pairs):
+    """
+    (key, value) pairs of a dict, iterable or async iterable
+    """
+    if isinstance(pairs,dict):
+        pairs = pairs.items()
+    if hasattr(pairs,'__aiter__'):
+        async for pair in pairs:
+            yield pair
+    elif hasattr(pairs,'__iter__'):
+        for pair in pairs:
+            yield pair
+    else:
+        raise CloudStorageError("Expected dict or iterable of pairs but got %s"%(type(pairs),))
+
+async def _bounded_as_completed(pairs,func,max_concurrency,return_exceptions=True):
+    """
+    Run func(key, value) for every pair with at most max_concurrency
+    running at once, pulling pairs only when a slot is free, and yield
+    (key, result) in completion order. Pending work is cancelled when
+    the consumer stops early or an exception is raised
+    """
+    if max_concurrency < 1:
+        raise CloudStorageError("max_concurrency must be at least 1")
+    pending = {}
+    iterator = _iter_pairs(pairs).__aiter__()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < max_concurrency:
+                try:
+                    key,value = await iterator.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending[asyncio.ensure_future(func(key,value))] = key
+            if not pending:
+                return
+            done,_ = await asyncio.wait(pending,return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                key = pending.pop(task)
+                if task.exception() is None:
+                    yield key,task.result()
+                elif return_exceptions and isinstance(task.exception(),Exception):
+                    yield key,task.exception()
+                else:
+                    raise task.exception()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending,return_exceptions=True)
+        await iterator.aclose()
+
 async def _get_container(container_name,store_name,**kwargs) -> Container:
     container=kwargs.get('container',None)
     if container is not None:
@@ -151,23 +281,34 @@ async def _get_container(container_name,store_name,**kwargs) -> Container:
             store_name = _m['default_store']
         if not store_name or not container_name:
             raise CloudStorageError("Unknown error occured in getting container")
-        conf = _m['confs'][store_name]
-        klass = conf['klass']
-        driver = klass(**conf)
-        container = await driver.get_container(container_name)
+        container = await _resolve_container(store_name,container_name)
     return container
 
-async def download(fileurl,destfilename:str='auto',destpath:str=None,**kwargs):
+async def download(fileurl,destfilename:str='auto',destpath:str=None,byte_range=None,**kwargs):
+    """
+    byte_range: optional (offset, length) to only download part of the
+        blob, length None reads to the end
+    """
     _check_storage_enabled()
     parsed = parse_file_url(fileurl)
     blob_name = parsed['blob']
 
     container = await _get_container(parsed['container'],parsed['store'],**kwargs)
-    blob = await container.get_blob(blob_name)
+    return await _download_blob(container,blob_name,destfilename,destpath,byte_range)
+
+async def _download_blob(container:Container,blob_name,destfilename,destpath,byte_range=None):
+    """
+    Download blob_name of an already resolved container, see download()
+    """
+    try:
+        blob = await container.get_blob(blob_name)
+    except ContainerNotFoundError:
+        _invalidate_container(container)
+        raise
     if not isinstance(destfilename,str) and hasattr(destfilename,'write'):
         if destpath is not None:
             raise Exception("destpath is invalid when providing stream")
-        await blob.download(destfilename)
+        await blob.download(destfilename,byte_range=byte_range)
         #dont know the filepath here so return empty string
         try:
             return str(destfilename.name)
@@ -190,45 +331,88 @@ async def download(fileurl,destfilename:str='auto',destpath:str=None,**kwargs):
             raise CredentialsError(str(err))
     if destpath is not None and destfilename:
         download_path = os.path.join(destpath,destfilename)
-        await blob.download(download_path)
+        await blob.download(download_path,byte_range=byte_range)
         return download_path
     else:
         #make own temporary file and return it
         with tempfile.NamedTemporaryFile(mode='w+b',delete=False) as dfile:
-            await blob.download(dfile)
+            await blob.download(dfile,byte_range=byte_range)
             return dfile.name
         
-async def bulk_download(filedict:Dict,destfilename:str='auto',destpath:str=None,**kwargs):
+async def iter_bulk_download(files,destfilename:str='auto',destpath:str=None,max_concurrency:int=DEFAULT_BULK_CONCURRENCY,**kwargs):
     """
-    filedict: a dictionary containing key and file. the returned
-        dictionary will have the same key along with uploaded 
-        file path
+    files: dict or (async) iterable of (key, file url) pairs. Pairs are
+        pulled lazily and at most max_concurrency downloads run at once
+    yields (key, downloaded file path) as downloads complete. Failures
+        are yielded as the exception when return_exceptions is True
+        (default False: the first failure is raised)
+    """
+    _check_storage_enabled()
+    return_exceptions = kwargs.pop('return_exceptions',False)
+    multi_container = kwargs.pop('multi_container',True)
+    container_lock = asyncio.Lock()
+
+    async def _download(key,fileurl):
+        if not multi_container:
+            async with container_lock:
+                if 'container' not in kwargs:
+                    #resolve once, from the first file url
+                    parsed = parse_file_url(fileurl)
+                    kwargs['container'] = await _get_container(parsed['container'],parsed['store'],**kwargs)
+        return await download(fileurl,destfilename,destpath,**kwargs)
+
+    async for key,result in _bounded_as_completed(files,_download,max_concurrency,return_exceptions):
+        yield key,result
+
+async def bulk_download(filedict:Dict,destfilename:str='auto',destpath:str=None,max_concurrency:int=DEFAULT_BULK_CONCURRENCY,**kwargs):
+    """
+    filedict: a dictionary (or any (async) iterable of (key, file url)
+        pairs). the returned dictionary will have the same key along
+        with downloaded file path
+    max_concurrency: maximum number of downloads running at once
+    with multi_container (default) the file urls are parsed up front and
+        grouped by store and container, so each container is looked up
+        once however many of its files are downloaded
     """
     _check_storage_enabled()
-    if not isinstance(filedict,dict):
-        raise Exception("Expected dict but got %s"%(type(filedict),))
-    if not len(filedict):
-        return {}
-    multi_container = kwargs.get('multi_container',True)
-    if not multi_container:
-        first_file_url = ''
-        for key in filedict:
-            first_file_url = filedict[key]
-            break
-        parsed = parse_file_url(first_file_url)
-        container = await _get_container(parsed['container'],parsed['store'],**kwargs)
-        kwargs['container'] = container
-
-    tasks = []
-    keys = []
-    for key,fileurl in filedict.items():
-        task = download(fileurl,destfilename,destpath,**kwargs)
-        tasks.append(asyncio.create_task(task))
-        keys.append(key)
-    paths = await asyncio.gather(*tasks)
     file_paths = {}
-    for index,key in enumerate(keys):
-        file_paths[key]=paths[index]
+    if not kwargs.get('multi_container',True) or 'container' in kwargs:
+        async for key,path in iter_bulk_download(filedict,destfilename,destpath,max_concurrency,**kwargs):
+            file_paths[key] = path
+        return file_paths
+
+    kwargs.pop('multi_container',None)
+    return_exceptions = kwargs.pop('return_exceptions',False)
+    groups = {}
+    async for key,fileurl in _iter_pairs(filedict):
+        try:
+            parsed = parse_file_url(fileurl)
+        except Exception as err:
+            if not return_exceptions:
+                raise
+            file_paths[key] = err
+            continue
+        group = groups.setdefault((parsed['store'],parsed['container']),[])
+        group.append((key,parsed['blob']))
+
+    async def _lookup(group_key,entries):
+        store_name,container_name = group_key
+        return await _get_container(container_name,store_name,**kwargs)
+
+    pairs = []
+    async for group_key,container in _bounded_as_completed(groups,_lookup,max_concurrency,return_exceptions):
+        if isinstance(container,Exception):
+            for key,_ in groups[group_key]:
+                file_paths[key] = container
+            continue
+        pairs.extend((key,(container,blob_name)) for key,blob_name in groups[group_key])
+
+    async def _download(key,target):
+        container,blob_name = target
+        return await _download_blob(container,blob_name,destfilename,destpath)
+
+    async for key,path in _bounded_as_completed(pairs,_download,max_concurrency,return_exceptions):
+        file_paths[key] = path
     return file_paths
 
 async def upload(filepath:FileLike,destfilename:str='random',destpath:str='',container_name=None,store_name=None,**kwargs):
@@ -242,51 +426,98 @@ async def upload(filepath:FileLike,destfilename:str='random',destpath:str='',con
     if not _m['storage_enabled']:
         raise CloudStorageError(STORAGE_NOT_ENABLED)
     container = await _get_container(container_name,store_name,**kwargs)
-    blob = await container.upload_blob(filepath,destfilename,destpath)
+    try:
+        blob = await container.upload_blob(filepath,destfilename,destpath)
+    except ContainerNotFoundError:
+        _invalidate_container(container)
+        raise
     return blob
 
-async def bulk_upload(filedict:Dict,destfilename:str='random',destpath:str='',container_name=None,store_name=None,**kwargs):
+async def iter_bulk_upload(files,destfilename:str='random',destpath:str='',container_name=None,store_name=None,max_concurrency:int=DEFAULT_BULK_CONCURRENCY,**kwargs):
     """
-    filedict: a dictionary containing key and file. the returned
-        dictionary will have the same key along with uploaded 
-        file url
+    files: dict or (async) iterable of (key, file) pairs. Pairs are
+        pulled lazily and at most max_concurrency uploads run at once
+    yields (key, uploaded Blob) as uploads complete. Failures are
+        yielded as the exception when return_exceptions is True (default)
+    destfilename: same as bulk_upload
+    """
+    _check_storage_enabled()
+    return_exceptions = kwargs.pop('return_exceptions',True)
+    container = await _get_container(container_name,store_name,**kwargs)
+
+    async def _upload(key,_file):
+        name = key if destfilename=='usekey' else destfilename
+        return await upload(_file,name,destpath,container=container)
+
+    async for key,result in _bounded_as_completed(files,_upload,max_concurrency,return_exceptions):
+        yield key,result
+
+async def bulk_upload(filedict:Dict,destfilename:str='random',destpath:str='',container_name=None,store_name=None,max_concurrency:int=DEFAULT_BULK_CONCURRENCY,**kwargs):
+    """
+    filedict: a dictionary (or any (async) iterable of (key, file)
+        pairs). the returned dictionary will have the same key along
+        with uploaded file url
     destfilename:
         auto - name generated from filename
         random - random uuid
         usekey - keys will be used as name
         <string> - user rovided filepath
         <steream> - user rovided filestream
+    max_concurrency: maximum number of uploads running at once
     """
     _check_storage_enabled()
-    if not isinstance(filedict,dict):
-        raise Exception("Expected dict but got %s"%(type(filedict),))
-    if not len(filedict):
+    if isinstance(filedict,dict) and not len(filedict):
         return {}
-    tasks = []
-    keys = []
-    container = await _get_container(container_name,store_name,**kwargs)
-    for key,_file in filedict.items():
-        if destfilename=='usekey':
-            destfilename = key
-        task = upload(_file,destfilename,destpath,container=container)
-        tasks.append(asyncio.create_task(task))
-        keys.append(key)
-    return_exceptions = kwargs.get('return_exceptions',True)
-    return_blobs = kwargs.get('return_blobs',False)
-    blobs = await asyncio.gather(*tasks,return_exceptions=return_exceptions)
+    return_blobs = kwargs.pop('return_blobs',False)
     file_urls = {}
-    if not return_blobs:
-        for index,key in enumerate(keys):
-            if isinstance(blobs[index],Exception):
-                file_urls[key] = blobs[index]
-            else:
-                file_urls[key]=blobs[index].file_url
-    else:
-        for index,key in enumerate(keys):
-            file_urls[key] = blobs[index]
+    async for key,blob in iter_bulk_upload(filedict,destfilename,destpath,container_name,store_name,max_concurrency,**kwargs):
+        if return_blobs or isinstance(blob,Exception):
+            file_urls[key] = blob
+        else:
+            file_urls[key] = blob.file_url
     return file_urls
 
 
+async def bulk_delete(file_urls,**kwargs):
+    """
+    file_urls: a list of file urls, or a dictionary containing key and
+        file url. Urls are grouped by store and container and each
+        container deletes its blobs in batches
+    returns a dictionary with the same keys (the file url for a list)
+        and None for every deleted file or the exception that prevented
+        its deletion. deleting a missing file is not an error
+    """
+    _check_storage_enabled()
+    if isinstance(file_urls,dict):
+        items = list(file_urls.items())
+    else:
+        items = [(fileurl,fileurl) for fileurl in file_urls]
+
+    results = {}
+    groups = {}
+    for key,fileurl in items:
+        try:
+            parsed = parse_file_url(fileurl)
+        except Exception as err:
+            results[key] = err
+            continue
+        group = groups.setdefault((parsed['store'],parsed['container']),[])
+        group.append((key,parsed['blob']))
+
+    async def _delete_group(store_name,container_name,entries):
+        try:
+            container = await _get_container(container_name,store_name,**kwargs)
+            deleted = await container.delete_blobs([name for _,name in entries])
+        except Exception as err:
+            deleted = {name:err for _,name in entries}
+        for key,name in entries:
+            results[key] = deleted[name]
+
+    await asyncio.gather(*(_delete_group(store_name,container_name,entries)
+                           for (store_name,container_name),entries in groups.items()))
+    return results
+
+
 def get_driver(driver: DriverName) -> Driver:
     """Get driver class by DriverName enumeration member.
 
@@ -1,12 +1,22 @@
 import abc
+import asyncio
+import bisect
+import functools
 import logging
+import os
 import warnings
 from abc import abstractmethod
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional, Union  # noqa: F401
+import tempfile
+from typing import (  # noqa: F401
+    Any, AsyncContextManager, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union)
 
 from aiocloudstorage import messages
-from aiocloudstorage.exceptions import NotFoundError,InvalidFileURLError
+from aiocloudstorage.breaker import CircuitBreaker
+from aiocloudstorage.cache import MetadataCache
+from aiocloudstorage.instrumentation import Instrument
+from aiocloudstorage.exceptions import BlobChangedError,BlobExistsError,NotFoundError,InvalidFileURLError
 from aiocloudstorage.typed import (
     Acl,
     ContentLength,
@@ -16,21 +26,43 @@ from aiocloudstorage.typed import (
     MetaData,
 )
 from aiocloudstorage.helpers import (
+        RANGE_COALESCE_GAP,
+        UploadPreflight,
+        coalesce_ranges,
         file_content_type, 
-        validate_file_or_path,
         random_filename,
         clean_object_name,
         is_file_url,
         parse_file_url,
-        check_file_not_empty
+        upload_preflight
 )
 from .structures import CaseInsensitiveDict
 
+#: Names tried by :meth:`.Container.upload_blob` with `blob_name='random'`
+RANDOM_NAME_ATTEMPTS = 5
+#: Default size of the chunks yielded by :meth:`.Blob.stream`
+STREAM_CHUNK_SIZE = 1024 * 1024
+#: Bytes read at a time by :meth:`.Blob.download` with a `byte_range`
+RANGE_DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
 __all__ = ['Blob', 'Container', 'Driver']
 
 logger = logging.getLogger(__name__)
 
 
+def _stream_position(filename: FileLike) -> Optional[int]:
+    """Position a sync file object can be rewound to, `None` otherwise."""
+    if isinstance(filename, str):
+        return None
+    stream = getattr(filename, 'file', filename)
+    if asyncio.iscoroutinefunction(getattr(stream, 'tell', None)):
+        return None
+    try:
+        return stream.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
 class Blob:
     """Represents an object blob.
 
@@ -39,7 +71,7 @@ class Blob:
         picture_blob = container.get_blob('picture.png')
         picture_blob.size
         # 50301
-        picture_blob.checksum
+        await picture_blob.get_checksum()
         # '2f907a59924ad96b7478074ed96b05f0'
         picture_blob.content_type
         # 'image/png'
@@ -49,8 +81,9 @@ class Blob:
     :param name: Blob name (must be unique in container).
     :type name: str
 
-    :param checksum: Checksum of this blob.
-    :type checksum: str
+    :param checksum: Checksum of this blob. If `None`, it is computed by the
+      driver the first time it is asked for, see :meth:`get_checksum`.
+    :type checksum: str or None
 
     :param etag: Blob etag which can also be the checksum. The etag for
       `LocalDriver` is a SHA1 hexdigest of the blob's full path.
@@ -138,6 +171,42 @@ class Blob:
             else:
                 self._attr[key] = value
 
+    @property
+    def checksum(self) -> Optional[str]:
+        """Checksum of this blob.
+
+        Drivers that cannot get the checksum cheaply (e.g. `LocalDriver`,
+        which has to hash the file) compute it on first access, blocking the
+        caller. Use :meth:`get_checksum` in async code.
+
+        :return: Hex digest of the blob's :attr:`.Driver.hash_type` hash.
+        :rtype: str or None
+        """
+        if self._checksum is None:
+            self._checksum = self.driver.blob_checksum(blob=self)
+        return self._checksum
+
+    @checksum.setter
+    def checksum(self, value: Optional[str]) -> None:
+        self._checksum = value
+
+    async def get_checksum(self) -> Optional[str]:
+        """Checksum of this blob, computed without blocking the event loop
+        when the driver has to hash the blob's contents.
+
+        .. code-block:: python
+
+            checksum = await picture_blob.get_checksum()
+
+        :return: Hex digest of the blob's :attr:`.Driver.hash_type` hash.
+        :rtype: str or None
+
+        :raises NotFoundError: If the blob object doesn't exist.
+        """
+        if self._checksum is None:
+            self._checksum = await self.driver.get_blob_checksum(blob=self)
+        return self._checksum
+
     @property
     def cdn_url(self) -> str:
         """The Content Delivery Network URL for this blob.
@@ -180,9 +249,11 @@ class Blob:
 
         :raises NotFoundError: If the blob object doesn't exist.
         """
+        self.driver._forget_blob(self.container.name, self.name)
         await self.driver.delete_blob(blob=self)
 
-    async def download(self, destination: FileLike) -> None:
+    async def download(self, destination: FileLike,
+                       byte_range: Tuple[int, Optional[int]] = None) -> None:
         """Download the contents of this blob into a file-like object or into
         a named file.
 
@@ -208,12 +279,182 @@ class Blob:
           a filename to be passed to `open`.
         :type destination: file or str
 
+        :param byte_range: (optional) Only download `(offset, length)` bytes
+          of the blob. A `length` of `None` reads to the end. The range is
+          read and written in chunks of :data:`RANGE_DOWNLOAD_CHUNK_SIZE`.
+        :type byte_range: tuple or None
+
         :return: NoneType
         :rtype: None
 
         :raises NotFoundError: If the blob object doesn't exist.
+        :raises BlobChangedError: If the blob keeps being replaced while it
+          is downloaded.
         """
-        await self.driver.download_blob(self, destination)
+        try:
+            if byte_range is None:
+                try:
+                    await self.driver.download_blob(self, destination)
+                except BlobChangedError:
+                    # The etag was read, maybe from the metadata cache,
+                    # before another client replaced the blob
+                    self.driver._forget_blob(self.container.name, self.name)
+                    await self._refresh()
+                    await self.driver.download_blob(self, destination)
+                return
+
+            if isinstance(destination, str):
+                with open(destination, 'wb') as dest_file:
+                    await self._download_range(dest_file, *byte_range)
+            else:
+                await self._download_range(destination, *byte_range)
+        except (NotFoundError, BlobChangedError):
+            self.driver._forget_blob(self.container.name, self.name)
+            raise
+
+    async def _refresh(self) -> None:
+        """Re-read this blob's metadata from the store, bypassing the
+        metadata cache."""
+        blob = await self.driver.get_blob(container=self.container,
+                                          blob_name=self.name)
+        self.driver._remember_blob(blob)
+        self.size = blob.size
+        self._checksum = blob._checksum
+        self.etag = blob.etag
+        self.meta_data = blob.meta_data
+        self.content_disposition = blob.content_disposition
+        self.content_type = blob.content_type
+        self.cache_control = blob.cache_control
+        self.modified_at = blob.modified_at
+        self.expires_at = blob.expires_at
+
+    async def _download_range(self, destination, offset: int,
+                              length: Optional[int] = None) -> None:
+        """Copy `length` bytes (to the end if None) from `offset` to a file
+        object, holding one chunk in memory at a time."""
+        loop = asyncio.get_running_loop()
+        while length is None or length > 0:
+            size = RANGE_DOWNLOAD_CHUNK_SIZE if length is None else \
+                min(length, RANGE_DOWNLOAD_CHUNK_SIZE)
+            chunk = await self.read_range(offset, size)
+            if chunk:
+                await loop.run_in_executor(None, destination.write, chunk)
+            if len(chunk) < size:
+                break
+            offset += len(chunk)
+            if length is not None:
+                length -= len(chunk)
+
+    async def read_range(self, offset: int = 0,
+                         length: Optional[int] = None) -> bytes:
+        """Read part of this blob without downloading the rest of it.
+
+        .. code-block:: python
+
+            archive_blob = await container.get_blob('archive.zip')
+            footer = await archive_blob.read_range(archive_blob.size - 22, 22)
+
+        :param offset: (optional) Position of the first byte to read.
+        :type offset: int
+
+        :param length: (optional) Number of bytes to read. `None` reads to the
+          end of the blob.
+        :type length: int or None
+
+        :return: The bytes read, fewer than `length` past the end of the
+          blob.
+        :rtype: bytes
+
+        :raises NotFoundError: If the blob object doesn't exist.
+        """
+        if offset < 0 or (length is not None and length < 0):
+            raise ValueError('offset and length must not be negative')
+        if length == 0:
+            return b''
+        return await self.driver.read_range(self, offset, length)
+
+    async def read_ranges(self, ranges: List[Tuple[int, int]],
+                          max_gap: int = RANGE_COALESCE_GAP) -> List[bytes]:
+        """Read several `(offset, length)` parts of this blob.
+
+        Ranges that overlap or lie at most `max_gap` bytes apart are fetched
+        with a single read, and the merged reads run concurrently.
+
+        .. code-block:: python
+
+            header, index = await blob.read_ranges([(0, 16), (4096, 512)])
+
+        :param ranges: Byte ranges as `(offset, length)` pairs.
+        :type ranges: list
+
+        :param max_gap: (optional) Largest number of unwanted bytes read to
+          join two ranges.
+        :type max_gap: int
+
+        :return: The bytes of each range, in the order requested.
+        :rtype: list
+
+        :raises NotFoundError: If the blob object doesn't exist.
+        """
+        merged = coalesce_ranges(ranges, max_gap=max_gap)
+        chunks = await asyncio.gather(*(self.read_range(offset, length)
+                                        for offset, length in merged))
+        starts = [start for start, _ in merged]
+
+        # Every requested range lies within exactly one merged range
+        results = []
+        for offset, length in ranges:
+            index = bisect.bisect_right(starts, offset) - 1
+            position = offset - starts[index]
+            results.append(chunks[index][position:position + length])
+        return results
+
+    def stream(self, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Read the contents of this blob as an async iterator of chunks.
+
+        The next chunk is only read from the backend once the previous one
+        has been consumed, so a slow consumer holds at most one chunk.
+
+        .. code-block:: python
+
+            picture_blob = await container.get_blob('picture.png')
+            async for chunk in picture_blob.stream(chunk_size=64 * 1024):
+                await response.write(chunk)
+
+        :param chunk_size: (optional) Maximum size of each chunk in bytes.
+        :type chunk_size: int
+
+        :return: Async iterator of `bytes` chunks.
+        :rtype: AsyncIterator[bytes]
+
+        :raises NotFoundError: If the blob object doesn't exist.
+        """
+        return self.driver.stream_blob(self, chunk_size=chunk_size)
+
+    def mmap(self, sequential: bool = False
+             ) -> AsyncContextManager[memoryview]:
+        """Map the contents of this blob into memory for random access.
+
+        Drivers backed by local files map the file itself, others read the
+        blob into a buffer. The view is read-only and must not be used after
+        the block exits. Slices or buffers taken from it stay valid, the
+        mapping is then closed once they are garbage collected.
+
+        .. code-block:: python
+
+            async with blob.mmap() as view:
+                header = struct.unpack_from('<4sI', view, 0)
+
+        :param sequential: (optional) Hint that the blob will be read front to
+          back instead of at random.
+        :type sequential: bool
+
+        :return: Async context manager yielding a read-only `memoryview`.
+        :rtype: AsyncContextManager[memoryview]
+
+        :raises NotFoundError: If the blob object doesn't exist.
+        """
+        return self.driver.mmap_blob(self, sequential=sequential)
 
     async def generate_download_url(self, expires: int = 3600, method: str = 'GET',
                               content_disposition: str = None,
@@ -323,6 +564,20 @@ class Blob:
         """
         raise NotImplementedError
         #await self.driver.patch_blob(blob=self)
+        #self.driver._forget_blob(self.container.name, self.name)
+
+    def _clone(self) -> 'Blob':
+        """Copy of this blob that can be changed independently, e.g. to
+        hand out a cached blob."""
+        return Blob(name=self.name, checksum=self._checksum, etag=self.etag,
+                    size=self.size, container=self.container,
+                    driver=self.driver, acl=self.acl,
+                    meta_data=self.meta_data,
+                    content_disposition=self.content_disposition,
+                    content_type=self.content_type,
+                    cache_control=self.cache_control,
+                    created_at=self.created_at, modified_at=self.modified_at,
+                    expires_at=self.expires_at)
 
     def __repr__(self):
         return self.file_url
@@ -505,8 +760,34 @@ class Container:
         warnings.warn("This method is not suitable for async")
         return self.driver.container_cdn_url(container=self)
 
-    async def get_blobs(self):
-        async for blob in self.driver.get_blobs(container=self):
+    async def get_blobs(self, prefix: str = None, delimiter: str = None,
+                        start_after: str = None):
+        """Iterate over the blobs in this container.
+
+        .. code-block:: python
+
+            container = await storage.get_container('container-name')
+            async for blob in container.get_blobs(prefix='images/'):
+                blob.name
+                # images/picture-1.png, images/picture-2.png
+
+        :param prefix: (optional) Only yield blobs whose name starts with it.
+        :type prefix: str or None
+
+        :param delimiter: (optional) Skip blobs whose name contains the
+          delimiter after `prefix`, i.e. only list one "folder" level.
+        :type delimiter: str or None
+
+        :param start_after: (optional) Only yield blobs whose name sorts after
+          it.
+        :type start_after: str or None
+
+        :yield: Blobs of this container.
+        :yield type: :class:`.Blob`
+        """
+        async for blob in self.driver.get_blobs(container=self, prefix=prefix,
+                                                delimiter=delimiter,
+                                                start_after=start_after):
             yield blob
 
     async def patch(self) -> None:
@@ -541,6 +822,37 @@ class Container:
         :raises NotFoundError: If the container doesn't exist.
         """
         await self.driver.delete_container(container=self)
+        if self.driver.metadata_cache is not None:
+            self.driver.metadata_cache.invalidate_prefix(
+                self.driver.alias_name, self.name)
+
+    async def delete_blobs(self, blobs: Iterable[Union[Blob, str]]
+                           ) -> Dict[str, Optional[Exception]]:
+        """Delete many blobs from this container with as few requests as
+        the driver allows.
+
+        .. code-block:: python
+
+            results = await container.delete_blobs(['a.png', 'b.png'])
+            # {'a.png': None, 'b.png': None}
+
+        Deleting a blob that does not exist is not an error.
+
+        :param blobs: Blob objects or blob names.
+        :type blobs: Iterable[Blob or str]
+
+        :return: `None` for each deleted blob name, or the exception that
+          prevented its deletion.
+        :rtype: dict
+        """
+        blob_names = [blob.name if isinstance(blob, Blob) else blob
+                      for blob in blobs]
+        for blob_name in blob_names:
+            self.driver._forget_blob(self.name, blob_name)
+        if not blob_names:
+            return {}
+        return await self.driver.delete_blobs(container=self,
+                                              blob_names=blob_names)
 
     async def upload_blob(self, filename: FileLike, blob_name: str = 'auto',blob_path='',
                     acl: str = None, meta_data: MetaData = None,
@@ -553,36 +865,54 @@ class Container:
             random - generate using uuid
             blob_name - use blob name overrides file if already exists
         """
-        check_file_not_empty(filename)
-        tmp_name = validate_file_or_path(filename)
+        # One read of the source tells if it is empty, its size, type and
+        # first bytes, which the driver reuses instead of reading again
+        preflight = await self.driver._run(upload_preflight, filename)
+        tmp_name = preflight.name
         if tmp_name is None:
             tmp_name = random_filename()
+        attempts = 1
         if blob_name == 'auto':
             blob_name = tmp_name
         elif blob_name == 'random':
+            # Created only if absent, so a collision is detected by the
+            # write itself instead of a lookup before every upload
             blob_name = random_filename(tmp_name)
-            max_retries = 5
-            attempt = 0
-            while attempt < max_retries:
-                try:
-                    found = await self.get_blob(blob_name)
-                except NotFoundError as err:
-                    break
-                attempt+=1
-        blob_name = clean_object_name(blob_name)
-        return await self.driver.upload_blob(
-                container=self, 
-                filename=filename,
-                blob_name=blob_name,
-                blob_path=blob_path,
-                acl=acl,
-                meta_data=meta_data,
-                content_type=content_type,
-                content_disposition=content_disposition,
-                cache_control=cache_control,
-                chunk_size=chunk_size, 
-                extra=extra
-            )
+            extra = dict(extra or {}, if_none_match='*')
+            attempts = RANDOM_NAME_ATTEMPTS
+        position = _stream_position(filename)
+
+        for attempt in range(1, attempts + 1):
+            blob_name = clean_object_name(blob_name)
+            self.driver._forget_blob(
+                self.name, clean_object_name(os.path.join(blob_path, blob_name)))
+            try:
+                blob = await self.driver.upload_blob(
+                        container=self, 
+                        filename=filename,
+                        blob_name=blob_name,
+                        blob_path=blob_path,
+                        acl=acl,
+                        meta_data=meta_data,
+                        content_type=content_type,
+                        content_disposition=content_disposition,
+                        cache_control=cache_control,
+                        chunk_size=chunk_size, 
+                        extra=extra,
+                        preflight=preflight
+                    )
+                break
+            except BlobExistsError:
+                if attempt == attempts or (position is None
+                                           and not isinstance(filename, str)):
+                    raise
+                logger.debug('Random blob name %s taken, regenerating',
+                             blob_name)
+                blob_name = random_filename(tmp_name)
+                if position is not None:
+                    getattr(filename, 'file', filename).seek(position)
+        self.driver._remember_blob(blob)
+        return blob
 
     async def get_blob(self, blob_name: str) -> Blob:
         """Get a blob object by name.
@@ -608,7 +938,16 @@ class Container:
                 raise InvalidFileURLError(messages.FILE_URL_INVALID%(blob_name,))
             blob_name = meta['blob']
 
-        return await self.driver.get_blob(container=self, blob_name=blob_name)
+        cache = self.driver.metadata_cache
+        if cache is not None:
+            blob = cache.get((self.driver.alias_name, self.name, blob_name))
+            if blob is not None:
+                # Callers may change their blob, the cached one stays intact
+                return blob._clone()
+
+        blob = await self.driver.get_blob(container=self, blob_name=blob_name)
+        self.driver._remember_blob(blob)
+        return blob
 
     async def generate_upload_url(self, blob_name: str, expires: int = 3600,
                             acl: str = None, meta_data: MetaData = None,
@@ -837,6 +1176,16 @@ class Driver(metaclass=abc.ABCMeta):
     :param region: (optional) Region to connect to.
     :type region: str
 
+    :param metadata_cache_size: (optional) Number of blobs whose metadata is
+      cached by :meth:`.Container.get_blob`. `0` (the default) disables the
+      cache.
+    :type metadata_cache_size: int
+
+    :param metadata_cache_ttl: (optional) Seconds cached blob metadata is
+      trusted for. Entries are not revalidated against the store, so changes
+      made by other clients are seen once the entry expires.
+    :type metadata_cache_ttl: float
+
     :param kwargs: (optional) Extra options for the driver.
     :type kwargs: dict
     """
@@ -851,12 +1200,121 @@ class Driver(metaclass=abc.ABCMeta):
     url = None  # type: Optional[str]
 
     def __init__(self, key: str = None, secret: str = None, region: str = None, alias_name='',
+                 metadata_cache_size: int = 0, metadata_cache_ttl: float = 60,
                  **kwargs: Dict) -> None:
         self.key = key
         self.secret = secret
         self.region = region
         self.alias_name = alias_name
+        self.instruments = []  # type: List[Instrument]
+        self.circuit_breaker = None  # type: Optional[CircuitBreaker]
+        self.metadata_cache = None  # type: Optional[MetadataCache]
+        if metadata_cache_size:
+            self.metadata_cache = MetadataCache(max_size=metadata_cache_size,
+                                                ttl=metadata_cache_ttl)
+
+    async def _run(self, func, *args, **kwargs):
+        """Run blocking `func` in the default executor without blocking the
+        event loop. Drivers with their own pool run it there instead."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(func, *args, **kwargs))
+
+    async def open(self) -> 'Driver':
+        """Acquire long-lived resources (connection pools, executors) used by
+        the driver. Drivers open lazily on first use, so calling this is only
+        needed to pay the setup cost up front.
+
+        :return: The driver itself.
+        :rtype: :class:`.Driver`
+        """
+        return self
+
+    async def close(self) -> None:
+        """Release resources acquired by :meth:`open` or on first use.
+
+        :return: NoneType
+        :rtype: None
+        """
+        pass
+
+    def add_instrument(self, instrument: Instrument) -> None:
+        """Report every operation of this driver to `instrument`.
+
+        .. code-block:: python
 
+            from aiocloudstorage.instrumentation import MetricsCollector
+
+            collector = MetricsCollector()
+            storage.add_instrument(collector)
+
+        :param instrument: Object receiving start, finish and error events.
+        :type instrument: :class:`.Instrument`
+
+        :return: NoneType
+        :rtype: None
+        """
+        if instrument not in self.instruments:
+            self.instruments.append(instrument)
+
+    def remove_instrument(self, instrument: Instrument) -> None:
+        """Stop reporting operations to `instrument`.
+
+        :param instrument: An instrument added with :meth:`add_instrument`.
+        :type instrument: :class:`.Instrument`
+
+        :return: NoneType
+        :rtype: None
+        """
+        if instrument in self.instruments:
+            self.instruments.remove(instrument)
+
+    def set_circuit_breaker(self,
+                            breaker: Optional[CircuitBreaker]) -> None:
+        """Fail operations fast while `breaker` is open. The breaker watches
+        the driver's operations and probes it with :meth:`health_check`.
+
+        :param breaker: Circuit breaker, or `None` to remove the current one.
+        :type breaker: :class:`.CircuitBreaker` or None
+
+        :return: NoneType
+        :rtype: None
+        """
+        if self.circuit_breaker is not None:
+            self.remove_instrument(self.circuit_breaker)
+        self.circuit_breaker = breaker
+        if breaker is not None:
+            breaker.store = self.alias_name
+            breaker.probe = self.health_check
+            self.add_instrument(breaker)
+
+    async def health_check(self) -> None:
+        """Make a cheap request to the store, raising if it fails.
+
+        :return: NoneType
+        :rtype: None
+        """
+        async for _ in self.get_containers():
+            break
+
+    def _remember_blob(self, blob: 'Blob') -> None:
+        """Store blob metadata in the metadata cache, if enabled."""
+        if self.metadata_cache is not None:
+            self.metadata_cache.set(
+                (self.alias_name, blob.container.name, blob.name),
+                blob._clone())
+
+    def _forget_blob(self, container_name: str, blob_name: str) -> None:
+        """Drop blob metadata from the metadata cache, if enabled."""
+        if self.metadata_cache is not None:
+            self.metadata_cache.invalidate(
+                (self.alias_name, container_name, blob_name))
+
+    async def __aenter__(self) -> 'Driver':
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
 
     @staticmethod
     @abstractmethod
@@ -1020,7 +1478,8 @@ class Driver(metaclass=abc.ABCMeta):
                     blob_name: str = None, acl: str = None,
                     meta_data: MetaData = None, content_type: str = None,
                     content_disposition: str = None, cache_control: str = None,
-                    chunk_size=1024, extra: ExtraOptions = None) -> 'Blob':
+                    chunk_size=1024, extra: ExtraOptions = None,
+                    preflight: UploadPreflight = None) -> 'Blob':
         """Upload a filename or file like object to a container.
 
         .. important:: This class method is called by
@@ -1061,6 +1520,13 @@ class Driver(metaclass=abc.ABCMeta):
         :param extra: (optional) Extra parameters for the request.
         :type extra: Dict[str, str] or None
 
+        :param preflight: (optional) Result of
+          :func:`~aiocloudstorage.helpers.upload_preflight` for `filename`.
+          Small sources are uploaded from its `head` without reading them
+          again.
+        :type preflight: :class:`~aiocloudstorage.helpers.UploadPreflight`
+          or None
+
         :return: The uploaded blob.
         :rtype: Blob
         """
@@ -1086,14 +1552,28 @@ class Driver(metaclass=abc.ABCMeta):
         pass
 
     @abstractmethod
-    def get_blobs(self, container: 'Container') -> Iterable['Blob']:
+    def get_blobs(self, container: 'Container', prefix: str = None,
+                  delimiter: str = None,
+                  start_after: str = None) -> Iterable['Blob']:
         """Get all blobs associated to the container.
 
-        .. important:: This class method is called by :meth:`.Blob.__iter__`.
+        .. important:: This class method is called by
+          :meth:`.Container.get_blobs`.
 
         :param container: A container instance.
         :type container: :class:`.Container`
 
+        :param prefix: (optional) Only yield blobs whose name starts with it.
+        :type prefix: str or None
+
+        :param delimiter: (optional) Skip blobs whose name contains the
+          delimiter after `prefix`.
+        :type delimiter: str or None
+
+        :param start_after: (optional) Only yield blobs whose name sorts after
+          it.
+        :type start_after: str or None
+
         :return: Iterable of all blobs belonging to this container.
         :rtype: Iterable{Blob]
         """
@@ -1150,6 +1630,37 @@ class Driver(metaclass=abc.ABCMeta):
         """
         pass
 
+    async def delete_blobs(self, container: 'Container',
+                           blob_names: List[str]
+                           ) -> Dict[str, Optional[Exception]]:
+        """Delete many blobs from a container.
+
+        .. important:: This class method is called by
+          :meth:`.Container.delete_blobs`. Drivers should override it with a
+          batched implementation; the default deletes one blob at a time.
+
+        :param container: The container holding the blobs.
+        :type container: :class:`.Container`
+
+        :param blob_names: Names of the blobs to delete.
+        :type blob_names: list
+
+        :return: `None` for each deleted blob name, or the exception that
+          prevented its deletion.
+        :rtype: dict
+        """
+        results = {}  # type: Dict[str, Optional[Exception]]
+        for blob_name in blob_names:
+            try:
+                blob = await self.get_blob(container, blob_name)
+                await self.delete_blob(blob)
+                results[blob_name] = None
+            except NotFoundError:
+                results[blob_name] = None
+            except Exception as err:
+                results[blob_name] = err
+        return results
+
     @abstractmethod
     def blob_cdn_url(self, blob: 'Blob') -> str:
         """The Content Delivery Network URL for the blob.
@@ -1253,6 +1764,135 @@ class Driver(metaclass=abc.ABCMeta):
         """
         pass
 
+    async def read_range(self, blob: 'Blob', offset: int,
+                         length: Optional[int]) -> bytes:
+        """Read part of a blob.
+
+        .. important:: This class method is called by :meth:`.Blob.read_range`.
+          Drivers should override it with a native ranged read; the default
+          streams the blob and discards the bytes outside the range.
+
+        :param blob: The blob to read.
+        :type blob: Blob
+
+        :param offset: Position of the first byte to read.
+        :type offset: int
+
+        :param length: Number of bytes to read, `None` to read to the end.
+        :type length: int or None
+
+        :return: The bytes read.
+        :rtype: bytes
+
+        :raises NotFoundError: If the blob object doesn't exist.
+        """
+        end = None if length is None else offset + length
+        position = 0
+        parts = []
+        stream = self.stream_blob(blob)
+        try:
+            async for chunk in stream:
+                chunk_end = position + len(chunk)
+                if chunk_end > offset:
+                    parts.append(chunk[max(offset - position, 0):
+                                       None if end is None else end - position])
+                position = chunk_end
+                if end is not None and position >= end:
+                    break
+        finally:
+            await stream.aclose()
+        return b''.join(parts)
+
+    @asynccontextmanager
+    async def mmap_blob(self, blob: 'Blob', sequential: bool = False
+                        ) -> AsyncIterator[memoryview]:
+        """Map the contents of a blob into memory.
+
+        .. important:: This class method is called by :meth:`.Blob.mmap`.
+          The default reads the whole blob with :meth:`read_range`.
+
+        :param blob: The blob to map.
+        :type blob: Blob
+
+        :param sequential: (optional) Hint that the blob will be read front to
+          back.
+        :type sequential: bool
+
+        :yield: Read-only view of the blob's contents.
+        :yield type: memoryview
+
+        :raises NotFoundError: If the blob object doesn't exist.
+        """
+        view = memoryview(await self.read_range(blob, 0, None))
+        try:
+            yield view
+        finally:
+            try:
+                view.release()
+            except BufferError:
+                # Still exported, released once the exports are collected
+                pass
+
+    async def stream_blob(self, blob: 'Blob',
+                          chunk_size: int = STREAM_CHUNK_SIZE
+                          ) -> AsyncIterator[bytes]:
+        """Read the contents of a blob as an async iterator of chunks.
+
+        .. important:: This class method is called by :meth:`.Blob.stream`.
+          Drivers should override it to read from the backend directly; the
+          default downloads the blob into a temporary file first.
+
+        :param blob: The blob to read.
+        :type blob: Blob
+
+        :param chunk_size: (optional) Maximum size of each chunk in bytes.
+        :type chunk_size: int
+
+        :return: Async iterator of `bytes` chunks.
+        :rtype: AsyncIterator[bytes]
+
+        :raises NotFoundError: If the blob object doesn't exist.
+        """
+        with tempfile.SpooledTemporaryFile(max_size=chunk_size) as spool:
+            await self.download_blob(blob, spool)
+            spool.seek(0)
+            while True:
+                chunk = spool.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def blob_checksum(self, blob: 'Blob') -> Optional[str]:
+        """Compute the checksum of a blob created without one.
+
+        .. important:: This class method is called by :attr:`.Blob.checksum`.
+
+        :param blob: The blob to compute the checksum for.
+        :type blob: Blob
+
+        :return: Hex digest of the blob's contents or `None` if the driver
+          cannot compute it.
+        :rtype: str or None
+        """
+        return None
+
+    async def get_blob_checksum(self, blob: 'Blob') -> Optional[str]:
+        """Compute the checksum of a blob created without one, off the event
+        loop.
+
+        .. important:: This class method is called by
+          :meth:`.Blob.get_checksum`. The default calls
+          :meth:`blob_checksum`.
+
+        :param blob: The blob to compute the checksum for.
+        :type blob: Blob
+
+        :return: Hex digest of the blob's contents or `None` if the driver
+          cannot compute it.
+        :rtype: str or None
+        """
+        return self.blob_checksum(blob)
+
     def blob_file_url(self,blob: Blob) -> str:
         return '%s://%s/%s'%(self.alias_name,blob.container.name,blob.name)
 
@@ -0,0 +1,336 @@
+"""Throughput benchmarks for the storage drivers.
+
+Measures operations per second, MB/s and p50/p99 latency of the module level
+API (`upload`, `download`, `bulk_upload`, `bulk_download`) and of
+`get_blob`/`get_blobs` for a range of object sizes and concurrency levels,
+and prints the results as JSON so runs of different versions can be compared.
+
+.. code-block:: bash
+
+    python -m aiocloudstorage.bench --driver local --sizes 1KB,1MB,64MB \\
+        --concurrency 1,8,32 --output local.json
+
+    # S3 compatible endpoint, or an in-process moto server when omitted
+    python -m aiocloudstorage.bench --driver minio --endpoint http://localhost:9000 \\
+        --key minio --secret minio123
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import platform
+import shutil
+import socket
+import sys
+import tempfile
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiocloudstorage
+from aiocloudstorage import (
+    bulk_delete,
+    bulk_download,
+    bulk_upload,
+    configure,
+    download,
+    shutdown,
+    upload,
+)
+
+SIZE_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+OPERATIONS = ('upload', 'download', 'bulk_upload', 'bulk_download',
+              'get_blob', 'get_blobs')
+DEFAULT_SIZES = '1KB,64KB,1MB,16MB'
+DEFAULT_CONCURRENCY = '1,8,32'
+#: Store names; file urls only accept names mentioning the storage type
+STORE_NAMES = {'local': 'fs', 'minio': 'minio'}
+
+
+def parse_size(value: str) -> int:
+    """Parse a size like `64KB` or `1GB` into bytes."""
+    value = value.strip().upper()
+    for unit in sorted(SIZE_UNITS, key=len, reverse=True):
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * SIZE_UNITS[unit])
+    return int(value)
+
+
+def format_size(size: int) -> str:
+    for unit in ('GB', 'MB', 'KB'):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return '%d%s' % (size // SIZE_UNITS[unit], unit)
+    return '%dB' % size
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of `values`."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def summarize(operation: str, size: int, concurrency: int,
+              latencies: List[float], elapsed: float, ops: int,
+              nbytes: int, errors: int = 0) -> Dict:
+    return {
+        'operation': operation,
+        'size': size,
+        'size_label': format_size(size),
+        'concurrency': concurrency,
+        'ops': ops,
+        'seconds': round(elapsed, 6),
+        'ops_per_sec': round(ops / elapsed, 3) if elapsed else None,
+        'mb_per_sec': round(nbytes / elapsed / SIZE_UNITS['MB'], 3)
+        if elapsed else None,
+        'p50_ms': _ms(percentile(latencies, 0.50)),
+        'p99_ms': _ms(percentile(latencies, 0.99)),
+        'errors': errors,
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+async def run_bounded(count: int, concurrency: int,
+                      func: Callable) -> Tuple[List[float], float]:
+    """Await `func(index)` for `count` indexes, at most `concurrency` at a
+    time, and return the latency of each call and the total time."""
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def timed(index):
+        async with slots:
+            started = time.perf_counter()
+            await func(index)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(index) for index in range(count)))
+    return latencies, time.perf_counter() - started
+
+
+def write_payload(path: str, size: int) -> None:
+    block = os.urandom(min(size, SIZE_UNITS['MB']))
+    with open(path, 'wb') as payload:
+        written = 0
+        while written < size:
+            written += payload.write(block[:size - written])
+
+
+async def bench_size(size: int, concurrency_levels: List[int],
+                     operations: List[str], count: int, max_bytes: int,
+                     work_dir: str) -> List[Dict]:
+    # Keep the bytes moved per case bounded for large objects
+    count = max(1, min(count, max_bytes // size))
+    payload = os.path.join(work_dir, 'payload-%d' % size)
+    write_payload(payload, size)
+    download_dir = os.path.join(work_dir, 'downloads')
+    results = []
+
+    for concurrency in concurrency_levels:
+        prefix = 'bench/%s/%d/%s/' % (format_size(size), concurrency,
+                                      uuid.uuid4().hex[:8])
+        blobs = []
+
+        async def upload_one(index):
+            blobs.append(await upload(payload,
+                                      destfilename='%s%d' % (prefix, index)))
+
+        latencies, elapsed = await run_bounded(count, concurrency, upload_one)
+        # The default container, as configured
+        container = blobs[0].container
+        urls = [blob.file_url for blob in blobs]
+        if 'upload' in operations:
+            results.append(summarize('upload', size, concurrency, latencies,
+                                     elapsed, count, count * size))
+
+        if 'download' in operations:
+            async def download_one(index):
+                await download(urls[index], destfilename=str(index),
+                               destpath=download_dir)
+
+            latencies, elapsed = await run_bounded(count, concurrency,
+                                                   download_one)
+            results.append(summarize('download', size, concurrency,
+                                     latencies, elapsed, count, count * size))
+
+        if 'get_blob' in operations:
+            async def get_one(index):
+                await container.get_blob(blobs[index].name)
+
+            latencies, elapsed = await run_bounded(count, concurrency, get_one)
+            results.append(summarize('get_blob', size, concurrency,
+                                     latencies, elapsed, count, 0))
+
+        if 'get_blobs' in operations:
+            async def list_prefix(index):
+                async for _ in container.get_blobs(prefix=prefix):
+                    pass
+
+            latencies, elapsed = await run_bounded(concurrency, concurrency,
+                                                   list_prefix)
+            results.append(summarize('get_blobs', size, concurrency,
+                                     latencies, elapsed,
+                                     count * concurrency, 0))
+
+        # Bulk calls report the latency of the whole call
+        if 'bulk_upload' in operations:
+            started = time.perf_counter()
+            bulk_urls = await bulk_upload(
+                {index: payload for index in range(count)},
+                destfilename='random', destpath=prefix + 'bulk',
+                max_concurrency=concurrency)
+            elapsed = time.perf_counter() - started
+            # Failed uploads are reported, not downloaded
+            uploaded = [url for url in bulk_urls.values()
+                        if not isinstance(url, Exception)]
+            results.append(summarize('bulk_upload', size, concurrency,
+                                     [elapsed], elapsed, len(uploaded),
+                                     len(uploaded) * size,
+                                     errors=count - len(uploaded)))
+            urls.extend(uploaded)
+
+        if 'bulk_download' in operations:
+            started = time.perf_counter()
+            paths = await bulk_download(
+                {index: url for index, url in enumerate(urls)},
+                destpath=download_dir, max_concurrency=concurrency,
+                return_exceptions=True)
+            elapsed = time.perf_counter() - started
+            downloaded = sum(1 for path in paths.values()
+                             if not isinstance(path, Exception))
+            results.append(summarize('bulk_download', size, concurrency,
+                                     [elapsed], elapsed, downloaded,
+                                     downloaded * size,
+                                     errors=len(urls) - downloaded))
+
+        await bulk_delete(urls)
+        shutil.rmtree(download_dir, ignore_errors=True)
+
+    os.remove(payload)
+    return results
+
+
+def store_configuration(args, work_dir: str) -> Dict:
+    conf = {'name': STORE_NAMES[args.driver], 'driver': args.driver.upper()}
+    if args.driver == 'local':
+        conf['endpoint'] = args.endpoint or os.path.join(work_dir, 'store')
+        os.makedirs(conf['endpoint'], exist_ok=True)
+    else:
+        conf.update(endpoint=args.endpoint, key=args.key, secret=args.secret,
+                    region=args.region)
+    return {
+        'STORAGE_ENABLED': True,
+        'STORAGE_CONFIG': [conf],
+        'DRIVER_%s_ENABLED' % conf['driver']: True,
+        'DEFAULT_STORE': conf['name'],
+        'DEFAULT_CONTAINER': args.container,
+    }
+
+
+def start_s3_stand_in():
+    """Start moto's S3 server in a thread, return it and its endpoint."""
+    try:
+        from moto.server import ThreadedMotoServer
+    except ImportError:
+        raise SystemExit('--endpoint is required for the minio driver '
+                         'unless moto[server] is installed')
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=port)
+    # Keep stdout for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        server.start()
+    return server, 'http://127.0.0.1:%d' % port
+
+
+async def run(args) -> Dict:
+    work_dir = tempfile.mkdtemp(prefix='aiocloudstorage-bench-')
+    server = None
+    try:
+        if args.driver == 'minio' and not args.endpoint:
+            server, args.endpoint = start_s3_stand_in()
+            args.key, args.secret = args.key or 'bench', args.secret or 'bench'
+
+        await configure(store_configuration(args, work_dir))
+        results = []
+        for size in args.sizes:
+            results.extend(await bench_size(
+                size, args.concurrency, args.operations, args.count,
+                args.max_bytes, work_dir))
+        return {
+            'aiocloudstorage': aiocloudstorage.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'driver': args.driver,
+            'endpoint': None if args.driver == 'local' else args.endpoint,
+            'stand_in': server is not None,
+            'results': results,
+        }
+    finally:
+        await shutdown()
+        if server is not None:
+            server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='python -m aiocloudstorage.bench',
+        description='Benchmark aiocloudstorage drivers.')
+    parser.add_argument('--driver', choices=('local', 'minio'),
+                        default='local')
+    parser.add_argument('--endpoint', help='Local store folder or S3 '
+                        'endpoint URL. Defaults to a temporary folder or an '
+                        'in-process moto server.')
+    parser.add_argument('--key', default=os.environ.get('MINIO_ACCESS_KEY'))
+    parser.add_argument('--secret',
+                        default=os.environ.get('MINIO_SECRET_KEY'))
+    parser.add_argument('--region', default='us-east-1')
+    parser.add_argument('--container', default='aiocloudstorage-bench')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help='Comma separated object sizes, 1KB to 1GB.')
+    parser.add_argument('--concurrency', default=DEFAULT_CONCURRENCY,
+                        help='Comma separated concurrency levels.')
+    parser.add_argument('--operations', default=','.join(OPERATIONS),
+                        help='Comma separated subset of %s.' %
+                        ', '.join(OPERATIONS))
+    parser.add_argument('--count', type=int, default=64,
+                        help='Objects per case.')
+    parser.add_argument('--max-bytes', type=parse_size, default='256MB',
+                        help='Upper bound of bytes uploaded per case; '
+                        'lowers --count for large objects.')
+    parser.add_argument('--output', help='Write JSON here instead of stdout.')
+    args = parser.parse_args(argv)
+
+    args.sizes = [parse_size(size) for size in args.sizes.split(',')]
+    args.concurrency = [int(level) for level in args.concurrency.split(',')]
+    args.operations = [op.strip() for op in args.operations.split(',')]
+    unknown = set(args.operations) - set(OPERATIONS)
+    if unknown:
+        parser.error('unknown operations: %s' % ', '.join(sorted(unknown)))
+    return args
+
+
+def main(argv: List[str] = None) -> Dict:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+"""Circuit breaker of a store.
+
+A :class:`CircuitBreaker` watches the operations of a driver (it is an
+:class:`.Instrument`) and opens when too many of the recent ones failed or
+were slow. While it is open, driver operations raise
+:class:`.CircuitOpenError` at once instead of waiting for the store to time
+out. After `open_timeout` seconds the breaker turns half-open and runs a
+health probe; it closes if the probe succeeds and opens again otherwise.
+
+.. code-block:: python
+
+    from aiocloudstorage.breaker import CircuitBreaker
+
+    breaker = CircuitBreaker(error_rate=0.5, slow_call_duration=5)
+    breaker.add_listener(lambda event: print(event))
+    storage.set_circuit_breaker(breaker)
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional, Tuple, Type
+
+from aiocloudstorage import messages
+from aiocloudstorage.exceptions import (
+    BlobChangedError,
+    BlobExistsError,
+    CircuitOpenError,
+    FileEmptyError,
+    InvalidFileURLError,
+    IsNotEmptyError,
+    NotFoundError,
+)
+from aiocloudstorage.instrumentation import Instrument, OperationEvent
+
+__all__ = ['CircuitBreaker', 'CircuitEvent', 'CLOSED', 'HALF_OPEN', 'OPEN']
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+#: Errors caused by the request rather than by the store's health
+DEFAULT_IGNORED_ERRORS = (NotFoundError, IsNotEmptyError, BlobExistsError,
+                          BlobChangedError, InvalidFileURLError,
+                          FileEmptyError, CircuitOpenError)
+
+#: Single request operations whose duration reflects the store's latency.
+#: Transfers and listings last as long as their data (and consumer) need
+DEFAULT_LATENCY_OPERATIONS = frozenset((
+    'get_blob', 'get_container', 'create_container', 'delete_blob',
+    'delete_container'))
+
+
+class CircuitEvent:
+    """A state transition, passed to the listeners of a
+    :class:`CircuitBreaker`.
+
+    :param store: Store alias of the breaker.
+    :type store: str
+
+    :param previous: State before the transition.
+    :type previous: str
+
+    :param state: State after the transition.
+    :type state: str
+
+    :param reason: Why the state changed.
+    :type reason: str
+    """
+    __slots__ = ('store', 'previous', 'state', 'reason', 'time')
+
+    def __init__(self, store: str, previous: str, state: str,
+                 reason: str) -> None:
+        self.store = store
+        self.previous = previous
+        self.state = state
+        self.reason = reason
+        #: :func:`time.time` value of the transition.
+        self.time = time.time()
+
+    def __repr__(self):
+        return '<CircuitEvent %s %s -> %s (%s)>' % (
+            self.store, self.previous, self.state, self.reason)
+
+
+class CircuitBreaker(Instrument):
+    """Fail fast while a store is unhealthy.
+
+    Configured for every store with the `CIRCUIT_BREAKER` key of the
+    configuration, or per store with the `circuit_breaker` key of
+    `STORAGE_CONFIG`, both taking the keyword arguments below.
+
+    :param error_rate: (optional) Ratio of failed calls in the window that
+      opens the breaker.
+    :type error_rate: float
+
+    :param slow_call_duration: (optional) Seconds after which a call counts
+      as slow. `None` ignores latency.
+    :type slow_call_duration: float or None
+
+    :param slow_call_rate: (optional) Ratio of slow calls in the window that
+      opens the breaker.
+    :type slow_call_rate: float
+
+    :param window: (optional) Number of recent calls considered.
+    :type window: int
+
+    :param min_calls: (optional) Calls needed in the window before the
+      breaker may open.
+    :type min_calls: int
+
+    :param open_timeout: (optional) Seconds the breaker stays open before a
+      health probe is attempted.
+    :type open_timeout: float
+
+    :param ignored_errors: (optional) Exception types that do not count as
+      failures.
+    :type ignored_errors: tuple
+
+    :param latency_operations: (optional) Operations that may count as slow.
+      Other operations only count as failed or not.
+    :type latency_operations: set
+    """
+
+    def __init__(self, error_rate: float = 0.5,
+                 slow_call_duration: Optional[float] = 10.0,
+                 slow_call_rate: float = 0.8, window: int = 50,
+                 min_calls: int = 10, open_timeout: float = 30.0,
+                 ignored_errors: Tuple[Type[BaseException], ...] =
+                 DEFAULT_IGNORED_ERRORS,
+                 latency_operations: Iterable[str] =
+                 DEFAULT_LATENCY_OPERATIONS) -> None:
+        self.error_rate = error_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min_calls
+        self.open_timeout = open_timeout
+        self.ignored_errors = tuple(ignored_errors)
+        self.latency_operations = frozenset(latency_operations)
+        self.state = CLOSED
+        #: Store alias, set by :meth:`.Driver.set_circuit_breaker`
+        self.store = None  # type: Optional[str]
+        #: Coroutine function returning when the store is healthy
+        self.probe = None  # type: Optional[Callable]
+        self.listeners = []  # type: list
+        #: Calls rejected while the breaker was not closed
+        self.rejected = 0
+        self._calls = deque(maxlen=window)  # type: deque
+        self._probe_task = None  # type: Optional[asyncio.Task]
+
+    @classmethod
+    def from_config(cls, config) -> Optional['CircuitBreaker']:
+        """Build a breaker from a `circuit_breaker` configuration value.
+
+        :param config: Keyword arguments of :class:`CircuitBreaker`, `True`
+          for the defaults or a false value to disable it.
+        :type config: dict or bool or None
+
+        :return: Circuit breaker or `None`.
+        :rtype: :class:`CircuitBreaker` or None
+        """
+        if not config:
+            return None
+        return cls(**(config if isinstance(config, dict) else {}))
+
+    def add_listener(self, listener: Callable[[CircuitEvent], None]) -> None:
+        """Call `listener` with a :class:`CircuitEvent` on every transition.
+
+        :param listener: Callback, run on the event loop.
+        :type listener: callable
+
+        :return: NoneType
+        :rtype: None
+        """
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def remove_listener(self,
+                        listener: Callable[[CircuitEvent], None]) -> None:
+        """Stop notifying `listener`.
+
+        :param listener: A listener added with :meth:`add_listener`.
+        :type listener: callable
+
+        :return: NoneType
+        :rtype: None
+        """
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def before_call(self, operation: str) -> None:
+        """Reject `operation` unless the breaker is closed. The health probe
+        itself is let through while half-open.
+
+        :param operation: Driver operation about to run.
+        :type operation: str
+
+        :return: NoneType
+        :rtype: None
+
+        :raises CircuitOpenError: If the breaker is open or half-open.
+        """
+        if self.state == CLOSED:
+            return
+        if self._probe_task is not None and \
+                asyncio.current_task() is self._probe_task:
+            return
+        self.rejected += 1
+        raise CircuitOpenError(messages.CIRCUIT_OPEN % (self.store, operation))
+
+    def on_finish(self, event: OperationEvent) -> None:
+        slow = self.slow_call_duration is not None and \
+            event.operation in self.latency_operations and \
+            event.duration >= self.slow_call_duration
+        self._record(False, slow)
+
+    def on_error(self, event: OperationEvent) -> None:
+        if not isinstance(event.error, Exception) or \
+                isinstance(event.error, self.ignored_errors):
+            self.on_finish(event)
+            return
+        self._record(True, False)
+
+    def _record(self, failed: bool, slow: bool) -> None:
+        # Calls started before the breaker opened do not count
+        if self.state != CLOSED:
+            return
+        self._calls.append((failed, slow))
+        if len(self._calls) < self.min_calls:
+            return
+        failures = sum(1 for failed, _ in self._calls if failed)
+        slow_calls = sum(1 for _, slow in self._calls if slow)
+        if failures >= self.error_rate * len(self._calls):
+            self.trip('%d of %d calls failed' % (failures, len(self._calls)))
+        elif slow_calls >= self.slow_call_rate * len(self._calls):
+            self.trip('%d of %d calls were slow' % (slow_calls,
+                                                    len(self._calls)))
+
+    def trip(self, reason: str = 'tripped') -> None:
+        """Open the breaker and schedule a health probe.
+
+        :param reason: (optional) Reason reported in the event.
+        :type reason: str
+
+        :return: NoneType
+        :rtype: None
+        """
+        self._transition(OPEN, reason)
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.ensure_future(self._probe_loop())
+
+    def reset(self, reason: str = 'reset') -> None:
+        """Close the breaker and forget the recent calls.
+
+        :param reason: (optional) Reason reported in the event.
+        :type reason: str
+
+        :return: NoneType
+        :rtype: None
+        """
+        self._calls.clear()
+        self._transition(CLOSED, reason)
+        if self._probe_task is not None and \
+                self._probe_task is not asyncio.current_task():
+            self._probe_task.cancel()
+        self._probe_task = None
+
+    async def _probe_loop(self) -> None:
+        while self.state != CLOSED:
+            await asyncio.sleep(self.open_timeout)
+            self._transition(HALF_OPEN, 'probing')
+            try:
+                if self.probe is not None:
+                    await self.probe()
+            except Exception as err:
+                self._transition(OPEN, 'probe failed: %s' % err)
+            else:
+                self.reset('probe succeeded')
+                return
+
+    def _transition(self, state: str, reason: str) -> None:
+        if state == self.state:
+            return
+        event = CircuitEvent(self.store, self.state, state, reason)
+        self.state = state
+        log = logger.info if state == CLOSED else logger.warning
+        log('Circuit breaker of store %s is %s: %s', self.store, state, reason)
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception('Circuit breaker listener %r failed',
+                                 listener)
+
+    async def close(self) -> None:
+        """Cancel the pending health probe.
+
+        :return: NoneType
+        :rtype: None
+        """
+        task, self._probe_task = self._probe_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        """State and counters of the breaker.
+
+        :return: `state`, `calls`, `failures` and `rejected`.
+        :rtype: dict
+        """
+        return {
+            'state': self.state,
+            'calls': len(self._calls),
+            'failures': sum(1 for failed, _ in self._calls if failed),
+            'rejected': self.rejected,
+        }
+
+    def __repr__(self):
+        return '<CircuitBreaker %s %s>' % (self.store, self.state)
@@ -0,0 +1,138 @@
+"""In-process cache of blob metadata."""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+__all__ = ['MetadataCache']
+
+
+class MetadataCache:
+    """Bounded LRU cache whose entries expire after `ttl` seconds.
+
+    Drivers use it to keep :class:`.Blob` objects keyed by
+    ``(store, container, blob name)`` so hot objects are not looked up on
+    every :meth:`.Container.get_blob` call.
+
+    Entries are only invalidated by this process's own uploads and deletes,
+    or when their TTL runs out. They are never revalidated against the store
+    (that would cost the lookup the cache saves), so a blob changed by
+    another client may be served stale for up to `ttl` seconds.
+
+    .. code-block:: python
+
+        cache = MetadataCache(max_size=10000, ttl=30)
+        cache.set(('minio', 'container', 'picture.png'), blob)
+        cache.get(('minio', 'container', 'picture.png'))
+        # <Blob picture.png container MINIO>
+
+    :param max_size: (optional) Maximum number of entries. The least recently
+      used entry is evicted when it is exceeded.
+    :type max_size: int
+
+    :param ttl: (optional) Seconds an entry stays valid.
+    :type ttl: float
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # type: OrderedDict
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached value, counting a hit or a miss.
+
+        :param key: Cache key.
+        :type key: tuple
+
+        :return: The value or `None` if it is missing or expired.
+        :rtype: Any or None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache a value, evicting the least recently used entries if the
+        cache is full.
+
+        :param key: Cache key.
+        :type key: tuple
+
+        :param value: Value to cache.
+        :type value: Any
+
+        :return: NoneType
+        :rtype: None
+        """
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a cached value if present.
+
+        :param key: Cache key.
+        :type key: tuple
+
+        :return: NoneType
+        :rtype: None
+        """
+        self._entries.pop(key, None)
+
+    def invalidate_prefix(self, *prefix: Hashable) -> None:
+        """Drop every tuple key starting with `prefix`, e.g. all blobs of a
+        deleted container.
+
+        :param prefix: Leading key items.
+        :type prefix: tuple
+
+        :return: NoneType
+        :rtype: None
+        """
+        size = len(prefix)
+        for key in [key for key in self._entries if key[:size] == prefix]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop all entries. Counters are kept.
+
+        :return: NoneType
+        :rtype: None
+        """
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters and the current size.
+
+        :return: Counters by name.
+        :rtype: dict
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self):
+        return '<MetadataCache size=%d max_size=%d ttl=%s>' % (
+            len(self._entries), self.max_size, self.ttl)
@@ -1,14 +1,18 @@
 """Local File System Driver."""
 import errno
+import functools
 import hashlib
 import logging
+import mmap
 import os
 import pathlib
 import shutil
 import sys
-from contextlib import contextmanager
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Tuple
 
 import filelock
 import itsdangerous
@@ -18,20 +22,30 @@ import asyncio
 from aiocloudstorage import Blob, Container, Driver, messages
 from aiocloudstorage.utils import camelize, underscore
 from aiocloudstorage.exceptions import (
+    BlobExistsError,
     CloudStorageError,
+    ContainerNotFoundError,
     CredentialsError,
     IsNotEmptyError,
     NotFoundError,
     SignatureExpiredError,
 )
 from aiocloudstorage.helpers import (
+    COPY_BUFFER_SIZE,
+    UploadPreflight,
+    copy_stream,
     file_checksum,
+    file_descriptor,
     file_content_type,
-    read_in_chunks,
     validate_file_or_path,
     is_valid_bucket_name,
     clean_object_name,
-    transfer_stream,
+)
+from aiocloudstorage.instrumentation import (
+    blob_size,
+    instrumented,
+    result_length,
+    result_size,
 )
 from aiocloudstorage.typed import (
     ContentLength,
@@ -47,6 +61,9 @@ logger = logging.getLogger(__name__)
 
 IGNORE_FOLDERS = ['.lock', '.hash', '.DS_STORE']
 
+#: Number of files a single executor thread unlinks for `delete_blobs`
+DELETE_BATCH_SIZE = 100
+
 
 @contextmanager
 def lock_local_file(path: str) -> filelock.FileLock:
@@ -67,12 +84,14 @@ def lock_local_file(path: str) -> filelock.FileLock:
     except filelock.Timeout:
         raise CloudStorageError('Lock timeout')
 
-    yield lock
-
-    if lock.is_locked:
-        lock.release()
+    try:
+        yield lock
+    finally:
+        # Also when the block failed, or the lock file would be listed
+        if lock.is_locked:
+            lock.release()
 
-    os.remove(lock.lock_file)
+        os.remove(lock.lock_file)
 
 
 class LocalDriver(Driver):
@@ -102,6 +121,11 @@ class LocalDriver(Driver):
       <https://pythonhosted.org/itsdangerous/>`_.
     :type salt: str or None
 
+    :param max_workers: (optional) Number of threads of the pool running this
+      driver's blocking filesystem work. Defaults to the
+      :class:`~concurrent.futures.ThreadPoolExecutor` default.
+    :type max_workers: int or None
+
     :param kwargs: (optional) Extra driver options.
     :type kwargs: dict
 
@@ -113,12 +137,14 @@ class LocalDriver(Driver):
     url = ''
 
     def __init__(self, endpoint: str, secret: str = None, salt: str = None,alias_name="fs",
-                 **kwargs: Dict) -> None:
+                 max_workers: int = None, **kwargs: Dict) -> None:
         super().__init__(endpoint, secret, **kwargs)
 
         self.alias_name = alias_name
         self.base_path = endpoint
         self.salt = salt
+        self.max_workers = max_workers
+        self._executor = None
 
         try:
             if not os.path.exists(endpoint):
@@ -138,6 +164,32 @@ class LocalDriver(Driver):
     def __len__(self) -> int:
         return len(list(self._get_folders()))
 
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread pool dedicated to this driver's filesystem work."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='aiocloudstorage-%s' % self.alias_name)
+        return self._executor
+
+    async def _run(self, func, *args, **kwargs):
+        """Run blocking `func` in :attr:`executor` without blocking the
+        event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs))
+
+    async def close(self) -> None:
+        """Shut down the thread pool. It is recreated on next use.
+
+        :return: NoneType
+        :rtype: None
+        """
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
     @staticmethod
     def _normalize_parameters(params: Dict[str, str],
                               normalizers: Dict[str, str]) -> Dict[str, str]:
@@ -200,7 +252,7 @@ class LocalDriver(Driver):
         """
         full_path = os.path.join(self.base_path, container.name)
         if validate and not os.path.isdir(full_path):
-            raise NotFoundError(messages.CONTAINER_NOT_FOUND % container.name)
+            raise ContainerNotFoundError(messages.CONTAINER_NOT_FOUND % container.name)
 
         return full_path
 
@@ -297,7 +349,7 @@ class LocalDriver(Driver):
         try:
             stat = os.stat(full_path)
         except FileNotFoundError:
-            raise NotFoundError(messages.CONTAINER_NOT_FOUND % folder_name)
+            raise ContainerNotFoundError(messages.CONTAINER_NOT_FOUND % folder_name)
 
         created_at = datetime.fromtimestamp(stat.st_ctime, timezone.utc)
 
@@ -323,10 +375,12 @@ class LocalDriver(Driver):
         try:
             stat = os.stat(str(object_path))
         except FileNotFoundError:
+            self._get_folder_path(container, validate=True)
             raise NotFoundError(messages.BLOB_NOT_FOUND % (object_name,
                                                            container.name))
 
         meta_data = {}
+        checksum = None
         content_type = None
         content_disposition = None
         cache_control = None
@@ -342,7 +396,11 @@ class LocalDriver(Driver):
                 except UnicodeDecodeError:
                     pass
 
-                if attr_key.startswith(self._OBJECT_META_PREFIX + 'metadata'):
+                if attr_key == self._checksum_attr:
+                    checksum = self._cached_checksum(value_str, stat)
+                elif attr_key.startswith(self._OBJECT_META_PREFIX + 'checksum'):
+                    pass
+                elif attr_key.startswith(self._OBJECT_META_PREFIX + 'metadata'):
                     meta_key = attr_key.split('.')[-1]
                     meta_data[meta_key] = value_str
                 elif attr_key.endswith('content_type'):
@@ -356,11 +414,19 @@ class LocalDriver(Driver):
         except OSError:
             logger.warning(messages.LOCAL_NO_ATTRIBUTES)
 
-        # TODO: QUESTION: Option to disable checksum for large files?
-        # TODO: QUESTION: Save a .hash file for each file?
-        file_hash = file_checksum(full_path, hash_type=self.hash_type)
-        checksum = file_hash.hexdigest()
-
+        # A checksum that is not cached stays None and is computed by
+        # blob_checksum() when the blob's checksum is first asked for
+        return self._blob_from_stat(container, object_name, stat, checksum,
+                                    meta_data, content_type,
+                                    content_disposition, cache_control)
+
+    def _blob_from_stat(self, container: Container, object_name: str,
+                        stat: os.stat_result, checksum: str = None,
+                        meta_data: MetaData = None, content_type: str = None,
+                        content_disposition: str = None,
+                        cache_control: str = None) -> Blob:
+        """Build a Blob from a file's stat and its known attributes."""
+        full_path = os.path.join(self.base_path, container.name, object_name)
         etag = hashlib.sha1(full_path.encode('utf-8')).hexdigest()
         created_at = datetime.fromtimestamp(stat.st_ctime, timezone.utc)
         modified_at = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
@@ -372,6 +438,49 @@ class LocalDriver(Driver):
                     content_type=content_type, cache_control=cache_control,
                     created_at=created_at, modified_at=modified_at)
 
+    @property
+    def _checksum_attr(self) -> str:
+        return self._OBJECT_META_PREFIX + 'checksum.' + self.hash_type
+
+    @staticmethod
+    def _checksum_key(stat: os.stat_result) -> str:
+        """Identify a version of a file: inode, size and modification time."""
+        return '%d:%d:%d' % (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _cached_checksum(self, value: str, stat: os.stat_result) -> str:
+        """Return the checksum stored in the checksum attribute if it was
+        computed for the current version of the file, otherwise None."""
+        key, _, checksum = (value or '').rpartition(':')
+        if checksum and key == self._checksum_key(stat):
+            return checksum
+        return None
+
+    def _save_checksum(self, path: str, stat: os.stat_result,
+                       checksum: str) -> None:
+        value = '%s:%s' % (self._checksum_key(stat), checksum)
+        try:
+            xattr.xattr(path)[self._checksum_attr] = value.encode('utf-8')
+        except OSError:
+            logger.debug(messages.LOCAL_NO_ATTRIBUTES)
+
+    def blob_checksum(self, blob: Blob) -> str:
+        path = self._get_file_path(blob)
+        try:
+            before = os.stat(path)
+            checksum = file_checksum(path, hash_type=self.hash_type).hexdigest()
+            after = os.stat(path)
+        except FileNotFoundError:
+            raise NotFoundError(messages.BLOB_NOT_FOUND % (blob.name,
+                                                           blob.container.name))
+
+        # Only cache the digest if the file did not change while hashing
+        if self._checksum_key(before) == self._checksum_key(after):
+            self._save_checksum(path, after, checksum)
+        return checksum
+
+    async def get_blob_checksum(self, blob: Blob) -> str:
+        return await self._run(self.blob_checksum, blob)
+
     def validate_credentials(self) -> None:
         if not os.access(self.base_path, os.W_OK):
             raise CredentialsError(
@@ -381,10 +490,12 @@ class LocalDriver(Driver):
     def regions(self) -> List[str]:
         return []
 
+    @instrumented('get_containers')
     async def get_containers(self) -> List[Container]:
         for container_name in self._get_folders():
             yield self._make_container(container_name)
 
+    @instrumented('create_container')
     async def create_container(self, container_name: str, acl: str = None,
                          meta_data: MetaData = None) -> Container:
         is_valid_bucket_name(container_name,strict=True)
@@ -396,6 +507,10 @@ class LocalDriver(Driver):
 
         full_path = os.path.join(self.base_path, container_name)
 
+        await self._run(self._make_folder, full_path)
+        return self._make_container(container_name)
+
+    def _make_folder(self, full_path: str) -> None:
         self._make_path(full_path, ignore_existing=True)
         try:
             with lock_local_file(full_path):
@@ -403,12 +518,12 @@ class LocalDriver(Driver):
         except FileNotFoundError:
             raise CloudStorageError(messages.CONTAINER_NAME_INVALID)
 
-        return self._make_container(container_name)
-
+    @instrumented('get_container')
     async def get_container(self, container_name: str) -> Container:
         return self._make_container(container_name)
 
 
+    @instrumented('delete_container')
     async def delete_container(self, container: Container) -> None:
         try:
             async for _ in self.get_blobs(container):
@@ -418,22 +533,28 @@ class LocalDriver(Driver):
         except NotFoundError as err:
             return False
 
+        await self._run(self._remove_folder, path)
+        return True
+
+    @staticmethod
+    def _remove_folder(path: str) -> None:
         with lock_local_file(path):
             try:
                 shutil.rmtree(path)
             except shutil.Error as err:
                 raise CloudStorageError(err.strerror)
-        return True
 
     async def container_cdn_url(self, container: Container) -> str:
         return self._get_folder_path(container)
 
 
+    @instrumented('upload_blob', nbytes=result_size)
     async def upload_blob(self, container: Container, filename: FileLike,
                     blob_name: str = None,blob_path='', acl: str = None,
                     meta_data: MetaData = None, content_type: str = None,
                     content_disposition: str = None, cache_control: str = None,
-                    chunk_size: int = 1024, extra: ExtraOptions = None) -> Blob:
+                    chunk_size: int = 1024, extra: ExtraOptions = None,
+                    preflight: UploadPreflight = None) -> Blob:
         if acl:
             logger.info(messages.OPTION_NOT_SUPPORTED, 'acl')
 
@@ -444,6 +565,8 @@ class LocalDriver(Driver):
         attributes.setdefault('meta_data', meta_data)
         attributes.setdefault('content_disposition', content_disposition)
         attributes.setdefault('cache_control', cache_control)
+        # Only `*` (create if absent) is supported
+        exclusive = attributes.pop('if_none_match', None) == '*'
 
         path = self._get_folder_path(container, validate=True)
 
@@ -452,56 +575,283 @@ class LocalDriver(Driver):
         blob_name=clean_object_name(blob_name)
         blob_path = os.path.join(path,blob_name)
 
-        base_path = os.path.dirname(blob_path)
-        self._make_path(base_path)
+        if content_type:
+            attributes['content_type'] = content_type
+        elif isinstance(filename, str) and preflight is not None and \
+                preflight.head is not None:
+            # Already sniffed from the head of the file by the pre-flight
+            attributes['content_type'] = preflight.content_type
+
+        if hasattr(filename,'file'):
+            #fastapi Upload file has a sync file inside, skip its async wrapper
+            filename = filename.file
 
+        try:
+            if hasattr(filename,'read') and asyncio.iscoroutinefunction(filename.read):
+                stat, checksum = await self._write_async_stream(
+                    filename, blob_path, attributes, exclusive)
+            else:
+                stat, checksum = await self._run(
+                    self._write_blob, filename, blob_path, attributes,
+                    exclusive, preflight)
+        except FileExistsError:
+            if not exclusive:
+                raise
+            raise BlobExistsError(messages.BLOB_EXISTS % (blob_name,
+                                                          container.name))
+
+        # Everything the blob is made of was just written, so it is not
+        # read back from the file system
+        return self._blob_from_stat(
+            container, blob_name, stat, checksum,
+            meta_data=attributes.get('meta_data'),
+            content_type=attributes.get('content_type'),
+            content_disposition=attributes.get('content_disposition'),
+            cache_control=attributes.get('cache_control'))
+
+    def _write_blob(self, filename: FileLike, blob_path: str,
+                    attributes: Dict, exclusive: bool = False,
+                    preflight: UploadPreflight = None
+                    ) -> Tuple[os.stat_result, str]:
+        """Copy a path or sync file object to `blob_path` (blocking) and
+        return its stat and checksum. With `exclusive` the blob is created
+        with `O_EXCL`.
+
+        Sources copied through user space are hashed on the way, starting
+        from the head and hash state of `preflight`; small sources are
+        written from its head alone. Larger files are copied in the kernel
+        instead and their checksum, `None`, is computed on first use."""
+        self._make_path(os.path.dirname(blob_path))
+        head = preflight.head if preflight is not None else None
+        if head and not attributes.get('content_type'):
+            # Sniffed from the bytes already read, not from the written file
+            attributes['content_type'] = preflight.sniffed_type
+
+        with lock_local_file(blob_path):
+            hasher = None
+            with open(blob_path, 'xb' if exclusive else 'wb') as blob_file:
+                if head and (preflight.complete or
+                             not isinstance(filename, str) and
+                             file_descriptor(filename) is None):
+                    blob_file.write(head)
+                    hasher = preflight.hasher(self.hash_type)
+                    if not isinstance(filename, str):
+                        filename.seek(preflight.position + len(head))
+                    if not preflight.complete:
+                        copy_stream(filename, blob_file, hasher=hasher)
+                elif isinstance(filename, str):
+                    with open(filename, 'rb') as source:
+                        copy_stream(source, blob_file)
+                elif hasattr(filename,'read'):
+                    if file_descriptor(filename) is None:
+                        hasher = hashlib.new(self.hash_type)
+                    copy_stream(filename, blob_file, hasher=hasher)
+            checksum = hasher.hexdigest() if hasher is not None else None
+            return self._finish_blob(blob_path, attributes, checksum), checksum
+
+    async def _write_async_stream(self, stream, blob_path: str,
+                                  attributes: Dict, exclusive: bool = False
+                                  ) -> Tuple[os.stat_result, str]:
+        """Write a stream with a coroutine `read` (e.g. FastAPI's
+        `UploadFile`) to a temporary file next to `blob_path`, hashing it on
+        the way, then move it into place under the blob's lock."""
+        folder = os.path.dirname(blob_path)
+        await self._run(self._make_path, folder)
+        fd, tmp_path = await self._run(tempfile.mkstemp, dir=folder,
+                                       prefix='.upload-')
+        hasher = hashlib.new(self.hash_type)
+        try:
+            with open(fd, 'wb') as tmp_file:
+                while True:
+                    chunk = await stream.read(1024 * 1024 * 2)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    await self._run(tmp_file.write, chunk)
+            checksum = hasher.hexdigest()
+            stat = await self._run(self._replace_blob, tmp_path, blob_path,
+                                   attributes, exclusive, checksum)
+            return stat, checksum
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _replace_blob(self, tmp_path: str, blob_path: str, attributes: Dict,
+                      exclusive: bool = False,
+                      checksum: str = None) -> os.stat_result:
         with lock_local_file(blob_path):
-            if isinstance(filename, str):
-                shutil.copy(filename, blob_path)
+            if exclusive:
+                # link() fails atomically if the blob exists
+                os.link(tmp_path, blob_path)
+                os.remove(tmp_path)
             else:
-                with open(blob_path, 'wb') as blob_file:
-                    if hasattr(filename,'read'):
-                        if asyncio.iscoroutinefunction(filename.read):
-                            await transfer_stream(filename,blob_file)
-                        else:
-                            while True:
-                                chunk= filename.read(1024)
-                                if not chunk:
-                                    break
-                                blob_file.write(chunk)
+                os.replace(tmp_path, blob_path)
+            return self._finish_blob(blob_path, attributes, checksum)
 
+    def _finish_blob(self, blob_path: str, attributes: Dict,
+                     checksum: str = None) -> os.stat_result:
+        """Set mode, content type, extended attributes and the checksum, if
+        known, of a written blob and return its stat."""
         # Disable execute mode on file
         os.chmod(blob_path, int('664', 8))
 
-        if not content_type:
+        if not attributes.get('content_type'):
             attributes['content_type'] = file_content_type(blob_path)
-        else:
-            attributes['content_type'] = content_type
 
         # Set meta data and other attributes
         self._set_file_attributes(blob_path, attributes)
-
-        return await self.get_blob(container, blob_name)
-
+        stat = os.stat(blob_path)
+        if checksum is not None:
+            self._save_checksum(blob_path, stat, checksum)
+            # Setting the attribute changed the ctime, which get_blob reports
+            stat = os.stat(blob_path)
+        return stat
+
+    @instrumented('get_blob')
     async def get_blob(self, container: Container, blob_name: str) -> Blob:
-        return self._make_blob(container, blob_name)
-
-    async def get_blobs(self, container: Container) -> Iterable[Blob]:
-        container_path = self._get_folder_path(container, validate=True)
+        return await self._run(self._make_blob, container, blob_name)
+
+    @instrumented('get_blobs')
+    async def get_blobs(self, container: Container, prefix: str = None,
+                        delimiter: str = None,
+                        start_after: str = None) -> Iterable[Blob]:
+        container_path = os.path.normpath(
+            self._get_folder_path(container, validate=True))
+        prefix = prefix or ''
+
+        # Only walk the folder the prefix points into
+        walk_path = os.path.normpath(
+            os.path.join(container_path, os.path.dirname(prefix)))
+        if os.path.commonpath([container_path, walk_path]) != container_path:
+            raise CloudStorageError(messages.PREFIX_INVALID % (
+                prefix, container.name))
+        walker = os.walk(walk_path, topdown=True)
+
+        while True:
+            # Walk one folder at a time so the loop is never blocked for long
+            step = await self._run(next, walker, None)
+            if step is None:
+                break
+            folder, sub_folders, files = step
 
-        for folder, sub_folders, files in os.walk(container_path, topdown=True):
             # Remove unwanted sub-folders
             for sub_folder in IGNORE_FOLDERS:
                 if sub_folder in sub_folders:
                     sub_folders.remove(sub_folder)
+            if delimiter == '/':
+                sub_folders[:] = []
 
+            object_names = []
             for name in files:
                 full_path = os.path.join(folder, name)
                 object_name = str(pathlib.Path(full_path).relative_to(container_path))
-                yield self._make_blob(container, object_name)
-
+                if not object_name.startswith(prefix):
+                    continue
+                if delimiter and delimiter in object_name[len(prefix):]:
+                    continue
+                if start_after and object_name <= start_after:
+                    continue
+                object_names.append(object_name)
+
+            blobs = await self._run(self._make_blobs, container, object_names)
+            for blob in blobs:
+                yield blob
+
+    def _make_blobs(self, container: Container,
+                    object_names: List[str]) -> List[Blob]:
+        return [self._make_blob(container, object_name)
+                for object_name in object_names]
+
+    @instrumented('download_blob', nbytes=blob_size)
     async def download_blob(self, blob: Blob,
                       destination: FileLike) -> None:
+        await self._run(self._read_blob, blob, destination)
+
+    @instrumented('read_range', nbytes=result_length)
+    async def read_range(self, blob: Blob, offset: int,
+                         length: int = None) -> bytes:
+        return await self._run(self._pread_blob, blob, offset, length)
+
+    def _pread_blob(self, blob: Blob, offset: int, length: int = None) -> bytes:
+        try:
+            fd = os.open(self._get_file_path(blob), os.O_RDONLY)
+        except FileNotFoundError:
+            raise NotFoundError(messages.BLOB_NOT_FOUND % (
+                blob.name, blob.container.name))
+
+        try:
+            if length is None:
+                length = max(os.fstat(fd).st_size - offset, 0)
+            parts = []
+            while length > 0:
+                chunk = os.pread(fd, length, offset)
+                if not chunk:
+                    break
+                parts.append(chunk)
+                offset += len(chunk)
+                length -= len(chunk)
+            return b''.join(parts)
+        finally:
+            os.close(fd)
+
+    @asynccontextmanager
+    async def mmap_blob(self, blob: Blob, sequential: bool = False):
+        mapping = await self._run(self._map_blob, blob, sequential)
+        view = memoryview(mapping) if mapping is not None else memoryview(b'')
+        try:
+            yield view
+        finally:
+            try:
+                view.release()
+                if mapping is not None:
+                    mapping.close()
+            except BufferError:
+                # Slices of the view are still in use, the mapping is closed
+                # once they are garbage collected
+                pass
+
+    def _map_blob(self, blob: Blob, sequential: bool) -> mmap.mmap:
+        """Map a blob read-only, `None` for an empty blob (which can't be
+        mapped)."""
+        try:
+            fd = os.open(self._get_file_path(blob), os.O_RDONLY)
+        except FileNotFoundError:
+            raise NotFoundError(messages.BLOB_NOT_FOUND % (
+                blob.name, blob.container.name))
+
+        try:
+            if not os.fstat(fd).st_size:
+                return None
+            mapping = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            # The mapping stays valid after the descriptor is closed
+            os.close(fd)
+
+        advice = 'MADV_SEQUENTIAL' if sequential else 'MADV_RANDOM'
+        if hasattr(mmap, advice):
+            mapping.madvise(getattr(mmap, advice))
+        return mapping
+
+    @instrumented('stream_blob')
+    async def stream_blob(self, blob: Blob,
+                          chunk_size: int = COPY_BUFFER_SIZE):
+        try:
+            blob_file = await self._run(open, self._get_file_path(blob), 'rb')
+        except FileNotFoundError:
+            raise NotFoundError(messages.BLOB_NOT_FOUND % (
+                blob.name, blob.container.name))
+
+        try:
+            while True:
+                chunk = await self._run(blob_file.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            blob_file.close()
+
+    def _read_blob(self, blob: Blob, destination: FileLike) -> None:
         blob_path = self._get_file_path(blob)
 
         if isinstance(destination, str):
@@ -514,22 +864,62 @@ class LocalDriver(Driver):
             else:
                 file_path = destination
 
-            shutil.copy(blob_path, file_path)
+            if os.path.isdir(file_path):
+                file_path = os.path.join(file_path, os.path.basename(blob_path))
+
+            with open(blob_path, 'rb') as blob_file, \
+                    open(file_path, 'wb') as dest_file:
+                copy_stream(blob_file, dest_file)
         else:
             with open(blob_path, 'rb') as blob_file:
-                for data in read_in_chunks(blob_file):
-                    destination.write(data)
+                copy_stream(blob_file, destination)
 
 
+    @instrumented('delete_blob')
     async def delete_blob(self, blob: Blob) -> None:
-        path = self._get_file_path(blob)
+        await self._run(self._remove_blob, self._get_file_path(blob))
+        return None
 
+    @staticmethod
+    def _remove_blob(path: str) -> None:
         with lock_local_file(path):
             try:
                 os.unlink(path)
             except OSError as err:
                 logger.exception(err)
-        return None
+
+    @instrumented('delete_blobs')
+    async def delete_blobs(self, container: Container,
+                           blob_names: List[str]) -> Dict:
+        folder = self._get_folder_path(container, validate=True)
+        paths = [(name, os.path.join(folder, name)) for name in blob_names]
+
+        # Batches of files are unlinked in parallel by the executor threads
+        batches = [paths[index:index + DELETE_BATCH_SIZE]
+                   for index in range(0, len(paths), DELETE_BATCH_SIZE)]
+        results = {}
+        for batch_results in await asyncio.gather(
+                *(self._run(self._remove_blobs, batch) for batch in batches)):
+            results.update(batch_results)
+        return results
+
+    @staticmethod
+    def _remove_blobs(paths: List) -> Dict:
+        results = {}
+        for name, path in paths:
+            if not os.path.isfile(path):
+                # Don't leave a lock file behind for a missing blob
+                results[name] = None
+                continue
+            try:
+                with lock_local_file(path):
+                    os.unlink(path)
+                results[name] = None
+            except FileNotFoundError:
+                results[name] = None
+            except OSError as err:
+                results[name] = CloudStorageError(str(err))
+        return results
 
     def blob_cdn_url(self, blob: Blob) -> str:
         return os.path.join(self.base_path, blob.container.name, blob.name)
@@ -624,4 +1014,5 @@ class LocalDriver(Driver):
 
     _PUT_OBJECT_KEYS = {
         'metadata': 'meta_data',
+        'if_none_match': 'if_none_match',
     }
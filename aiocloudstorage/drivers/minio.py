@@ -1,23 +1,44 @@
 """Minio Simple Storage Service (Minio) Driver."""
+import base64
+import hashlib
 import os
 import logging
 import asyncio
+import functools
 import warnings
+from contextlib import AsyncExitStack
+try:
+    import fcntl
+except ImportError:  # Windows, which has no os.pwrite either
+    fcntl = None
+from email.utils import parsedate_to_datetime
 from typing import Any, Dict, Iterable, List  # noqa: F401
 from urllib.parse import quote, urljoin
 
-import aiobotocore
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
 from botocore.exceptions import ClientError, ParamValidationError, WaiterError
 from aiocloudstorage.utils import camelize, underscore
 
 from aiocloudstorage import Blob, Container, Driver, messages
 from aiocloudstorage.exceptions import (
+    BlobChangedError,
+    BlobExistsError,
     CloudStorageError,
+    ContainerNotFoundError,
     CredentialsError,
     IsNotEmptyError,
     NotFoundError,
 )
-from aiocloudstorage.helpers import file_content_type, validate_file_or_path,transfer_stream,is_valid_bucket_name,clean_object_name
+from aiocloudstorage.helpers import UploadPreflight, file_content_type, validate_file_or_path,transfer_stream,is_valid_bucket_name,clean_object_name,calculate_part_size,file_descriptor
+from aiocloudstorage.instrumentation import (
+    blob_size,
+    instrumented,
+    result_length,
+    result_size,
+)
+from aiocloudstorage.hedge import HedgePolicy
+from aiocloudstorage.retry import RetryPolicy
 from aiocloudstorage.typed import (
     ContentLength,
     ExtraOptions,
@@ -26,12 +47,47 @@ from aiocloudstorage.typed import (
     MetaData,
 )
 
-print(__name__)
-
 __all__ = ['MinioDriver']
 
 logger = logging.getLogger(__name__)
 
+MB = 1024 * 1024
+#: S3 limits for multipart uploads
+MIN_PART_SIZE = 5 * MB
+MAX_PARTS = 10000
+#: Bytes read from a response body per iteration
+TRANSFER_BLOCK_SIZE = 2 * MB
+#: Most keys a single S3 DeleteObjects request accepts
+DELETE_BATCH_SIZE = 1000
+#: Upload checksums, :mod:`hashlib` name -> S3 flexible checksum algorithm
+#: (`None` for Content-MD5)
+UPLOAD_CHECKSUMS = {'md5': None, 'sha1': 'SHA1', 'sha256': 'SHA256'}
+
+
+def _read_hashed(stream, size: int, hash_type: str = None):
+    """Read up to `size` bytes of a sync file object and their digest, or
+    `None` without `hash_type` (blocking)."""
+    data = stream.read(size)
+    if hash_type is None:
+        return data, None
+    return data, hashlib.new(hash_type, data).digest()
+
+
+def _response_date(response: Dict):
+    """`Date` header of a response as a datetime, None if missing."""
+    headers = response.get('ResponseMetadata', {}).get('HTTPHeaders', {})
+    try:
+        return parsedate_to_datetime(headers['date'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _close_body(response: Dict) -> None:
+    """Hand the connection of a losing hedged response back to the pool."""
+    body = response.get('Body') if isinstance(response, dict) else None
+    if body is not None:
+        body.close()
+
 class Bucket(object):
     def __init__(self,Name,CreationDate=None):
         self.name = Name
@@ -65,6 +121,60 @@ class MinioDriver(Driver):
     :param region: (optional) Region to connect to. Defaults to `us-east-1`.
     :type region: str
 
+    :param max_pool_connections: (optional) Size of the connection pool kept
+      by the shared client. Defaults to `10`.
+    :type max_pool_connections: int
+
+    :param connect_timeout: (optional) Connection timeout in seconds.
+    :type connect_timeout: int or float
+
+    :param read_timeout: (optional) Socket read timeout in seconds.
+    :type read_timeout: int or float
+
+    :param multipart_threshold: (optional) Uploads of at least this many
+      bytes are sent as multipart uploads. Defaults to 8 MiB.
+    :type multipart_threshold: int
+
+    :param multipart_chunksize: (optional) Preferred part size of multipart
+      uploads. It is grown automatically to stay within 10,000 parts.
+      Defaults to 8 MiB.
+    :type multipart_chunksize: int
+
+    :param max_concurrency: (optional) Number of parts of a single transfer
+      in flight at once. Keep it at or below `max_pool_connections`.
+      Defaults to `10`.
+    :type max_concurrency: int
+
+    :param download_part_size: (optional) Size of each ranged GET when
+      downloading blobs of at least `multipart_threshold` bytes into a
+      seekable file. Defaults to 8 MiB.
+    :type download_part_size: int
+
+    :param download_concurrency: (optional) Number of ranged GETs in flight
+      for a single download. Defaults to `max_concurrency`.
+    :type download_concurrency: int
+
+    :param list_page_size: (optional) Keys requested per listing page.
+      Defaults to `1000`, the S3 maximum.
+    :type list_page_size: int
+
+    :param retry: (optional) Keyword arguments of
+      :class:`~aiocloudstorage.retry.RetryPolicy` (or a policy) used for all
+      requests. Defaults to 3 attempts with jittered exponential backoff.
+    :type retry: dict or :class:`~aiocloudstorage.retry.RetryPolicy`
+
+    :param hedge: (optional) Keyword arguments of
+      :class:`~aiocloudstorage.hedge.HedgePolicy` (or a policy) to hedge
+      slow HEAD and GET requests. Disabled by default.
+    :type hedge: dict or :class:`~aiocloudstorage.hedge.HedgePolicy`
+
+    :param upload_checksum: (optional) :mod:`hashlib` name of the checksum
+      computed while uploads are read and checked by the store: `md5`
+      (sent as `Content-MD5` and compared with the ETag), `sha1` or `sha256`
+      (sent as S3 flexible checksums). `None` disables it. Defaults to
+      `md5`.
+    :type upload_checksum: str or None
+
     :param kwargs: (optional) Extra driver options.
     :type kwargs: dict
     """
@@ -73,13 +183,36 @@ class MinioDriver(Driver):
     url = 'https://aws.amazon.com/s3/'
 
     def __init__(self, endpoint:str, key: str, secret: str = None, region: str = 'us-east-1',alias_name="minio",
-                 **kwargs: Dict) -> None:
+                 max_pool_connections: int = 10, connect_timeout: float = 60,
+                 read_timeout: float = 60, multipart_threshold: int = 8 * MB,
+                 multipart_chunksize: int = 8 * MB, max_concurrency: int = 10,
+                 download_part_size: int = 8 * MB,
+                 download_concurrency: int = None, list_page_size: int = 1000,
+                 retry: Dict = None, hedge: Dict = None,
+                 upload_checksum: str = 'md5', **kwargs: Dict) -> None:
         region = region.lower()
         self.endpoint = endpoint
         super().__init__(key=key, secret=secret, region=region, alias_name=alias_name,**kwargs)
 
-        self._loop = kwargs.get('loop',None)
+        self.max_pool_connections = max_pool_connections
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.multipart_threshold = max(multipart_threshold, MIN_PART_SIZE)
+        self.multipart_chunksize = max(multipart_chunksize, MIN_PART_SIZE)
+        self.max_concurrency = max_concurrency
+        self.download_part_size = download_part_size
+        self.download_concurrency = download_concurrency or max_concurrency
+        self.list_page_size = list_page_size
+        self.retry_policy = RetryPolicy.from_config(retry)
+        self.hedge_policy = HedgePolicy.from_config(hedge)
+        if upload_checksum is not None and \
+                upload_checksum not in UPLOAD_CHECKSUMS:
+            raise CloudStorageError(messages.OPTION_NOT_SUPPORTED %
+                                    ('upload_checksum=%s' % upload_checksum))
+        self.upload_checksum = upload_checksum
         self._session = None
+        #: event loop -> (exit stack, task resolving to the shared client)
+        self._clients = {}
         #self._session = boto3.Session(aws_access_key_id=key,
         #                              aws_secret_access_key=secret,
         #                              region_name=region)
@@ -87,31 +220,118 @@ class MinioDriver(Driver):
         # session required for loading regions list
         #if region not in self.regions:
         #    raise CloudStorageError(messages.REGION_NOT_FOUND % region)
-    def s3(self,loop=None):
-        """
+    def s3(self):
+        """Create a new client context. Prefer :meth:`_get_client`, which
+        reuses a pooled client, for regular requests.
+
         Usage
         async with self.s3() as s3:
             s3.dosomething
         """
+        # Retries are done by `retry_policy`, not by botocore, and upload
+        # checksums are computed while the source is read, not by botocore
+        config = AioConfig(max_pool_connections=self.max_pool_connections,
+                           connect_timeout=self.connect_timeout,
+                           read_timeout=self.read_timeout,
+                           retries={'total_max_attempts': 1},
+                           request_checksum_calculation='when_required')
         client  = self.session.create_client('s3',
                 region_name=self.region,
                 endpoint_url=self.endpoint,
                 aws_access_key_id=self.key,
-                aws_secret_access_key=self.secret
+                aws_secret_access_key=self.secret,
+                config=config
             )
         return client
 
     @property
     def session(self):
         if not self._session:
-            loop = self._loop or asyncio.get_running_loop()
-            self._session = aiobotocore.get_session(loop=loop)
+            self._session = get_session()
         return self._session
 
+    async def _get_client(self):
+        """Return the client shared by all requests on the running loop.
+
+        The client (and its aiohttp connection pool) is created on first use
+        and kept open until :meth:`close` is called.
+        """
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(loop)
+        if entry is None:
+            exit_stack = AsyncExitStack()
+            task = loop.create_task(
+                exit_stack.enter_async_context(self.s3()))
+            entry = self._clients[loop] = (exit_stack, task)
+        try:
+            return await asyncio.shield(entry[1])
+        except Exception:
+            if self._clients.get(loop) is entry:
+                del self._clients[loop]
+            raise
+
+    async def open(self) -> 'MinioDriver':
+        """Create the shared client for the running event loop.
+
+        .. code-block:: python
+
+            async with MinioDriver(endpoint, key, secret) as storage:
+                container = await storage.get_container('container-name')
+
+        :return: The driver itself.
+        :rtype: :class:`.MinioDriver`
+        """
+        await self._get_client()
+        return self
+
+    async def close(self) -> None:
+        """Close the shared client of the running event loop and its
+        connection pool.
+
+        :return: NoneType
+        :rtype: None
+        """
+        loop = asyncio.get_running_loop()
+        # Clients of loops that are gone cannot be closed anymore
+        for other in [l for l in self._clients if l.is_closed()]:
+            del self._clients[other]
+
+        entry = self._clients.pop(loop, None)
+        if entry is None:
+            return
+        exit_stack, task = entry
+        try:
+            await task
+        except Exception:
+            return
+        await exit_stack.aclose()
+
+    async def _call(self, method: str, idempotent: bool = True,
+                    before_retry=None, hedge: bool = False,
+                    **params: Any) -> Dict:
+        """Call a client method through the store's retry policy, and its
+        hedge policy for `hedge` reads."""
+        s3 = await self._get_client()
+        func = getattr(s3, method)
+        if hedge:
+            func = functools.partial(self._hedged, method, func,
+                                     discard=_close_body)
+        return await self.retry_policy.call(
+            method, func, idempotent=idempotent,
+            before_retry=before_retry, **params)
+
+    async def _hedged(self, operation: str, func, *args: Any,
+                      discard=None, **kwargs: Any) -> Any:
+        """Await an idempotent read through the hedge policy, if any."""
+        if self.hedge_policy is None:
+            return await func(*args, **kwargs)
+        return await self.hedge_policy.call(operation, func, *args,
+                                            discard=discard, **kwargs)
+
     async def _object_summary(self,bucket_name:str,blob_name:str) -> Dict:
         try:
-            async with self.s3() as s3:
-                resp = await s3.head_object(Bucket=bucket_name,Key=blob_name)
+            resp = await self._call('head_object', hedge=True,
+                                    Bucket=bucket_name, Key=blob_name)
         except ClientError as err:
             error_code = int(err.response['Error']['Code'])
             if error_code == 404:
@@ -146,10 +366,9 @@ class MinioDriver(Driver):
         return Bucket(**info)
 
     async def _list_buckets(self):
-        async with self.s3() as s3:
-            resp = await s3.list_buckets()
-            for info in resp.get('Buckets',[]):
-                yield self._make_bucket(info)
+        resp = await self._call('list_buckets')
+        for info in resp.get('Buckets',[]):
+            yield self._make_bucket(info)
 
     async def _get_bucket(self, bucket_name: str, validate: bool = True):
         """Get a Minio bucket.
@@ -169,13 +388,12 @@ class MinioDriver(Driver):
 
         if validate:
             try:
-                async with self.s3() as s3:
-                    response = await s3.head_bucket(Bucket=bucket_name)
-                    logger.debug('response=%s', response)
+                response = await self._call('head_bucket', Bucket=bucket_name)
+                logger.debug('response=%s', response)
             except ClientError as err:
                 error_code = int(err.response['Error']['Code'])
                 if error_code == 404:
-                    raise NotFoundError(messages.CONTAINER_NOT_FOUND %
+                    raise ContainerNotFoundError(messages.CONTAINER_NOT_FOUND %
                                         bucket_name)
 
                 raise CloudStorageError('%s: %s' % (
@@ -246,40 +464,72 @@ class MinioDriver(Driver):
         return Container(name=bucket.name, driver=self,
                          meta_data=None)
 
+    @instrumented('get_container')
     async def get_container(self, container_name: str, validate:bool=True) -> Container:
         bucket = await self._get_bucket(container_name,validate=True)
         return self._make_container(bucket)
 
+    @instrumented('get_containers')
     async def get_containers(self):
         async for bucket in self._list_buckets():
             yield self._make_container(bucket)
 
-    async def get_blobs(self,container: Container):
+    async def _list_objects_page(self, params: Dict) -> Dict:
         try:
-            async with self.s3() as s3:
-                resp = await s3.list_objects_v2(Bucket=container.name)
+            return await self._call('list_objects_v2', **params)
         except ClientError as err:
             raise CloudStorageError('%s: %s' % (
                 err.response['Error']['Code'],
                 err.response['Error']['Message']))
-        for obj_summary in resp.get('Contents',[]):
-            blob = self._make_blob(container,obj_summary)
-            yield blob
 
+    @instrumented('get_blobs')
+    async def get_blobs(self,container: Container, prefix: str = None,
+                        delimiter: str = None, start_after: str = None):
+        params = {'Bucket': container.name, 'MaxKeys': self.list_page_size}
+        if prefix:
+            params['Prefix'] = prefix
+        if delimiter:
+            params['Delimiter'] = delimiter
+        if start_after:
+            params['StartAfter'] = start_after
+
+        # The next page is requested before the current one is handed out,
+        # so the caller never waits a full round trip between pages.
+        page = asyncio.ensure_future(self._list_objects_page(params))
+        try:
+            while page is not None:
+                resp = await page
+                page = None
+                if resp.get('IsTruncated') and resp.get('NextContinuationToken'):
+                    params['ContinuationToken'] = resp['NextContinuationToken']
+                    page = asyncio.ensure_future(
+                        self._list_objects_page(dict(params)))
+                for obj_summary in resp.get('Contents',[]):
+                    blob = self._make_blob(container,obj_summary)
+                    yield blob
+        finally:
+            if page is not None:
+                page.cancel()
+                # consume the outcome so an abandoned prefetch is not reported
+                page.add_done_callback(
+                    lambda task: task.cancelled() or task.exception())
+
+    @instrumented('create_container')
     async def create_container(self,container_name:str ,acl : str=None):
         is_valid_bucket_name(container_name,strict=True)
         try:
-            async with self.s3() as s3:
-                await s3.create_bucket(Bucket=container_name)
+            await self._call('create_bucket', idempotent=False,
+                             Bucket=container_name)
         except ClientError as err:
             pass
         bucket = await self._get_bucket(container_name,validate=False)
         return self._make_container(bucket)
 
+    @instrumented('delete_container')
     async def delete_container(self, container: Container) -> None:
         try:
-            async with self.s3() as s3:
-                await s3.delete_bucket(Bucket=container.name)
+            await self._call('delete_bucket', idempotent=False,
+                             Bucket=container.name)
         except ClientError as err:
             error_code = err.response['Error']['Code']
             if error_code == 'BucketNotEmpty':
@@ -290,6 +540,7 @@ class MinioDriver(Driver):
             return False
         return True
 
+    @instrumented('upload_blob', nbytes=result_size)
     async def upload_blob(self, 
             container: Container, 
             filename: FileLike,
@@ -301,7 +552,8 @@ class MinioDriver(Driver):
             content_disposition: str = None, 
             cache_control: str = None,
             chunk_size: int = 1024,
-            extra: ExtraOptions = None
+            extra: ExtraOptions = None,
+            preflight: UploadPreflight = None
         ) -> Blob:
         meta_data = {} if meta_data is None else meta_data
         extra = {} if extra is None else extra
@@ -330,7 +582,8 @@ class MinioDriver(Driver):
         if not content_type:
             if isinstance(filename, str):
                 # TODO: QUESTION: Any advantages between filename vs blob_name?
-                extra_args['ContentType'] = file_content_type(filename)
+                extra_args['ContentType'] = preflight.content_type \
+                    if preflight is not None else file_content_type(filename)
             else:
                 extra_args['ContentType'] = file_content_type(blob_name)
         else:
@@ -338,18 +591,277 @@ class MinioDriver(Driver):
 
         logger.debug('extra_args=%s', extra_args)
 
-        async with self.s3() as s3:
-            if isinstance(filename, str):
-                with open(filename,'rb') as f:
-                    await s3.put_object(Key=blob_name,Body=f,Bucket=container.name,**extra_args)
-            elif hasattr(filename,'file'):
-                #fastapi Upload file has file inside fileobject
-                await s3.put_object(Key=blob_name,Body=filename.file,Bucket=container.name,**extra_args)
-            else:
-                await s3.put_object(Key=blob_name,Body=filename,Bucket=container.name,**extra_args)
+        if preflight is not None and preflight.complete:
+            # The pre-flight read the whole source, it is not opened again
+            size = preflight.size
+            resp = await self._put_object(container.name,blob_name,None,extra_args,size,preflight)
+        elif isinstance(filename, str):
+            with open(filename,'rb') as f:
+                size = self._stream_size(f)
+                resp = await self._put_object(container.name,blob_name,f,extra_args,size)
+        else:
+            #fastapi Upload file has file inside fileobject
+            stream = getattr(filename,'file',filename)
+            size = self._stream_size(stream)
+            resp = await self._put_object(container.name,blob_name,stream,extra_args,size)
+
+        if size is None:
+            # Nothing tells how many bytes a plain stream had
+            return await self.get_blob(container, blob_name)
+        return self._make_blob(container, {
+            'Key': blob_name,
+            'ETag': resp['ETag'],
+            'Size': size,
+            'Metadata': {key.lower(): value for key, value
+                         in extra_args['Metadata'].items()},
+            'ContentType': extra_args.get('ContentType'),
+            'ContentDisposition': extra_args.get('ContentDisposition'),
+            'CacheControl': extra_args.get('CacheControl'),
+            'LastModified': resp.get('LastModified') or _response_date(resp),
+        })
+
+    @staticmethod
+    def _stream_size(stream) -> int:
+        """Bytes left to read in a sync file object, or None if unknown."""
+        fd = file_descriptor(stream)
+        if fd is not None:
+            try:
+                return os.fstat(fd).st_size - stream.tell()
+            except (AttributeError, OSError, ValueError):
+                pass
+        try:
+            if not stream.seekable():
+                return None
+            position = stream.tell()
+            size = stream.seek(0, os.SEEK_END) - position
+            stream.seek(position)
+            return size
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    def _checksum_args(self, digest: bytes, extra_args: Dict) -> Dict:
+        """Request arguments with the integrity header of `digest` added,
+        unless the caller sent one."""
+        if digest is None or 'ContentMD5' in extra_args:
+            return extra_args
+        value = base64.b64encode(digest).decode('ascii')
+        algorithm = UPLOAD_CHECKSUMS[self.upload_checksum]
+        if algorithm is None:
+            return dict(extra_args, ContentMD5=value)
+        return dict(extra_args, ChecksumAlgorithm=algorithm,
+                    **{'Checksum' + algorithm: value})
+
+    def _verify_checksum(self, blob_name: str, resp: Dict, expected_etag: str,
+                         expected_checksum: str, extra_args: Dict) -> None:
+        """Compare the ETag (MD5) or flexible checksum the store returned
+        with the one computed while reading the source."""
+        if self.upload_checksum is None or 'ContentMD5' in extra_args:
+            return
+        algorithm = UPLOAD_CHECKSUMS[self.upload_checksum]
+        if algorithm is None:
+            # Objects encrypted with KMS or customer keys, requested or by
+            # bucket default, have opaque ETags
+            if resp.get('ServerSideEncryption', '').startswith('aws:kms') or \
+                    resp.get('SSEKMSKeyId') or \
+                    resp.get('SSECustomerAlgorithm'):
+                return
+            actual = resp.get('ETag', '').strip('"')
+            expected = expected_etag
+        else:
+            actual = resp.get('Checksum' + algorithm)
+            expected = expected_checksum
+        if actual and actual != expected:
+            raise CloudStorageError(messages.CHECKSUM_MISMATCH % (
+                blob_name, expected, actual))
+
+    async def _put_object(self, bucket_name: str, blob_name: str, stream,
+                          extra_args: Dict, size: int = None,
+                          preflight: UploadPreflight = None) -> Dict:
+        """Upload `size` bytes (all if None) of a sync file object with a
+        single PUT, or as a parallel multipart upload when it is at least
+        `multipart_threshold` long. Return the PutObject or
+        CompleteMultipartUpload response.
+
+        Bodies of known size are read once, hashed on the way, and sent with
+        the checksum of `upload_checksum`; the returned ETag or checksum is
+        verified against it. A `preflight` holding the whole source is sent
+        instead of reading `stream`."""
+        try:
+            if preflight is not None and preflight.complete:
+                data = preflight.head
+                digest = None if self.upload_checksum is None else \
+                    preflight.hasher(self.upload_checksum).digest()
+                return await self._put_bytes(bucket_name, blob_name, data,
+                                             digest, extra_args)
+            if size is not None and size >= self.multipart_threshold:
+                return await self._upload_multipart(
+                    bucket_name, blob_name, stream, size, extra_args)
+
+            if size is None:
+                # A stream of unknown length is sent as is, unhashed. It can
+                # be repeated if it can be rewound
+                try:
+                    position = stream.tell()
+                except (AttributeError, OSError, ValueError):
+                    position = None
+                # A conditional create can't be told apart from an earlier
+                # attempt of its own without a digest, so it is not retried
+                return await self._call(
+                    'put_object', idempotent=position is not None and
+                    'IfNoneMatch' not in extra_args,
+                    before_retry=None if position is None else
+                    lambda: stream.seek(position),
+                    Key=blob_name, Body=stream, Bucket=bucket_name,
+                    **extra_args)
+
+            loop = asyncio.get_running_loop()
+            data, digest = await loop.run_in_executor(
+                None, _read_hashed, stream, size, self.upload_checksum)
+            return await self._put_bytes(bucket_name, blob_name, data, digest,
+                                         extra_args)
+        except ClientError as err:
+            error_code = err.response['Error']['Code']
+            if error_code == 'NoSuchBucket':
+                raise ContainerNotFoundError(messages.CONTAINER_NOT_FOUND % bucket_name)
+            if 'IfNoneMatch' in extra_args and error_code in (
+                    'PreconditionFailed', '412', 'ConditionalRequestConflict'):
+                raise BlobExistsError(messages.BLOB_EXISTS % (blob_name,
+                                                              bucket_name))
+            raise
 
-        return await self.get_blob(container, blob_name)
+    async def _put_bytes(self, bucket_name: str, blob_name: str, data: bytes,
+                         digest: bytes, extra_args: Dict) -> Dict:
+        """PUT an in-memory body with its checksum and verify the reply.
 
+        A conditional create that is retried can be refused because its
+        first attempt did succeed. The stored object is then compared with
+        `data` before reporting that the blob exists."""
+        retried = []
+        try:
+            resp = await self._call(
+                'put_object', before_retry=lambda: retried.append(True),
+                Key=blob_name, Body=data, Bucket=bucket_name,
+                **self._checksum_args(digest, extra_args))
+        except ClientError as err:
+            if not retried or 'IfNoneMatch' not in extra_args or \
+                    err.response['Error']['Code'] not in (
+                        'PreconditionFailed', '412'):
+                raise
+            try:
+                resp = await self._call('head_object', Bucket=bucket_name,
+                                        Key=blob_name)
+            except ClientError:
+                raise err
+            if resp.get('ETag', '').strip('"') != \
+                    hashlib.md5(data).hexdigest():
+                raise err
+            logger.debug('%s was created by an attempt whose response was '
+                         'lost', blob_name)
+            return resp
+        if digest is not None:
+            self._verify_checksum(
+                blob_name, resp, digest.hex(),
+                base64.b64encode(digest).decode('ascii'), extra_args)
+        return resp
+
+    async def _upload_multipart(self, bucket_name: str, blob_name: str,
+                                stream, size: int, extra_args: Dict) -> Dict:
+        """Upload `size` bytes of `stream` in parts.
+
+        Parts are read sequentially off the event loop and uploaded by at most
+        `max_concurrency` concurrent requests, so memory use is bounded by
+        `max_concurrency` parts. The multipart upload is aborted if any part
+        fails.
+        """
+        part_size = calculate_part_size(size, self.multipart_chunksize,
+                                        max_parts=MAX_PARTS)
+        create_args = {key: value for key, value in extra_args.items()
+                       if key not in ('ContentLength', 'ContentMD5',
+                                      'IfNoneMatch')}
+        algorithm = UPLOAD_CHECKSUMS.get(self.upload_checksum)
+        if algorithm is not None:
+            create_args['ChecksumAlgorithm'] = algorithm
+        digests = {}  # part number -> digest
+        # The condition applies when the parts are assembled
+        complete_args = {key: extra_args[key] for key in ('IfNoneMatch',)
+                         if key in extra_args}
+
+        resp = await self._call(
+            'create_multipart_upload', idempotent=False,
+            Bucket=bucket_name, Key=blob_name, **create_args)
+        upload_id = resp['UploadId']
+        logger.debug('multipart upload %s: size=%s part_size=%s',
+                     upload_id, size, part_size)
+
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.max_concurrency)
+        errors = []
+        tasks = []
+
+        async def upload_part(part_number, data, digest):
+            try:
+                part_args = self._checksum_args(digest, {})
+                resp = await self._call(
+                    'upload_part', Bucket=bucket_name, Key=blob_name, UploadId=upload_id,
+                    PartNumber=part_number, Body=data, **part_args)
+                part = {'PartNumber': part_number, 'ETag': resp['ETag']}
+                if digest is not None:
+                    encoded = base64.b64encode(digest).decode('ascii')
+                    self._verify_checksum(blob_name, resp, digest.hex(),
+                                          encoded, part_args)
+                    if algorithm is not None:
+                        part['Checksum' + algorithm] = encoded
+                return part
+            except Exception as err:
+                errors.append(err)
+                raise
+            finally:
+                slots.release()
+
+        try:
+            part_number = 0
+            while not errors:
+                await slots.acquire()
+                # Each part is hashed as it is read
+                data, digest = await loop.run_in_executor(
+                    None, _read_hashed, stream, part_size,
+                    self.upload_checksum)
+                if not data:
+                    slots.release()
+                    break
+                part_number += 1
+                digests[part_number] = digest
+                tasks.append(loop.create_task(
+                    upload_part(part_number, data, digest)))
+            parts = await asyncio.gather(*tasks)
+            resp = await self._call(
+                'complete_multipart_upload', idempotent=False,
+                Bucket=bucket_name, Key=blob_name, UploadId=upload_id,
+                MultipartUpload={'Parts': parts}, **complete_args)
+            if self.upload_checksum is not None:
+                # Multipart ETags and checksums are the digest of the part
+                # digests, suffixed with the number of parts
+                combined = hashlib.new(self.upload_checksum, b''.join(
+                    digests[number] for number in sorted(digests))).digest()
+                suffix = '-%d' % len(digests)
+                self._verify_checksum(
+                    blob_name, resp, combined.hex() + suffix,
+                    base64.b64encode(combined).decode('ascii') + suffix,
+                    extra_args)
+            return resp
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await self._call(
+                    'abort_multipart_upload', Bucket=bucket_name, Key=blob_name, UploadId=upload_id)
+            except ClientError as err:
+                logger.warning('Could not abort multipart upload %s: %s',
+                               upload_id, err)
+            raise
+
+    @instrumented('get_blob')
     async def get_blob(self, container: Container, blob_name: str) -> Blob:
         object_summary = await self._object_summary(container.name,blob_name)
         object_summary['Key'] = blob_name
@@ -357,20 +869,163 @@ class MinioDriver(Driver):
 
 
 
+    @instrumented('download_blob', nbytes=blob_size)
     async def download_blob(self, blob: Blob,
                       destination: FileLike) -> None:
-        async with self.s3() as s3:
-            resp = await s3.get_object(Bucket=blob.container.name,Key=blob.name)
-            if isinstance(destination, str):
-                with open(destination,"wb") as f:
-                    destination = f
-                    await transfer_stream(resp['Body'],destination)
-            else:
-                await transfer_stream(resp['Body'],destination)
+        if isinstance(destination, str):
+            with open(destination,"wb") as f:
+                await self._download_to_file(blob, f)
+        else:
+            await self._download_to_file(blob, destination)
+
+    @instrumented('read_range', nbytes=result_length)
+    async def read_range(self, blob: Blob, offset: int,
+                         length: int = None) -> bytes:
+        if length is None:
+            byte_range = 'bytes=%d-' % offset
+        else:
+            byte_range = 'bytes=%d-%d' % (offset, offset + length - 1)
+
+        async def fetch():
+            s3 = await self._get_client()
+            resp = await s3.get_object(Bucket=blob.container.name,
+                                       Key=blob.name, Range=byte_range)
+            body = resp['Body']
+            try:
+                return await body.read()
+            finally:
+                body.close()
+
+        try:
+            # Request and body are retried and hedged together
+            return await self.retry_policy.call(
+                'get_object', self._hedged, 'read_range', fetch)
+        except ClientError as err:
+            error_code = err.response['Error']['Code']
+            if error_code in ('NoSuchKey', '404'):
+                raise NotFoundError(messages.BLOB_NOT_FOUND % (
+                    blob.name, blob.container.name))
+            if error_code in ('InvalidRange', '416'):
+                # The range starts past the end of the blob
+                return b''
+            raise
+
+    @instrumented('stream_blob')
+    async def stream_blob(self, blob: Blob,
+                          chunk_size: int = TRANSFER_BLOCK_SIZE):
+        try:
+            resp = await self._call('get_object', hedge=True,
+                                    Bucket=blob.container.name, Key=blob.name)
+        except ClientError as err:
+            if err.response['Error']['Code'] in ('NoSuchKey', '404'):
+                raise NotFoundError(messages.BLOB_NOT_FOUND % (
+                    blob.name, blob.container.name))
+            raise
+
+        body = resp['Body']
+        try:
+            while True:
+                chunk = await body.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+
+    async def _download_to_file(self, blob: Blob, destination) -> None:
+        """Use ranged GETs for large blobs when the destination has a file
+        descriptor we can `pwrite` into, a single stream otherwise."""
+        if blob.size is not None and blob.size >= self.multipart_threshold \
+                and hasattr(os, 'pwrite') and fcntl is not None:
+            try:
+                fd = destination.fileno()
+                # pwrite ignores the offset of descriptors opened to append
+                seekable = destination.seekable() and not \
+                    fcntl.fcntl(fd, fcntl.F_GETFL) & os.O_APPEND
+            except (AttributeError, OSError, ValueError):
+                seekable = False
+            if seekable:
+                destination.flush()
+                offset = destination.tell()
+                await self._download_ranges(blob, fd, offset)
+                destination.seek(offset + blob.size)
+                return
+
+        resp = await self._call('get_object', hedge=True,
+                                Bucket=blob.container.name, Key=blob.name)
+        body = resp['Body']
+        try:
+            await transfer_stream(body,destination)
+        finally:
+            # hand the connection back to the shared pool
+            body.close()
+
+    async def _download_ranges(self, blob: Blob, fd: int, offset: int) -> None:
+        """Download `blob` with concurrent `Range` requests, writing each
+        part at its own offset of `fd` with :func:`os.pwrite`.
+
+        Every part is conditional on the blob's etag so an object replaced
+        midway fails the download instead of mixing two versions.
+
+        :raises BlobChangedError: If the stored object no longer has the
+          blob's etag.
+        """
+        part_size = calculate_part_size(blob.size, self.download_part_size,
+                                        max_parts=MAX_PARTS)
+        ranges = iter([(start, min(start + part_size, blob.size) - 1)
+                       for start in range(0, blob.size, part_size)])
+        os.ftruncate(fd, offset + blob.size)
+        s3 = await self._get_client()
+
+        async def fetch(start, end):
+            resp = await s3.get_object(
+                Bucket=blob.container.name, Key=blob.name,
+                Range='bytes=%d-%d' % (start, end),
+                IfMatch='"%s"' % blob.etag)
+            body = resp['Body']
+            position = offset + start
+            try:
+                while True:
+                    chunk = await body.read(TRANSFER_BLOCK_SIZE)
+                    if not chunk:
+                        break
+                    view = memoryview(chunk)
+                    while view:
+                        written = os.pwrite(fd, view, position)
+                        view = view[written:]
+                        position += written
+            finally:
+                body.close()
+            if position != offset + end + 1:
+                raise CloudStorageError(
+                    'Incomplete range %d-%d of %s' % (start, end, blob.name))
+
+        async def worker():
+            for start, end in ranges:
+                # Parts are written at fixed offsets, so they can be refetched
+                # and a hedged copy only rewrites the same bytes
+                await self.retry_policy.call(
+                    'get_object', self._hedged, 'get_object_part', fetch,
+                    start, end)
+
+        workers = [asyncio.ensure_future(worker())
+                   for _ in range(self.download_concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException as err:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if isinstance(err, ClientError) and err.response['Error'][
+                    'Code'] in ('PreconditionFailed', '412'):
+                raise BlobChangedError(messages.BLOB_CHANGED % (
+                    blob.name, blob.container.name)) from err
+            raise
 
     def patch_blob(self, blob: Blob) -> None:
         raise NotImplementedError
 
+    @instrumented('delete_blob')
     async def delete_blob(self, blob: Blob) -> None:
         # Required parameters
         params = {
@@ -380,9 +1035,8 @@ class MinioDriver(Driver):
         logger.debug('params=%s', params)
 
         try:
-            async with self.s3() as s3:
-                response = await s3.delete_object(**params)
-                logger.debug('response=%s', response)
+            response = await self._call('delete_object', **params)
+            logger.debug('response=%s', response)
         except ClientError as err:
             error_code = int(err.response['Error']['Code'])
             if error_code != 200 or error_code != 204:
@@ -390,6 +1044,40 @@ class MinioDriver(Driver):
                     blob.name, blob.container.name))
             raise
 
+    @instrumented('delete_blobs')
+    async def delete_blobs(self, container: Container,
+                           blob_names: List[str]) -> Dict:
+        results = {name: None for name in blob_names}
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def delete_batch(keys):
+            params = {
+                'Bucket': container.name,
+                'Delete': {
+                    'Objects': [{'Key': key} for key in keys],
+                    'Quiet': True,
+                },
+            }
+            async with slots:
+                try:
+                    response = await self._call('delete_objects', **params)
+                except ClientError as err:
+                    error = CloudStorageError('%s: %s' % (
+                        err.response['Error']['Code'],
+                        err.response['Error']['Message']))
+                    for key in keys:
+                        results[key] = error
+                    return
+            logger.debug('response=%s', response)
+            for error in response.get('Errors', []):
+                results[error['Key']] = CloudStorageError('%s: %s' % (
+                    error['Code'], error['Message']))
+
+        await asyncio.gather(*(
+            delete_batch(blob_names[index:index + DELETE_BATCH_SIZE])
+            for index in range(0, len(blob_names), DELETE_BATCH_SIZE)))
+        return results
+
     def blob_cdn_url(self, blob: Blob) -> str:
         container_url = self.container_cdn_url(blob.container)
         blob_name_cleaned = quote(blob.name)
@@ -540,6 +1228,7 @@ class MinioDriver(Driver):
         'grantread': 'GrantRead',
         'grantreadacp': 'GrantReadACP',
         'grantwriteacp': 'GrantWriteACP',
+        'ifnonematch': 'IfNoneMatch',
         'key': 'Key',
         'metadata': 'Metadata',
         'serversideencryption': 'ServerSideEncryption',
@@ -26,10 +26,22 @@ class NotFoundError(CloudStorageError):
     """Raised when a container or blob does not exist."""
     code = HTTPStatus.NOT_FOUND
 
+class ContainerNotFoundError(NotFoundError):
+    """Raised when the container itself does not exist."""
+
 class InvalidFileURLError(CloudStorageError):
     """Raised when a container or blob does not exist."""
     code = HTTPStatus.NOT_FOUND
 
+class BlobExistsError(CloudStorageError):
+    """Raised when a blob created with `if_none_match='*'` already exists."""
+    code = HTTPStatus.CONFLICT
+
+class BlobChangedError(CloudStorageError):
+    """Raised when a blob was replaced after its metadata was read, so its
+    etag no longer matches the stored object."""
+    code = HTTPStatus.PRECONDITION_FAILED
+
 class IsNotEmptyError(CloudStorageError):
     """Raised when the container is not empty."""
     code = HTTPStatus.CONFLICT
@@ -40,6 +52,12 @@ class CredentialsError(CloudStorageError):
     code = HTTPStatus.UNAUTHORIZED
 
 
+class CircuitOpenError(CloudStorageError):
+    """Raised without contacting the store while its circuit breaker is
+    open."""
+    code = HTTPStatus.SERVICE_UNAVAILABLE
+
+
 class SignatureExpiredError(CloudStorageError):
     """Raised when signature timestamp is older than required maximum age."""
     code = HTTPStatus.UNAUTHORIZED
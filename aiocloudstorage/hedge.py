@@ -0,0 +1,209 @@
+"""Hedged requests for idempotent reads."""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Union
+
+__all__ = ['HedgePolicy']
+
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy:
+    """Send a second copy of a slow idempotent read and use whichever copy
+    answers first.
+
+    A read is hedged when it has not completed within the `percentile` of
+    the recent latencies of the same operation. The loser is cancelled. At
+    most `budget` extra requests per request are sent, so a slow backend
+    cannot double the load on itself.
+
+    Configured per store with the `hedge` key of `STORAGE_CONFIG`:
+
+    .. code-block:: python
+
+        {
+            'name': 'minio',
+            'driver': 'MINIO',
+            ...
+            'hedge': {'percentile': 0.95, 'budget': 0.05},
+        }
+
+    :param percentile: (optional) Latency percentile, between 0 and 1, after
+      which a read is hedged.
+    :type percentile: float
+
+    :param budget: (optional) Largest ratio of hedged to total requests.
+    :type budget: float
+
+    :param window: (optional) Number of recent latencies kept per operation.
+    :type window: int
+
+    :param min_samples: (optional) Latencies needed before an operation is
+      hedged.
+    :type min_samples: int
+
+    :param min_delay: (optional) Shortest wait in seconds before hedging.
+    :type min_delay: float
+    """
+
+    def __init__(self, percentile: float = 0.95, budget: float = 0.05,
+                 window: int = 1000, min_samples: int = 20,
+                 min_delay: float = 0.005) -> None:
+        self.percentile = percentile
+        self.budget = budget
+        self.window = window
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        #: Reads made through the policy
+        self.requests = 0
+        #: Extra requests sent
+        self.hedged = 0
+        #: Hedged requests that answered before the original
+        self.hedge_wins = 0
+        self._latencies = {}  # type: Dict[str, deque]
+
+    @classmethod
+    def from_config(cls, config: Union[None, Dict, 'HedgePolicy']
+                    ) -> Optional['HedgePolicy']:
+        """Build a policy from a `hedge` configuration value.
+
+        :param config: Keyword arguments of :class:`HedgePolicy`, a policy,
+          `True` for the defaults or `None` to disable hedging.
+        :type config: dict or HedgePolicy or bool or None
+
+        :return: Hedge policy or `None`.
+        :rtype: :class:`HedgePolicy` or None
+        """
+        if not config:
+            return None
+        if isinstance(config, cls):
+            return config
+        return cls(**(config if isinstance(config, dict) else {}))
+
+    def record(self, operation: str, latency: float) -> None:
+        """Add the latency of a completed read.
+
+        :param operation: Operation name.
+        :type operation: str
+
+        :param latency: Seconds the read took.
+        :type latency: float
+
+        :return: NoneType
+        :rtype: None
+        """
+        latencies = self._latencies.get(operation)
+        if latencies is None:
+            latencies = self._latencies[operation] = deque(maxlen=self.window)
+        latencies.append(latency)
+
+    def hedge_delay(self, operation: str) -> Optional[float]:
+        """Seconds to wait before hedging a read, `None` if it should not be
+        hedged (not enough samples or budget spent).
+
+        :param operation: Operation name.
+        :type operation: str
+
+        :return: Delay in seconds or `None`.
+        :rtype: float or None
+        """
+        latencies = self._latencies.get(operation)
+        if not latencies or len(latencies) < self.min_samples:
+            return None
+        if self.hedged + 1 > self.budget * self.requests:
+            return None
+        ordered = sorted(latencies)
+        index = max(math.ceil(self.percentile * len(ordered)) - 1, 0)
+        return max(ordered[index], self.min_delay)
+
+    async def call(self, operation: str, func: Callable, *args: Any,
+                   discard: Optional[Callable[[Any], None]] = None,
+                   **kwargs: Any) -> Any:
+        """Await `func(*args, **kwargs)`, hedging it if it is slow.
+
+        :param operation: Name latencies are tracked under.
+        :type operation: str
+
+        :param func: Coroutine function performing an idempotent read.
+        :type func: callable
+
+        :param discard: (optional) Called with the result of a losing request
+          that completed anyway, e.g. to close a response body.
+        :type discard: callable or None
+
+        :return: The result of the first copy that succeeded.
+        :rtype: Any
+        """
+        self.requests += 1
+        delay = self.hedge_delay(operation)
+        started = time.perf_counter()
+        first = asyncio.ensure_future(func(*args, **kwargs))
+        if delay is None:
+            result = await first
+            self.record(operation, time.perf_counter() - started)
+            return result
+
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+        except BaseException:
+            first.cancel()
+            raise
+        if done:
+            result = first.result()
+            self.record(operation, time.perf_counter() - started)
+            return result
+
+        self.hedged += 1
+        logger.debug('Hedging %s after %.3fs', operation, delay)
+        second = asyncio.ensure_future(func(*args, **kwargs))
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = None
+                for task in done:
+                    if task.cancelled():
+                        error = error or asyncio.CancelledError()
+                    elif task.exception() is not None:
+                        error = error or task.exception()
+                    elif winner is None:
+                        winner = task
+                    elif discard is not None:
+                        discard(task.result())
+                if winner is not None:
+                    if winner is second:
+                        self.hedge_wins += 1
+                    self.record(operation, time.perf_counter() - started)
+                    return winner.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+                if discard is not None:
+                    task.add_done_callback(
+                        lambda task: _discard_late(task, discard))
+
+    def stats(self) -> Dict[str, int]:
+        """Hedging counters.
+
+        :return: `requests`, `hedged` and `hedge_wins` counts.
+        :rtype: dict
+        """
+        return {'requests': self.requests, 'hedged': self.hedged,
+                'hedge_wins': self.hedge_wins}
+
+    def __repr__(self):
+        return '<HedgePolicy percentile=%s budget=%s>' % (
+            self.percentile, self.budget)
+
+
+def _discard_late(task: asyncio.Future,
+                  discard: Callable[[Any], None]) -> None:
+    """Release the result of a cancelled loser that finished anyway."""
+    if not task.cancelled() and task.exception() is None:
+        discard(task.result())
@@ -1,18 +1,39 @@
 """Helper methods for Cloud Storage."""
+import asyncio
+import errno
 import hashlib
 import mimetypes
 import os
 import re
+import tempfile
 from _hashlib import HASH
-from typing import Dict, Generator, Optional, Tuple
+from typing import Dict, Generator, List, Optional, Tuple
 import uuid
 
 import magic
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover (Windows)
+    fcntl = None
+
 from aiocloudstorage.typed import FileLike
 from aiocloudstorage.exceptions import InvalidBucketError,InvalidFileURLError,FileEmptyError
 from aiocloudstorage import messages
 
+#: Buffer size used when data has to be copied through user space
+COPY_BUFFER_SIZE = 1024 * 1024
+#: Bytes read by :func:`upload_preflight`; smaller files are read whole
+PREFLIGHT_HEAD_SIZE = 64 * 1024
+#: Largest gap between two byte ranges that are still read as one
+RANGE_COALESCE_GAP = 64 * 1024
+#: `ioctl` request cloning a whole file (reflink) on btrfs, XFS, ...
+FICLONE = 0x40049409
+#: errnos meaning a kernel copy method does not apply to these descriptors
+_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF,
+                     errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOTTY,
+                     errno.EPERM}
+
 _VALID_BUCKETNAME_REGEX = re.compile(
     '^[A-Za-z0-9][A-Za-z0-9\\.\\-\\_\\:]{1,61}[A-Za-z0-9]$')
 _VALID_BUCKETNAME_STRICT_REGEX = re.compile(
@@ -122,6 +143,70 @@ async def transfer_stream(readstream,writestream,block_size:int=1024*1024*2):
             break
         writestream.write(chunk)
 
+def calculate_part_size(total_size: int, part_size: int,
+                        max_parts: int = 10000) -> int:
+    """Return a part size, no smaller than `part_size`, which splits
+    `total_size` bytes into at most `max_parts` parts.
+
+    .. code-block:: python
+
+        from aiocloudstorage.helpers import calculate_part_size
+
+        calculate_part_size(100 * 1024 ** 3, 8 * 1024 ** 2)
+        # 11534336 (11 MiB)
+
+    :param total_size: Size of the whole transfer in bytes.
+    :type total_size: int
+
+    :param part_size: Preferred part size in bytes.
+    :type part_size: int
+
+    :param max_parts: (optional) Maximum number of parts allowed.
+    :type max_parts: int
+
+    :return: Part size in bytes, rounded up to a whole MiB when it had to be
+      grown.
+    :rtype: int
+    """
+    if total_size <= part_size * max_parts:
+        return part_size
+    mib = 1024 * 1024
+    part_size = -(-total_size // max_parts)
+    return -(-part_size // mib) * mib
+
+
+def coalesce_ranges(ranges: List[Tuple[int, int]],
+                    max_gap: int = RANGE_COALESCE_GAP) -> List[Tuple[int, int]]:
+    """Merge `(offset, length)` byte ranges that overlap or are at most
+    `max_gap` bytes apart, so nearby ranges are fetched with one request.
+
+    .. code-block:: python
+
+        from aiocloudstorage.helpers import coalesce_ranges
+
+        coalesce_ranges([(0, 100), (150, 50), (10000, 10)], max_gap=1024)
+        # [(0, 200), (10000, 10)]
+
+    :param ranges: Byte ranges as `(offset, length)` pairs, in any order.
+    :type ranges: list
+
+    :param max_gap: (optional) Largest number of unwanted bytes read to join
+      two ranges.
+    :type max_gap: int
+
+    :return: Sorted, merged `(offset, length)` pairs.
+    :rtype: list
+    """
+    merged = []  # type: List[List[int]]
+    for offset, length in sorted(ranges):
+        end = offset + length
+        if merged and offset <= merged[-1][1] + max_gap:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([offset, end])
+    return [(start, end - start) for start, end in merged]
+
+
 def read_in_chunks(file_object: FileLike,
                    block_size: int = 4096) -> Generator[bytes, None, None]:
     """Return a generator which yields data in chunks.
@@ -143,6 +228,163 @@ def read_in_chunks(file_object: FileLike,
         yield chunk
 
 
+def file_descriptor(file_object: FileLike) -> Optional[int]:
+    """Return the OS file descriptor behind a file object, if it has one.
+
+    An in-memory :class:`tempfile.SpooledTemporaryFile` (as used by FastAPI's
+    `UploadFile`) is not rolled over to disk just to get a descriptor.
+
+    :param file_object: File object.
+    :type file_object: file object
+
+    :return: File descriptor or `None` for in-memory streams.
+    :rtype: int or None
+    """
+    if isinstance(file_object, tempfile.SpooledTemporaryFile) and \
+            not getattr(file_object, '_rolled', True):
+        return None
+    try:
+        return file_object.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def copy_fd(src_fd: int, dst_fd: int, count: int) -> int:
+    """Copy `count` bytes between the current offsets of two descriptors,
+    keeping the data in the kernel where possible.
+
+    Methods are tried in order: a FICLONE reflink (whole files only),
+    :func:`os.copy_file_range`, :func:`os.sendfile` and finally a read/write
+    loop with a :data:`COPY_BUFFER_SIZE` buffer. Both offsets are advanced
+    by the number of bytes copied.
+
+    :param src_fd: Descriptor open for reading.
+    :type src_fd: int
+
+    :param dst_fd: Descriptor open for writing.
+    :type dst_fd: int
+
+    :param count: Number of bytes to copy.
+    :type count: int
+
+    :return: Number of bytes copied, less than `count` if the source ended
+      early.
+    :rtype: int
+    """
+    if fcntl is not None and count and \
+            os.lseek(src_fd, 0, os.SEEK_CUR) == 0 and \
+            os.lseek(dst_fd, 0, os.SEEK_CUR) == 0 and \
+            os.fstat(src_fd).st_size == count:
+        try:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+            os.lseek(src_fd, count, os.SEEK_SET)
+            os.lseek(dst_fd, count, os.SEEK_SET)
+            return count
+        except OSError as err:
+            if err.errno not in _COPY_UNSUPPORTED:
+                raise
+
+    copied = 0
+    for kernel_copy in (getattr(os, 'copy_file_range', None),
+                        _sendfile if hasattr(os, 'sendfile') else None):
+        if kernel_copy is None:
+            continue
+        try:
+            while copied < count:
+                sent = kernel_copy(src_fd, dst_fd, count - copied)
+                if not sent:
+                    return copied
+                copied += sent
+            return copied
+        except OSError as err:
+            if err.errno not in _COPY_UNSUPPORTED:
+                raise
+
+    while copied < count:
+        chunk = os.read(src_fd, min(COPY_BUFFER_SIZE, count - copied))
+        if not chunk:
+            break
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(dst_fd, view):]
+        copied += len(chunk)
+    return copied
+
+
+def _sendfile(src_fd: int, dst_fd: int, count: int) -> int:
+    return os.sendfile(dst_fd, src_fd, None, count)
+
+
+def copy_stream(source: FileLike, destination: FileLike,
+                block_size: int = COPY_BUFFER_SIZE, hasher=None) -> int:
+    """Copy the rest of a sync file object into another one.
+
+    When both sides are backed by file descriptors the copy is done with
+    :func:`copy_fd`, without passing the data through user space. In-memory
+    :class:`io.BytesIO` sources (also inside a `SpooledTemporaryFile`) are
+    written in one call from their buffer. Anything else is copied in
+    `block_size` chunks.
+
+    :param source: File object open for reading.
+    :type source: file object
+
+    :param destination: File object open for writing.
+    :type destination: file object
+
+    :param block_size: (optional) Chunk size of the user space fallback.
+    :type block_size: int
+
+    :param hasher: (optional) :mod:`hashlib` object updated with the bytes as
+      they are copied. The kernel copy is skipped when it is given.
+    :type hasher: hashlib hash object or None
+
+    :return: Number of bytes copied.
+    :rtype: int
+    """
+    src_fd = file_descriptor(source)
+    dst_fd = file_descriptor(destination)
+    if src_fd is not None and dst_fd is not None and hasher is None:
+        try:
+            src_offset = source.tell()
+            src_size = os.fstat(src_fd).st_size
+            dst_offset = destination.tell()
+        except (AttributeError, OSError, ValueError):
+            pass
+        else:
+            # Python level buffers must agree with the OS offsets
+            destination.flush()
+            os.lseek(src_fd, src_offset, os.SEEK_SET)
+            os.lseek(dst_fd, dst_offset, os.SEEK_SET)
+            copied = copy_fd(src_fd, dst_fd, max(src_size - src_offset, 0))
+            source.seek(src_offset + copied)
+            destination.seek(dst_offset + copied)
+            return copied
+
+    memory = getattr(source, '_file', source)
+    if hasattr(memory, 'getbuffer'):
+        position = memory.tell()
+        with memory.getbuffer() as buffer:
+            data = buffer[position:]
+            if hasher is not None:
+                hasher.update(data)
+            destination.write(data)
+            copied = len(data)
+            data.release()
+        memory.seek(position + copied)
+        return copied
+
+    copied = 0
+    while True:
+        chunk = source.read(block_size)
+        if not chunk:
+            break
+        if hasher is not None:
+            hasher.update(chunk)
+        destination.write(chunk)
+        copied += len(chunk)
+    return copied
+
+
 def file_checksum(filename: FileLike, hash_type: str = 'md5',
                   block_size: int = 4096) -> HASH:
     """Returns checksum for file.
@@ -268,6 +510,131 @@ def file_content_type(filename: FileLike) -> Optional[str]:
     return content_type or ''
 
 
+class UploadPreflight:
+    """What :func:`upload_preflight` learned about an upload source.
+
+    :param name: File name of the source, if it has one.
+    :type name: str or None
+
+    :param head: First bytes of the source, `None` if it was not read.
+    :type head: bytes or None
+
+    :param size: Bytes left in the source, `None` if unknown.
+    :type size: int or None
+
+    :param position: Offset of the source `head` starts at.
+    :type position: int
+
+    :param complete: Whether `head` holds the whole source.
+    :type complete: bool
+
+    :param content_type: Content type :func:`file_content_type` would give.
+    :type content_type: str
+    """
+    __slots__ = ('name', 'head', 'size', 'position', 'complete',
+                 'content_type')
+
+    def __init__(self, name: Optional[str], head: Optional[bytes] = None,
+                 size: Optional[int] = None, position: int = 0,
+                 complete: bool = False, content_type: str = '') -> None:
+        self.name = name
+        self.head = head
+        self.size = size
+        self.position = position
+        self.complete = complete
+        self.content_type = content_type
+
+    @property
+    def sniffed_type(self) -> Optional[str]:
+        """MIME type sniffed from `head` by libmagic, `None` if it was not
+        read."""
+        if self.head is None:
+            return None
+        return magic.from_buffer(self.head, mime=True)
+
+    def hasher(self, hash_type: str = 'md5'):
+        """A :mod:`hashlib` object already fed with `head`; feed it the rest
+        of the source to get its digest.
+
+        :param hash_type: Hash algorithm name.
+        :type hash_type: str
+
+        :return: Hash object.
+        :rtype: :class:`_hashlib.HASH`
+        """
+        hasher = hashlib.new(hash_type)
+        if self.head:
+            hasher.update(self.head)
+        return hasher
+
+    def __repr__(self):
+        return '<UploadPreflight %s size=%s complete=%s>' % (
+            self.name, self.size, self.complete)
+
+
+def upload_preflight(filename: FileLike,
+                     head_size: int = PREFLIGHT_HEAD_SIZE) -> UploadPreflight:
+    """Inspect an upload source with a single read of its head: its name,
+    size, content type and first bytes (the whole source if it is small).
+    Streams are rewound to where they started.
+
+    .. code-block:: python
+
+        preflight = upload_preflight('/path/picture.png')
+        preflight.size, preflight.content_type
+        # (1024, 'image/png')
+
+    :param filename: File path or file like object.
+    :type filename: str or file
+
+    :param head_size: (optional) Bytes to read.
+    :type head_size: int
+
+    :return: Pre-flight result.
+    :rtype: :class:`UploadPreflight`
+
+    :raise FileNotFoundError: If the file path is invalid.
+    :raise FileEmptyError: If the source is empty.
+    """
+    name = validate_file_or_path(filename) if not isinstance(filename, str) \
+        else os.path.basename(filename)
+    if isinstance(filename, str):
+        with open(filename, 'rb') as source:
+            size = os.fstat(source.fileno()).st_size
+            head = source.read(head_size)
+        if not head:
+            raise FileEmptyError(messages.FILE_EMPTY % (filename))
+        return UploadPreflight(name, head, size, 0, len(head) == size,
+                               magic.from_buffer(head, mime=True) or '')
+
+    content_type = (mimetypes.guess_type(name)[0] or '') if name else ''
+    stream = filename
+    if hasattr(filename, 'file'):
+        # in case of fileupload in fast api the file is in file attr
+        stream = filename.file
+        stream.seek(0)
+    elif not hasattr(stream, 'read') or \
+            asyncio.iscoroutinefunction(stream.read):
+        # Async streams are only read by the driver
+        return UploadPreflight(name, content_type=content_type)
+
+    position = stream.tell()
+    head = stream.read(head_size)
+    stream.seek(position)
+    if not head:
+        raise FileEmptyError(messages.FILE_EMPTY % (filename))
+    fd = file_descriptor(stream)
+    if len(head) < head_size:
+        size = len(head)
+    elif fd is not None:
+        size = os.fstat(fd).st_size - position
+    else:
+        size = stream.seek(0, os.SEEK_END) - position
+        stream.seek(position)
+    return UploadPreflight(name, head, size, position, len(head) == size,
+                           content_type)
+
+
 def parse_content_disposition(data: str) -> Tuple[Optional[str], Dict]:
     """Parse Content-Disposition header.
 
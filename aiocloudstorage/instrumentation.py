@@ -0,0 +1,325 @@
+"""Instrumentation of driver operations.
+
+Driver methods decorated with :func:`instrumented` report every call to the
+instruments registered on the driver with :meth:`.Driver.add_instrument`.
+When no instrument is registered the decorator only checks an empty list.
+Operations of a driver with a circuit breaker (see :mod:`.breaker`) are
+rejected here while it is open.
+
+.. code-block:: python
+
+    from aiocloudstorage.instrumentation import MetricsCollector
+
+    collector = MetricsCollector()
+    driver.add_instrument(collector)
+    ...
+    print(collector.to_prometheus())
+"""
+import bisect
+import functools
+import inspect
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+__all__ = ['Instrument', 'MetricsCollector', 'OperationEvent', 'instrumented']
+
+logger = logging.getLogger(__name__)
+
+#: Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0)
+
+
+class OperationEvent:
+    """A single driver operation, passed to :class:`Instrument` callbacks.
+
+    :param operation: Driver method name, e.g. `upload_blob`.
+    :type operation: str
+
+    :param store: Store alias of the driver.
+    :type store: str
+
+    :param container: Container name, if the operation targets one.
+    :type container: str or None
+
+    :param blob: Blob name, if the operation targets one.
+    :type blob: str or None
+    """
+    __slots__ = ('operation', 'store', 'container', 'blob', 'bytes',
+                 'started', 'duration', 'error')
+
+    def __init__(self, operation: str, store: str,
+                 container: Optional[str] = None,
+                 blob: Optional[str] = None) -> None:
+        #: Driver method name.
+        self.operation = operation
+        #: Store alias of the driver.
+        self.store = store
+        #: Container name or `None`.
+        self.container = container
+        #: Blob name or `None`.
+        self.blob = blob
+        #: Bytes transferred, set when the operation finishes.
+        self.bytes = 0
+        #: :func:`time.perf_counter` value when the operation started.
+        self.started = time.perf_counter()
+        #: Seconds the operation took, set when it finishes or fails.
+        self.duration = None  # type: Optional[float]
+        #: Exception raised by the operation, if any.
+        self.error = None  # type: Optional[BaseException]
+
+    def __repr__(self):
+        return '<OperationEvent %s %s/%s/%s>' % (
+            self.operation, self.store, self.container, self.blob)
+
+
+class Instrument:
+    """Base class of objects notified about driver operations. Override the
+    callbacks of interest; they run on the event loop and should be quick."""
+
+    def on_start(self, event: OperationEvent) -> None:
+        """Called before the operation runs."""
+
+    def on_finish(self, event: OperationEvent) -> None:
+        """Called after the operation succeeded."""
+
+    def on_error(self, event: OperationEvent) -> None:
+        """Called after the operation raised `event.error`."""
+
+
+def _notify(instruments: List[Instrument], callback: str,
+            event: OperationEvent) -> None:
+    for instrument in instruments:
+        try:
+            getattr(instrument, callback)(event)
+        except Exception:
+            logger.exception('Instrument %r failed in %s', instrument,
+                             callback)
+
+
+def _make_event(driver, operation: str, signature: inspect.Signature,
+                args: Tuple, kwargs: Dict) -> Tuple[OperationEvent, Dict]:
+    arguments = signature.bind_partial(driver, *args, **kwargs).arguments
+    container = arguments.get('container')
+    blob = arguments.get('blob')
+    blob_name = arguments.get('blob_name')
+    if blob is not None:
+        container = blob.container
+        blob_name = blob.name
+    container_name = getattr(container, 'name', None) \
+        or arguments.get('container_name')
+    event = OperationEvent(operation, driver.alias_name, container_name,
+                           blob_name)
+    return event, arguments
+
+
+def instrumented(operation: str,
+                 nbytes: Callable[[Dict, object], int] = None) -> Callable:
+    """Decorate a driver coroutine or async generator method so it reports
+    to the driver's instruments.
+
+    :param operation: Operation name reported in events.
+    :type operation: str
+
+    :param nbytes: (optional) Function of the bound arguments and the result
+      returning the number of bytes transferred. Async generators count the
+      length of the `bytes` they yield instead.
+    :type nbytes: callable or None
+
+    :return: Decorator.
+    :rtype: callable
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def generator_wrapper(self, *args, **kwargs):
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.before_call(operation)
+                generator = func(self, *args, **kwargs)
+                instruments = self.instruments
+                try:
+                    if not instruments:
+                        async for item in generator:
+                            yield item
+                        return
+
+                    event, _ = _make_event(self, operation, signature, args,
+                                           kwargs)
+                    _notify(instruments, 'on_start', event)
+                    try:
+                        async for item in generator:
+                            if isinstance(item, bytes):
+                                event.bytes += len(item)
+                            yield item
+                    except Exception as err:
+                        event.error = err
+                        raise
+                    finally:
+                        # Closing the generator early counts as finished
+                        event.duration = time.perf_counter() - event.started
+                        _notify(instruments, 'on_error' if event.error
+                                else 'on_finish', event)
+                finally:
+                    await generator.aclose()
+
+            return generator_wrapper
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.before_call(operation)
+            instruments = self.instruments
+            if not instruments:
+                return await func(self, *args, **kwargs)
+
+            event, arguments = _make_event(self, operation, signature, args,
+                                           kwargs)
+            _notify(instruments, 'on_start', event)
+            try:
+                result = await func(self, *args, **kwargs)
+            except BaseException as err:
+                event.duration = time.perf_counter() - event.started
+                event.error = err
+                _notify(instruments, 'on_error', event)
+                raise
+            event.duration = time.perf_counter() - event.started
+            if nbytes is not None:
+                event.bytes = nbytes(arguments, result) or 0
+            _notify(instruments, 'on_finish', event)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def result_size(arguments: Dict, result) -> int:
+    """`nbytes` of operations returning a :class:`.Blob`."""
+    return getattr(result, 'size', 0)
+
+
+def blob_size(arguments: Dict, result) -> int:
+    """`nbytes` of operations transferring a whole `blob` argument."""
+    return getattr(arguments.get('blob'), 'size', 0)
+
+
+def result_length(arguments: Dict, result) -> int:
+    """`nbytes` of operations returning `bytes`."""
+    return len(result)
+
+
+class _Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class MetricsCollector(Instrument):
+    """Collect latency histograms, byte counters and error counters per
+    store and operation.
+
+    :param buckets: (optional) Upper bounds in seconds of the latency
+      histogram buckets.
+    :type buckets: tuple
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.latencies = {}  # type: Dict[Tuple[str, str], _Histogram]
+        self.bytes = {}  # type: Dict[Tuple[str, str], int]
+        self.errors = {}  # type: Dict[Tuple[str, str, str], int]
+        self.in_flight = {}  # type: Dict[Tuple[str, str], int]
+
+    def on_start(self, event: OperationEvent) -> None:
+        key = (event.store, event.operation)
+        self.in_flight[key] = self.in_flight.get(key, 0) + 1
+
+    def on_finish(self, event: OperationEvent) -> None:
+        key = (event.store, event.operation)
+        self.in_flight[key] -= 1
+        self._observe(key, event.duration)
+        self.bytes[key] = self.bytes.get(key, 0) + event.bytes
+
+    def on_error(self, event: OperationEvent) -> None:
+        key = (event.store, event.operation)
+        self.in_flight[key] -= 1
+        self._observe(key, event.duration)
+        error_key = key + (type(event.error).__name__,)
+        self.errors[error_key] = self.errors.get(error_key, 0) + 1
+
+    def _observe(self, key: Tuple[str, str], duration: float) -> None:
+        histogram = self.latencies.get(key)
+        if histogram is None:
+            histogram = self.latencies[key] = _Histogram(len(self.buckets))
+        index = bisect.bisect_left(self.buckets, duration)
+        if index < len(self.buckets):
+            histogram.counts[index] += 1
+        histogram.sum += duration
+        histogram.count += 1
+
+    def to_prometheus(self, prefix: str = 'aiocloudstorage') -> str:
+        """Export the metrics in the Prometheus text exposition format.
+
+        :param prefix: (optional) Metric name prefix.
+        :type prefix: str
+
+        :return: Metrics text.
+        :rtype: str
+        """
+        lines = []
+        name = prefix + '_operation_duration_seconds'
+        lines.append('# HELP %s Duration of storage operations.' % name)
+        lines.append('# TYPE %s histogram' % name)
+        for (store, operation), histogram in sorted(self.latencies.items()):
+            labels = 'store="%s",operation="%s"' % (_escape(store), operation)
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram.counts):
+                cumulative += count
+                lines.append('%s_bucket{%s,le="%s"} %d' % (
+                    name, labels, _format_float(bound), cumulative))
+            lines.append('%s_bucket{%s,le="+Inf"} %d' % (
+                name, labels, histogram.count))
+            lines.append('%s_sum{%s} %s' % (name, labels,
+                                            _format_float(histogram.sum)))
+            lines.append('%s_count{%s} %d' % (name, labels, histogram.count))
+
+        name = prefix + '_operation_bytes_total'
+        lines.append('# HELP %s Bytes transferred by storage operations.'
+                     % name)
+        lines.append('# TYPE %s counter' % name)
+        for (store, operation), value in sorted(self.bytes.items()):
+            lines.append('%s{store="%s",operation="%s"} %d' % (
+                name, _escape(store), operation, value))
+
+        name = prefix + '_operation_errors_total'
+        lines.append('# HELP %s Failed storage operations.' % name)
+        lines.append('# TYPE %s counter' % name)
+        for (store, operation, error), value in sorted(self.errors.items()):
+            lines.append('%s{store="%s",operation="%s",error="%s"} %d' % (
+                name, _escape(store), operation, error, value))
+
+        name = prefix + '_operations_in_flight'
+        lines.append('# HELP %s Storage operations in progress.' % name)
+        lines.append('# TYPE %s gauge' % name)
+        for (store, operation), value in sorted(self.in_flight.items()):
+            lines.append('%s{store="%s",operation="%s"} %d' % (
+                name, _escape(store), operation, value))
+        return '\n'.join(lines) + '\n'
+
+    def __repr__(self):
+        return '<MetricsCollector operations=%d>' % len(self.latencies)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
@@ -1,5 +1,9 @@
 """Standardized error messages for Cloud Storage."""
+BLOB_CHANGED = "Blob '%s' in container '%s' changed during download."
+BLOB_EXISTS = "Blob '%s' already exists in container '%s'."
 BLOB_NOT_FOUND = "Blob '%s' not found in container '%s'."
+CHECKSUM_MISMATCH = "Checksum of '%s' does not match: expected %s, got %s."
+CIRCUIT_OPEN = "Circuit breaker of store '%s' is open, %s rejected."
 CDN_NOT_ENABLED = "CDN not enabled on container '%s'."
 CONTAINER_EXISTS = "Container '%s' already exists."
 CONTAINER_NOT_EMPTY = "Container '%s' is not empty."
@@ -8,6 +12,7 @@ CONTAINER_NAME_INVALID = 'Invalid container name.'
 FEATURE_NOT_SUPPORTED = "Feature '%s' is not supported by driver."
 LOCAL_NO_ATTRIBUTES = 'Extended filesystem attributes not supported.'
 OPTION_NOT_SUPPORTED = "Option '%s' is not supported."
+PREFIX_INVALID = "Prefix '%s' points outside container '%s'."
 REGION_NOT_FOUND = "Unknown region name '%s'."
 STORAGE_NOT_ENABLED = "Storage not enabled in configuration."
 FILE_URL_INVALID = "File Url not valid %s"
@@ -0,0 +1,219 @@
+"""Retry policy for transient backend errors."""
+import asyncio
+import logging
+import random
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+try:
+    import aiohttp
+    from botocore import exceptions as botocore_exceptions
+except ImportError:  # pragma: no cover
+    aiohttp = None
+    botocore_exceptions = None
+
+__all__ = ['RetryPolicy']
+
+logger = logging.getLogger(__name__)
+
+#: S3 error codes worth retrying
+DEFAULT_RETRYABLE_CODES = frozenset([
+    'InternalError', 'RequestTimeout', 'RequestTimeoutException',
+    'ServiceUnavailable', 'SlowDown', 'Throttling', 'ThrottlingException',
+    'RequestLimitExceeded', 'PriorRequestNotComplete',
+    '500', '502', '503', '504',
+])
+
+#: HTTP status codes worth retrying whatever the error code says
+DEFAULT_RETRYABLE_STATUS = frozenset([500, 502, 503, 504])
+
+
+def _connection_errors() -> Tuple[type, ...]:
+    """Errors raised when a request never got a complete response."""
+    errors = [ConnectionError, asyncio.TimeoutError]
+    if botocore_exceptions is not None:
+        errors += [botocore_exceptions.ConnectionError,
+                   botocore_exceptions.HTTPClientError]
+    if aiohttp is not None:
+        errors += [aiohttp.ClientConnectionError, aiohttp.ClientPayloadError]
+    return tuple(errors)
+
+
+def _unsent_errors() -> Tuple[type, ...]:
+    """Errors raised before a request reached the server."""
+    if botocore_exceptions is None:
+        return ()
+    return (botocore_exceptions.EndpointConnectionError,
+            botocore_exceptions.ConnectTimeoutError)
+
+
+class RetryPolicy:
+    """Retry transient backend errors with capped exponential backoff and
+    full jitter.
+
+    Configured per store with the `retry` key of `STORAGE_CONFIG`:
+
+    .. code-block:: python
+
+        {
+            'name': 'minio',
+            'driver': 'MINIO',
+            ...
+            'retry': {'max_attempts': 5, 'base_delay': 0.2},
+        }
+
+    Only idempotent calls (GET, HEAD, whole object PUT with a rewindable
+    body, multipart parts, deletes and listings) are retried after the
+    request may have reached the backend. Other calls are only retried when
+    the connection could not be established.
+
+    :param max_attempts: (optional) Attempts per call, including the first.
+      `1` disables retries.
+    :type max_attempts: int
+
+    :param base_delay: (optional) Delay in seconds before the first retry,
+      doubled for every further retry.
+    :type base_delay: float
+
+    :param max_delay: (optional) Upper bound of a single delay in seconds.
+    :type max_delay: float
+
+    :param jitter: (optional) Sleep a random time between 0 and the delay
+      ("full jitter") instead of the delay itself.
+    :type jitter: bool
+
+    :param retryable_codes: (optional) Backend error codes to retry.
+    :type retryable_codes: Iterable[str]
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.1,
+                 max_delay: float = 5.0, jitter: bool = True,
+                 retryable_codes: Iterable[str] = DEFAULT_RETRYABLE_CODES
+                 ) -> None:
+        self.max_attempts = max(int(max_attempts), 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retryable_codes = frozenset(retryable_codes)
+        #: operation -> number of retries made
+        self.retries = {}  # type: Dict[str, int]
+        #: operation -> number of calls that failed after all attempts
+        self.exhausted = {}  # type: Dict[str, int]
+        self._connection_errors = _connection_errors()
+        self._unsent_errors = _unsent_errors()
+
+    @classmethod
+    def from_config(cls, config: Union[None, Dict, 'RetryPolicy']
+                    ) -> 'RetryPolicy':
+        """Build a policy from a `retry` configuration value.
+
+        :param config: Keyword arguments of :class:`RetryPolicy`, a policy, or
+          `None` for the defaults.
+        :type config: dict or RetryPolicy or None
+
+        :return: Retry policy.
+        :rtype: :class:`RetryPolicy`
+        """
+        if isinstance(config, cls):
+            return config
+        return cls(**(config or {}))
+
+    def is_retryable(self, error: BaseException,
+                     idempotent: bool = True) -> bool:
+        """Tell whether a call that raised `error` may be attempted again.
+
+        :param error: Exception raised by the call.
+        :type error: Exception
+
+        :param idempotent: Whether repeating the call is safe when the backend
+          might have received it.
+        :type idempotent: bool
+
+        :return: True if the call should be retried.
+        :rtype: bool
+        """
+        if isinstance(error, self._unsent_errors):
+            return True
+        if not idempotent:
+            return False
+
+        response = getattr(error, 'response', None)
+        if isinstance(response, dict):
+            code = str(response.get('Error', {}).get('Code', ''))
+            status = response.get('ResponseMetadata', {}).get(
+                'HTTPStatusCode')
+            return code in self.retryable_codes or \
+                status in DEFAULT_RETRYABLE_STATUS
+        return isinstance(error, self._connection_errors)
+
+    def delay(self, retry: int) -> float:
+        """Seconds to sleep before the `retry`-th retry (starting at 1).
+
+        :param retry: Retry number.
+        :type retry: int
+
+        :return: Delay in seconds.
+        :rtype: float
+        """
+        delay = min(self.max_delay, self.base_delay * (2 ** (retry - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    async def call(self, operation: str, func: Callable, *args: Any,
+                   idempotent: bool = True,
+                   before_retry: Optional[Callable[[], None]] = None,
+                   **kwargs: Any) -> Any:
+        """Await `func(*args, **kwargs)`, retrying transient errors.
+
+        :param operation: Name the retries are counted under.
+        :type operation: str
+
+        :param func: Coroutine function to call.
+        :type func: callable
+
+        :param idempotent: (optional) Whether repeating the call is safe.
+        :type idempotent: bool
+
+        :param before_retry: (optional) Called before each retry, e.g. to
+          rewind a request body.
+        :type before_retry: callable or None
+
+        :return: The result of `func`.
+        :rtype: Any
+
+        :raises Exception: The last error once attempts are exhausted or if
+          it is not retryable.
+        """
+        attempt = 1
+        while True:
+            try:
+                return await func(*args, **kwargs)
+            except Exception as err:
+                if not self.is_retryable(err, idempotent):
+                    raise
+                if attempt >= self.max_attempts:
+                    self.exhausted[operation] = \
+                        self.exhausted.get(operation, 0) + 1
+                    raise
+                delay = self.delay(attempt)
+                logger.warning('%s failed (attempt %d/%d), retrying in '
+                               '%.3fs: %s', operation, attempt,
+                               self.max_attempts, delay, err)
+                self.retries[operation] = self.retries.get(operation, 0) + 1
+                attempt += 1
+            await asyncio.sleep(delay)
+            if before_retry is not None:
+                before_retry()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Retry counters per operation.
+
+        :return: `retries` and `exhausted` counts by operation.
+        :rtype: dict
+        """
+        return {'retries': dict(self.retries),
+                'exhausted': dict(self.exhausted)}
+
+    def __repr__(self):
+        return '<RetryPolicy max_attempts=%d base_delay=%s>' % (
+            self.max_attempts, self.base_delay)
@@ -0,0 +1,72 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from aiocloudstorage.bench import OPERATIONS, main, parse_size, percentile
+
+
+def test_parse_size():
+    assert parse_size('1KB') == 1024
+    assert parse_size('64kb') == 64 * 1024
+    assert parse_size('1GB') == 1024 ** 3
+    assert parse_size('100') == 100
+
+
+def test_percentile():
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) is None
+
+
+def test_bench_local(tmp_path):
+    output = tmp_path / 'results.json'
+    main(['--sizes', '1KB,64KB', '--concurrency', '1,4', '--count', '4',
+          '--output', str(output)])
+    report = json.loads(output.read_text())
+    assert report['driver'] == 'local'
+    results = report['results']
+    assert len(results) == 2 * 2 * len(OPERATIONS)
+    for result in results:
+        assert result['ops'] > 0
+        assert result['errors'] == 0
+        assert result['p99_ms'] >= result['p50_ms']
+
+
+def test_bench_reports_failed_bulk_uploads(tmp_path, monkeypatch):
+    from aiocloudstorage import bench
+    bulk_upload = bench.bulk_upload
+
+    async def failing_bulk_upload(filedict, *args, **kwargs):
+        urls = await bulk_upload(filedict, *args, **kwargs)
+        urls[0] = OSError('upload failed')
+        return urls
+    monkeypatch.setattr(bench, 'bulk_upload', failing_bulk_upload)
+    report = main(['--sizes', '1KB', '--concurrency', '2', '--count', '4',
+                   '--operations', 'bulk_upload,bulk_download'])
+    by_operation = {result['operation']: result
+                    for result in report['results']}
+    assert by_operation['bulk_upload']['errors'] == 1
+    assert by_operation['bulk_upload']['ops'] == 3
+    # 4 single uploads and the 3 successful bulk ones
+    assert by_operation['bulk_download']['ops'] == 7
+    assert by_operation['bulk_download']['errors'] == 0
+
+
+def test_bench_minio_stdout_is_json():
+    pytest.importorskip('moto.server')
+    # A fresh interpreter, so import time output is caught too
+    completed = subprocess.run(
+        [sys.executable, '-m', 'aiocloudstorage.bench', '--driver', 'minio',
+         '--sizes', '1KB', '--concurrency', '2', '--count', '2',
+         '--operations', 'upload,download'],
+        stdout=subprocess.PIPE, check=True, timeout=120,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    report = json.loads(completed.stdout)
+    assert report['driver'] == 'minio'
+    assert report['stand_in']
+    assert [result['operation'] for result in report['results']] == \
+        ['upload', 'download']
@@ -0,0 +1,104 @@
+import asyncio
+import io
+
+import pytest
+
+from aiocloudstorage import configure, get_circuit_breaker, shutdown, upload
+from aiocloudstorage.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from aiocloudstorage.exceptions import (BlobExistsError, CircuitOpenError,
+                                        NotFoundError)
+from aiocloudstorage.instrumentation import OperationEvent
+
+
+def finished(duration=0.01, error=None, operation='get_blob'):
+    event = OperationEvent(operation, 'fs')
+    event.duration = duration
+    event.error = error
+    return event
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_on_errors():
+    breaker = CircuitBreaker(error_rate=0.5, min_calls=4, open_timeout=60)
+    events = []
+    breaker.add_listener(events.append)
+    breaker.on_finish(finished())
+    breaker.on_error(finished(error=NotFoundError('missing')))
+    breaker.on_error(finished(error=BlobExistsError('taken')))
+    breaker.on_error(finished(error=ConnectionError()))
+    breaker.on_error(finished(error=ConnectionError()))
+    # Caller errors count as successful calls, 2 of 5 failed
+    assert breaker.state == CLOSED
+    breaker.on_error(finished(error=ConnectionError()))
+    assert breaker.state == OPEN
+    assert [(e.previous, e.state) for e in events] == [(CLOSED, OPEN)]
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call('get_blob')
+    assert breaker.stats()['rejected'] == 1
+    await breaker.close()
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_on_latency():
+    breaker = CircuitBreaker(slow_call_duration=1, slow_call_rate=0.5,
+                             min_calls=2, open_timeout=60)
+    breaker.on_finish(finished(duration=2))
+    breaker.on_finish(finished(duration=3))
+    assert breaker.state == OPEN
+    await breaker.close()
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_long_transfers_not_slow():
+    breaker = CircuitBreaker(slow_call_duration=1, slow_call_rate=0.5,
+                             min_calls=2, open_timeout=60)
+    for operation in ('upload_blob', 'download_blob', 'stream_blob',
+                      'get_blobs'):
+        breaker.on_finish(finished(duration=30, operation=operation))
+    assert breaker.state == CLOSED
+    assert breaker.stats()['calls'] == 4
+    await breaker.close()
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_probe():
+    breaker = CircuitBreaker(min_calls=1, open_timeout=0.01)
+    events = []
+    breaker.add_listener(events.append)
+    results = [ConnectionError('down'), None]
+
+    async def probe():
+        # The probe itself is let through
+        breaker.before_call('get_containers')
+        result = results.pop(0)
+        if result is not None:
+            raise result
+    breaker.probe = probe
+
+    breaker.trip()
+    for _ in range(100):
+        if breaker.state == CLOSED:
+            break
+        await asyncio.sleep(0.01)
+    assert [e.state for e in events] == [OPEN, HALF_OPEN, OPEN, HALF_OPEN,
+                                        CLOSED]
+    assert events[2].reason == 'probe failed: down'
+    breaker.before_call('get_blob')
+
+
+@pytest.mark.asyncio
+async def test_configure_circuit_breaker(store_config):
+    store_config['CIRCUIT_BREAKER'] = {'open_timeout': 60}
+    await configure(store_config)
+    breaker = get_circuit_breaker('fs')
+    assert breaker.store == 'fs'
+    assert breaker.open_timeout == 60
+
+    breaker.trip('maintenance')
+    with pytest.raises(CircuitOpenError):
+        await upload(io.BytesIO(b'rejected'), destfilename='auto.txt')
+    breaker.reset()
+    blob = await upload(io.BytesIO(b'accepted'), destfilename='auto.txt')
+    assert blob.size == 8
+    await shutdown()
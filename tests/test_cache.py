@@ -0,0 +1,38 @@
+import time
+
+from aiocloudstorage.cache import MetadataCache
+
+
+def test_metadata_cache_lru():
+    cache = MetadataCache(max_size=2, ttl=60)
+    cache.set(('store', 'container', 'a'), 1)
+    cache.set(('store', 'container', 'b'), 2)
+    assert cache.get(('store', 'container', 'a')) == 1
+    cache.set(('store', 'container', 'c'), 3)
+    # 'b' was the least recently used entry
+    assert cache.get(('store', 'container', 'b')) is None
+    assert cache.get(('store', 'container', 'a')) == 1
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'evictions': 1,
+                             'size': 2}
+
+
+def test_metadata_cache_ttl(monkeypatch):
+    now = time.monotonic()
+    cache = MetadataCache(ttl=10)
+    monkeypatch.setattr(time, 'monotonic', lambda: now)
+    cache.set('key', 'value')
+    monkeypatch.setattr(time, 'monotonic', lambda: now + 11)
+    assert cache.get('key') is None
+    assert len(cache) == 0
+
+
+def test_metadata_cache_invalidate():
+    cache = MetadataCache()
+    cache.set(('store', 'one', 'a'), 1)
+    cache.set(('store', 'one', 'b'), 2)
+    cache.set(('store', 'two', 'a'), 3)
+    cache.invalidate(('store', 'one', 'a'))
+    assert cache.get(('store', 'one', 'a')) is None
+    cache.invalidate_prefix('store', 'one')
+    assert len(cache) == 1
+    assert cache.get(('store', 'two', 'a')) == 3
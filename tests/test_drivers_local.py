@@ -1,4 +1,5 @@
 import io
+import hashlib
 import asyncio
 import pytest
 from aiocloudstorage import Container
@@ -198,3 +199,274 @@ async def test_blob_download_stream(binary_blob, temp_file):
     download_hash = file_checksum(temp_file, hash_type=hash_type)
     assert download_hash.hexdigest() == BINARY_MD5_CHECKSUM
 
+
+@pytest.mark.asyncio
+async def test_container_get_blobs_prefix(container):
+    names = ['a/%d.txt'%i for i in range(7)] + ['a/b/nested.txt','c.txt']
+    for name in names:
+        await container.upload_blob(io.BytesIO(b'data'),blob_name=name)
+    listed = [blob.name async for blob in container.get_blobs()]
+    assert sorted(listed) == sorted(names)
+    listed = [blob.name async for blob in container.get_blobs(prefix='a/',delimiter='/')]
+    assert sorted(listed) == ['a/%d.txt'%i for i in range(7)]
+    listed = [blob.name async for blob in container.get_blobs(prefix='a/',start_after='a/4.txt')]
+    assert sorted(listed) == ['a/5.txt','a/6.txt','a/b/nested.txt']
+    listed = [blob.name async for blob in container.get_blobs(prefix='nope/')]
+    assert listed == []
+    with pytest.raises(CloudStorageError):
+        [blob async for blob in container.get_blobs(prefix='../')]
+    with pytest.raises(CloudStorageError):
+        [blob async for blob in container.get_blobs(prefix='a/../../other/')]
+
+@pytest.mark.asyncio
+async def test_blob_checksum_cached(storage,container,text_filename):
+    # Small files are written and hashed from the upload pre-flight
+    blob = await container.upload_blob(text_filename,blob_name=TEXT_FILENAME)
+    assert blob._checksum == TEXT_MD5_CHECKSUM
+
+    cached = await container.get_blob(TEXT_FILENAME)
+    assert cached._checksum == TEXT_MD5_CHECKSUM
+
+    with open(storage._get_file_path(cached),'ab') as blob_file:
+        blob_file.write(b'changed')
+    changed = await container.get_blob(TEXT_FILENAME)
+    assert changed._checksum is None
+    assert changed.checksum != TEXT_MD5_CHECKSUM
+
+class AsyncStream:
+    def __init__(self, data):
+        self._stream = io.BytesIO(data)
+
+    async def read(self, size=-1):
+        await asyncio.sleep(0)
+        return self._stream.read(size)
+
+@pytest.mark.asyncio
+async def test_container_upload_async_stream(container):
+    blob = await container.driver.upload_blob(container,AsyncStream(b'\x01'*4096),blob_name=BINARY_STREAM_FILENAME)
+    assert blob.size == 4096
+    assert os.listdir(os.path.dirname(container.driver._get_file_path(blob))) == [BINARY_STREAM_FILENAME]
+
+@pytest.mark.asyncio
+async def test_driver_io_off_loop(container,text_filename,monkeypatch):
+    import builtins, threading
+    from aiocloudstorage.drivers import local
+    base_path = container.driver.base_path
+    on_loop = []
+    def on_loop_thread(func):
+        def wrapper(path,*args,**kwargs):
+            if threading.current_thread() is threading.main_thread() and \
+                    (str(path).startswith(base_path) or path == text_filename):
+                on_loop.append((func.__name__,path))
+            return func(path,*args,**kwargs)
+        return wrapper
+    monkeypatch.setattr(builtins,'open',on_loop_thread(builtins.open))
+    monkeypatch.setattr(os,'open',on_loop_thread(os.open))
+    monkeypatch.setattr(local,'file_checksum',on_loop_thread(local.file_checksum))
+
+    await container.upload_blob(text_filename,blob_name=TEXT_FILENAME)
+    await container.upload_blob(io.BytesIO(b'\x01'*1024*1024),blob_name=BINARY_STREAM_FILENAME)
+    blob = await container.get_blob(BINARY_STREAM_FILENAME)
+    blob.checksum = None
+    assert await blob.get_checksum() == hashlib.md5(b'\x01'*1024*1024).hexdigest()
+    await blob.download(io.BytesIO())
+    assert on_loop == []
+
+    # The check fails when the I/O does block the loop
+    blob.checksum = None
+    blob.checksum
+    assert 'file_checksum' in [name for name,_ in on_loop]
+    await container.driver.close()
+    assert container.driver._executor is None
+
+@pytest.mark.asyncio
+async def test_container_get_blob_metadata_cache(text_filename):
+    storage = LocalDriver(LOCAL_ENDPOINT, LOCAL_SECRET, metadata_cache_size=10)
+    container = await storage.create_container(random_container_name())
+    cache = storage.metadata_cache
+    blob = await container.upload_blob(text_filename,blob_name=TEXT_FILENAME)
+    cached = await container.get_blob(TEXT_FILENAME)
+    assert cache.hits == 1
+    assert cached is not blob
+    assert (cached.etag,cached.size,cached.checksum) == (blob.etag,blob.size,blob.checksum)
+
+    # Changing a returned blob does not change the cached one
+    cached.meta_data['owner'] = 'me'
+    cached.size = 0
+    again = await container.get_blob(TEXT_FILENAME)
+    assert again.size == blob.size and 'owner' not in again.meta_data
+
+    await blob.delete()
+    with pytest.raises(NotFoundError):
+        await container.get_blob(TEXT_FILENAME)
+    assert cache.misses == 1
+    await container.delete()
+    await storage.close()
+
+@pytest.mark.asyncio
+async def test_container_delete_blobs(container):
+    names = ['%d.txt'%i for i in range(5)] + ['nested/a.txt']
+    for name in names:
+        await container.upload_blob(io.BytesIO(b'data'),blob_name=name)
+    results = await container.delete_blobs(names+['missing.txt'])
+    assert results == {name:None for name in names+['missing.txt']}
+    assert [blob async for blob in container.get_blobs()] == []
+
+@pytest.mark.asyncio
+async def test_blob_stream(container):
+    data = os.urandom(100 * 1024 + 3)
+    blob = await container.upload_blob(io.BytesIO(data),blob_name=BINARY_STREAM_FILENAME)
+    chunks = [chunk async for chunk in blob.stream(chunk_size=32 * 1024)]
+    assert b''.join(chunks) == data
+    assert max(len(chunk) for chunk in chunks) <= 32 * 1024
+
+    stream = blob.stream(chunk_size=1024)
+    assert await stream.__anext__() == data[:1024]
+    await stream.aclose()
+
+    await blob.delete()
+    with pytest.raises(NotFoundError):
+        async for chunk in blob.stream():
+            pass
+
+@pytest.mark.asyncio
+async def test_blob_read_range(container):
+    data = os.urandom(10000)
+    blob = await container.upload_blob(io.BytesIO(data),blob_name=BINARY_STREAM_FILENAME)
+    assert await blob.read_range(100, 50) == data[100:150]
+    assert await blob.read_range(9990) == data[9990:]
+    assert await blob.read_range(9990, 100) == data[9990:]
+    assert await blob.read_range(20000, 10) == b''
+    assert await blob.read_ranges([(5000, 10), (0, 4), (9000, 1000)],max_gap=10) == \
+        [data[5000:5010], data[:4], data[9000:]]
+
+    destination = io.BytesIO()
+    await blob.download(destination, byte_range=(10, 20))
+    assert destination.getvalue() == data[10:30]
+
+@pytest.mark.asyncio
+async def test_blob_download_range_chunked(container,monkeypatch):
+    from aiocloudstorage import base
+    data = os.urandom(10000)
+    blob = await container.upload_blob(io.BytesIO(data),blob_name=BINARY_STREAM_FILENAME)
+    monkeypatch.setattr(base,'RANGE_DOWNLOAD_CHUNK_SIZE',1024)
+    reads = []
+    read_range = container.driver.read_range
+    async def recording_read_range(blob,offset,length=None):
+        reads.append(length)
+        return await read_range(blob,offset,length)
+    monkeypatch.setattr(container.driver,'read_range',recording_read_range)
+
+    destination = io.BytesIO()
+    await blob.download(destination, byte_range=(100, 3000))
+    assert destination.getvalue() == data[100:3100]
+    assert reads == [1024,1024,952]
+
+    reads.clear()
+    destination = io.BytesIO()
+    await blob.download(destination, byte_range=(5000, None))
+    assert destination.getvalue() == data[5000:]
+    assert max(reads) == 1024
+
+@pytest.mark.asyncio
+async def test_blob_mmap(container):
+    data = os.urandom(10000)
+    blob = await container.upload_blob(io.BytesIO(data),blob_name=BINARY_STREAM_FILENAME)
+    async with blob.mmap() as view:
+        assert view.readonly
+        assert len(view) == len(data)
+        assert view[5000:5010] == data[5000:5010]
+    with pytest.raises(ValueError):
+        view[0]
+
+@pytest.mark.asyncio
+async def test_blob_mmap_slice_outlives_block(container):
+    data = os.urandom(10000)
+    blob = await container.upload_blob(io.BytesIO(data),blob_name=BINARY_STREAM_FILENAME)
+    async with blob.mmap() as view:
+        header = view[0:16]
+    assert header == data[0:16]
+    header.release()
+
+@pytest.mark.asyncio
+async def test_container_upload_random_name_collision(container,monkeypatch):
+    from aiocloudstorage import base
+    from aiocloudstorage.exceptions import BlobExistsError
+    taken = await container.upload_blob(io.BytesIO(b'taken'),blob_name='taken.txt')
+    names = iter(['taken.txt','taken.txt','free.txt'])
+    monkeypatch.setattr(base,'random_filename',lambda filename=None: next(names,'unused'))
+
+    blob = await container.upload_blob(io.BytesIO(b'fresh'),blob_name='random')
+    assert blob.name == 'free.txt'
+    assert blob.size == 5
+    assert (await container.get_blob('taken.txt')).size == 5
+    with pytest.raises(BlobExistsError):
+        await container.upload_blob(io.BytesIO(b'again'),blob_name='taken.txt',
+                                    extra={'if_none_match':'*'})
+    with pytest.raises(BlobExistsError):
+        await container.upload_blob(AsyncStream(b'again'),blob_name='taken.txt',
+                                    extra={'if_none_match':'*'})
+    # Conflicts leave no lock files behind
+    listed = [blob.name async for blob in container.get_blobs()]
+    assert sorted(listed) == ['free.txt','taken.txt']
+
+@pytest.mark.asyncio
+async def test_container_upload_blob_matches_get_blob(container):
+    blob = await container.upload_blob(io.BytesIO(b'written once'),blob_name='once.txt',
+                                       meta_data={'owner':'me'},cache_control='no-cache')
+    stored = await container.get_blob('once.txt')
+    for attr in ('size','etag','checksum','content_type','cache_control','modified_at'):
+        assert getattr(blob,attr) == getattr(stored,attr)
+    assert blob.meta_data == stored.meta_data
+
+@pytest.mark.asyncio
+async def test_container_upload_stream_saves_checksum(storage,container,monkeypatch):
+    import hashlib
+    from aiocloudstorage.drivers import local
+    data = os.urandom(3 * 1024 * 1024 + 5)
+    blob = await container.upload_blob(io.BytesIO(data),blob_name='hashed.bin')
+    assert blob.checksum == hashlib.md5(data).hexdigest()
+    stored = await container.get_blob('hashed.bin')
+    assert (blob.created_at,blob.modified_at) == (stored.created_at,stored.modified_at)
+
+    # Hashed while written, so the file is not read again
+    monkeypatch.setattr(local,'file_checksum',None)
+    stored = await container.get_blob('hashed.bin')
+    assert stored.checksum == blob.checksum
+
+@pytest.mark.asyncio
+async def test_container_upload_small_file_single_read(container,text_filename,monkeypatch):
+    import builtins
+    opened = []
+    real_open = builtins.open
+    def tracking_open(file,*args,**kwargs):
+        opened.append(file)
+        return real_open(file,*args,**kwargs)
+    monkeypatch.setattr(builtins,'open',tracking_open)
+    blob = await container.upload_blob(text_filename,blob_name=TEXT_FILENAME)
+    # Written from the pre-flight head, the source is opened only once
+    assert opened.count(text_filename) == 1
+    assert blob.content_type == 'text/plain'
+    assert blob.size == os.path.getsize(text_filename)
+
+@pytest.mark.asyncio
+async def test_container_upload_sniffs_content_type_once(container,text_filename,monkeypatch):
+    import threading
+    from aiocloudstorage import helpers
+    threads = []
+    from_buffer = helpers.magic.from_buffer
+    def recording_from_buffer(*args,**kwargs):
+        threads.append(threading.current_thread())
+        return from_buffer(*args,**kwargs)
+    monkeypatch.setattr(helpers.magic,'from_buffer',recording_from_buffer)
+
+    blob = await container.upload_blob(text_filename,blob_name=TEXT_FILENAME)
+    assert blob.content_type == 'text/plain'
+    # Paths are sniffed by the pre-flight, off the event loop too
+    assert len(threads) == 1 and threads[0] is not threading.main_thread()
+
+    # Streams are sniffed from their head, off the event loop
+    threads.clear()
+    blob = await container.upload_blob(io.BytesIO(b'plain text'),blob_name='sniffed')
+    assert blob.content_type == 'text/plain'
+    assert len(threads) == 1 and threads[0] is not threading.main_thread()
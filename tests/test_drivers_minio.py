@@ -1,10 +1,11 @@
 import io
 import asyncio
+import tempfile
 import pytest
 import aiobotocore
 from aiocloudstorage import Container,configure
 from aiocloudstorage.drivers.minio import MinioDriver
-from aiocloudstorage.exceptions import CloudStorageError,NotFoundError,FileEmptyError
+from aiocloudstorage.exceptions import BlobChangedError,CloudStorageError,NotFoundError,FileEmptyError
 from aiocloudstorage.helpers import file_checksum
 from tests.helpers import random_container_name, uri_validator
 from tests.settings import *
@@ -192,3 +193,410 @@ async def test_blob_download_stream(binary_blob, temp_file):
     hash_type = binary_blob.driver.hash_type
     download_hash = file_checksum(temp_file, hash_type=hash_type)
     assert download_hash.hexdigest() == BINARY_MD5_CHECKSUM
+
+@pytest.mark.asyncio
+async def test_driver_shared_client():
+    async with MinioDriver(MINIO_ENDPOINT,MINIO_ACCESS_KEY,MINIO_SECRET_KEY,
+                           max_pool_connections=20) as storage:
+        client = await storage._get_client()
+        assert client is await storage._get_client()
+        assert client.meta.config.max_pool_connections == 20
+    assert storage._clients == {}
+
+@pytest.fixture()
+async def multipart_storage():
+    storage = MinioDriver(
+               MINIO_ENDPOINT,
+               MINIO_ACCESS_KEY,
+               MINIO_SECRET_KEY,
+               multipart_threshold=5*1024*1024,
+               multipart_chunksize=5*1024*1024,
+               max_concurrency=2
+            )
+    yield storage
+    await storage.close()
+
+@pytest.mark.asyncio
+async def test_container_upload_multipart(multipart_storage,temp_file):
+    container = await multipart_storage.create_container(random_container_name())
+    data = os.urandom(1024*1024*12)
+    blob = await container.upload_blob(io.BytesIO(data),blob_name=BINARY_STREAM_FILENAME)
+    assert blob.size == len(data)
+    assert blob.etag.endswith('-3')
+    await blob.download(temp_file)
+    with open(temp_file,'rb') as f:
+        assert f.read() == data
+    await blob.delete()
+    await container.delete()
+
+class FailingStream(io.BytesIO):
+    def read(self, size=-1):
+        if self.tell() > 0:
+            raise IOError('Disk went away')
+        return super().read(size)
+
+@pytest.mark.asyncio
+async def test_container_upload_multipart_aborted(multipart_storage):
+    container = await multipart_storage.create_container(random_container_name())
+    with pytest.raises(IOError):
+        await container.upload_blob(FailingStream(b'\x01'*1024*1024*12),blob_name=BINARY_STREAM_FILENAME)
+    s3 = await multipart_storage._get_client()
+    uploads = await s3.list_multipart_uploads(Bucket=container.name)
+    assert not uploads.get('Uploads')
+    await container.delete()
+
+@pytest.mark.asyncio
+async def test_blob_download_ranges(multipart_storage,temp_file):
+    multipart_storage.download_part_size = 1024*1024
+    container = await multipart_storage.create_container(random_container_name())
+    data = os.urandom(1024*1024*6+17)
+    blob = await container.upload_blob(io.BytesIO(data),blob_name=BINARY_STREAM_FILENAME)
+    with open(temp_file,'wb') as download_file:
+        download_file.write(b'head')
+        await blob.download(download_file)
+        assert download_file.tell() == len(data)+4
+    with open(temp_file,'rb') as f:
+        assert f.read() == b'head'+data
+    # Appending descriptors ignore pwrite offsets, they are streamed to
+    with open(temp_file,'wb') as download_file:
+        download_file.write(b'head')
+    with open(temp_file,'ab') as download_file:
+        await blob.download(download_file)
+    with open(temp_file,'rb') as f:
+        assert f.read() == b'head'+data
+    stream = io.BytesIO()
+    await blob.download(stream)
+    assert stream.getvalue() == data
+    await blob.delete()
+    await container.delete()
+
+@pytest.mark.asyncio
+async def test_blob_download_ranges_replaced(temp_file):
+    storage = MinioDriver(MINIO_ENDPOINT, MINIO_ACCESS_KEY, MINIO_SECRET_KEY,
+                          multipart_threshold=5*1024*1024,
+                          metadata_cache_size=10)
+    other = MinioDriver(MINIO_ENDPOINT, MINIO_ACCESS_KEY, MINIO_SECRET_KEY)
+    container = await storage.create_container(random_container_name())
+    await container.upload_blob(io.BytesIO(os.urandom(1024*1024*6)),
+                                blob_name=BINARY_STREAM_FILENAME)
+    blob = await container.get_blob(BINARY_STREAM_FILENAME)
+    # Another client replaces the blob while its metadata is cached
+    data = os.urandom(1024*1024*7)
+    other_container = await other.get_container(container.name)
+    await other_container.upload_blob(io.BytesIO(data),
+                                      blob_name=BINARY_STREAM_FILENAME)
+    await blob.download(temp_file)
+    with open(temp_file,'rb') as f:
+        assert f.read() == data
+    assert blob.size == len(data)
+    cached = await container.get_blob(BINARY_STREAM_FILENAME)
+    assert cached.etag == blob.etag
+
+    blob.etag = 'stale'
+    with pytest.raises(BlobChangedError):
+        await storage.download_blob(blob, temp_file)
+    await blob.delete()
+    await container.delete()
+    await storage.close()
+    await other.close()
+
+@pytest.mark.asyncio
+async def test_container_get_blobs_paginated(storage,container):
+    storage.list_page_size = 3
+    names = ['a/%d.txt'%i for i in range(7)] + ['a/b/nested.txt','c.txt']
+    for name in names:
+        await container.upload_blob(io.BytesIO(b'data'),blob_name=name)
+    listed = [blob.name async for blob in container.get_blobs()]
+    assert sorted(listed) == sorted(names)
+    listed = [blob.name async for blob in container.get_blobs(prefix='a/',delimiter='/')]
+    assert sorted(listed) == ['a/%d.txt'%i for i in range(7)]
+    listed = [blob.name async for blob in container.get_blobs(prefix='a/',start_after='a/4.txt')]
+    assert listed == ['a/5.txt','a/6.txt','a/b/nested.txt']
+
+@pytest.mark.asyncio
+async def test_container_delete_blobs(storage,container,monkeypatch):
+    monkeypatch.setattr('aiocloudstorage.drivers.minio.DELETE_BATCH_SIZE',2)
+    names = ['%d.txt'%i for i in range(5)]
+    for name in names:
+        await container.upload_blob(io.BytesIO(b'data'),blob_name=name)
+    blob = await container.get_blob(names[0])
+    results = await container.delete_blobs([blob]+names[1:]+['missing.txt'])
+    assert results == {name:None for name in names+['missing.txt']}
+    assert [blob async for blob in container.get_blobs()] == []
+
+@pytest.mark.asyncio
+async def test_blob_stream(container):
+    data = os.urandom(100 * 1024 + 3)
+    blob = await container.upload_blob(io.BytesIO(data),blob_name=BINARY_STREAM_FILENAME)
+    chunks = [chunk async for chunk in blob.stream(chunk_size=32 * 1024)]
+    assert b''.join(chunks) == data
+    assert max(len(chunk) for chunk in chunks) <= 32 * 1024
+
+    stream = blob.stream(chunk_size=1024)
+    assert await stream.__anext__() == data[:1024]
+    await stream.aclose()
+
+    await blob.delete()
+    with pytest.raises(NotFoundError):
+        async for chunk in blob.stream():
+            pass
+
+@pytest.mark.asyncio
+async def test_blob_read_range(container):
+    data = os.urandom(10000)
+    blob = await container.upload_blob(io.BytesIO(data),blob_name=BINARY_STREAM_FILENAME)
+    assert await blob.read_range(100, 50) == data[100:150]
+    assert await blob.read_range(9990) == data[9990:]
+    assert await blob.read_range(9990, 100) == data[9990:]
+    assert await blob.read_range(20000, 10) == b''
+    assert await blob.read_ranges([(5000, 10), (0, 4), (9000, 1000)],max_gap=10) == \
+        [data[5000:5010], data[:4], data[9000:]]
+
+    destination = io.BytesIO()
+    await blob.download(destination, byte_range=(10, 20))
+    assert destination.getvalue() == data[10:30]
+
+@pytest.mark.asyncio
+async def test_blob_mmap(container):
+    data = os.urandom(10000)
+    blob = await container.upload_blob(io.BytesIO(data),blob_name=BINARY_STREAM_FILENAME)
+    async with blob.mmap() as view:
+        assert view.readonly
+        assert len(view) == len(data)
+        assert view[5000:5010] == data[5000:5010]
+    with pytest.raises(ValueError):
+        view[0]
+
+@pytest.mark.asyncio
+async def test_driver_retries_transient_errors(storage,container,monkeypatch):
+    from botocore.exceptions import ClientError
+    storage.retry_policy.base_delay = 0
+    s3 = await storage._get_client()
+    put_object = s3.put_object
+    failures = []
+
+    async def flaky_put_object(**params):
+        if not failures:
+            failures.append(params['Key'])
+            raise ClientError({'Error': {'Code': 'SlowDown', 'Message': 'SlowDown'},
+                               'ResponseMetadata': {'HTTPStatusCode': 503}},
+                              'PutObject')
+        return await put_object(**params)
+    monkeypatch.setattr(s3,'put_object',flaky_put_object)
+
+    blob = await container.upload_blob(io.BytesIO(b'retried'),blob_name='retry.txt')
+    assert failures == ['retry.txt']
+    assert blob.size == 7
+    assert storage.retry_policy.retries['put_object'] == 1
+
+@pytest.mark.asyncio
+async def test_driver_hedges_slow_reads(storage,container,monkeypatch):
+    from aiocloudstorage.hedge import HedgePolicy
+    data = b'hedged'
+    blob = await container.upload_blob(io.BytesIO(data),blob_name='hedge.txt')
+    policy = storage.hedge_policy = HedgePolicy(min_samples=1, budget=1)
+    policy.record('head_object', 0.01)
+    policy.requests = 10
+    s3 = await storage._get_client()
+    head_object = s3.head_object
+    calls = []
+
+    async def slow_head_object(**params):
+        calls.append(params['Key'])
+        if len(calls) == 1:
+            await asyncio.sleep(5)
+        return await head_object(**params)
+    monkeypatch.setattr(s3,'head_object',slow_head_object)
+
+    hedged = await container.get_blob('hedge.txt')
+    assert hedged.size == len(data)
+    assert calls == ['hedge.txt', 'hedge.txt']
+    assert policy.hedge_wins == 1
+
+@pytest.mark.asyncio
+async def test_container_upload_random_name_collision(container,monkeypatch):
+    from aiocloudstorage import base
+    from aiocloudstorage.exceptions import BlobExistsError
+    taken = await container.upload_blob(io.BytesIO(b'taken'),blob_name='taken.txt')
+    names = iter(['taken.txt','taken.txt','free.txt'])
+    monkeypatch.setattr(base,'random_filename',lambda filename=None: next(names,'unused'))
+
+    blob = await container.upload_blob(io.BytesIO(b'fresh'),blob_name='random')
+    assert blob.name == 'free.txt'
+    assert blob.size == 5
+    assert (await container.get_blob('taken.txt')).size == 5
+    with pytest.raises(BlobExistsError):
+        await container.upload_blob(io.BytesIO(b'again'),blob_name='taken.txt',
+                                    extra={'if_none_match':'*'})
+
+@pytest.mark.asyncio
+async def test_container_upload_random_name_lost_response(storage,container,monkeypatch):
+    s3 = await storage._get_client()
+    put_object = s3.put_object
+    calls = []
+
+    async def lost_response_put_object(**params):
+        calls.append(params['Key'])
+        response = await put_object(**params)
+        if len(calls) == 1:
+            # Stored, but the response never arrived
+            raise ConnectionResetError()
+        return response
+    monkeypatch.setattr(s3,'put_object',lost_response_put_object)
+    blob = await container.upload_blob(io.BytesIO(b'fresh'),blob_name='random')
+    # The retry was refused by the first attempt's object, which is kept
+    assert calls == [blob.name,blob.name]
+    assert blob.size == 5
+    assert [b.name async for b in container.get_blobs()] == [blob.name]
+
+class UntellableStream(io.BytesIO):
+    """Hides its position from the driver, the first to ask for it."""
+    asked = False
+    def tell(self):
+        if not self.asked:
+            self.asked = True
+            raise OSError('position unknown')
+        return super().tell()
+
+@pytest.mark.asyncio
+async def test_put_object_unknown_position_retry(storage,container,monkeypatch):
+    from botocore.exceptions import EndpointConnectionError
+    s3 = await storage._get_client()
+    put_object = s3.put_object
+    calls = []
+
+    async def unreachable_once_put_object(**params):
+        calls.append(params['Key'])
+        if len(calls) == 1:
+            raise EndpointConnectionError(endpoint_url=MINIO_ENDPOINT)
+        return await put_object(**params)
+    monkeypatch.setattr(s3,'put_object',unreachable_once_put_object)
+    # Not sent yet, so retried without rewinding the stream
+    await storage._put_object(container.name,'untellable.txt',
+                              UntellableStream(b'data'),{})
+    assert calls == ['untellable.txt','untellable.txt']
+    assert (await container.get_blob('untellable.txt')).size == 4
+
+@pytest.mark.asyncio
+async def test_container_upload_blob_single_request(storage,container,monkeypatch):
+    calls = []
+    monkeypatch.setattr(storage,'_object_summary',lambda *args: calls.append(args))
+
+    blob = await container.upload_blob(io.BytesIO(b'one request'),blob_name='one.txt',
+                                       meta_data={'Owner':'me'},content_type='text/plain',
+                                       cache_control='no-cache')
+    assert calls == []
+    monkeypatch.undo()
+    stored = await container.get_blob('one.txt')
+    assert (blob.size, blob.etag, blob.content_type, blob.cache_control) == \
+        (stored.size, stored.etag, stored.content_type, stored.cache_control)
+    assert blob.meta_data == stored.meta_data
+
+@pytest.mark.asyncio
+async def test_container_upload_sends_content_md5(storage,container,monkeypatch):
+    import base64, hashlib
+    from aiocloudstorage.exceptions import CloudStorageError
+    s3 = await storage._get_client()
+    put_object = s3.put_object
+    sent = []
+
+    async def recording_put_object(**params):
+        sent.append(params.get('ContentMD5'))
+        return await put_object(**params)
+    monkeypatch.setattr(s3,'put_object',recording_put_object)
+    data = b'integrity'
+    blob = await container.upload_blob(io.BytesIO(data),blob_name='md5.txt')
+    assert sent == [base64.b64encode(hashlib.md5(data).digest()).decode()]
+    assert blob.checksum == hashlib.md5(data).hexdigest()
+
+    async def corrupting_put_object(**params):
+        response = await put_object(**params)
+        response['ETag'] = '"%s"' % hashlib.md5(b'corrupted').hexdigest()
+        return response
+    monkeypatch.setattr(s3,'put_object',corrupting_put_object)
+    with pytest.raises(CloudStorageError):
+        await container.upload_blob(io.BytesIO(data),blob_name='md5.txt')
+
+@pytest.mark.asyncio
+async def test_container_upload_encrypted_etag_not_verified(storage,container,monkeypatch):
+    import hashlib
+    s3 = await storage._get_client()
+    put_object = s3.put_object
+
+    # Default bucket encryption with KMS, the ETag is not the MD5
+    async def kms_put_object(**params):
+        response = await put_object(**params)
+        response['ETag'] = '"%s"' % hashlib.md5(b'opaque').hexdigest()
+        response['ServerSideEncryption'] = 'aws:kms'
+        return response
+    monkeypatch.setattr(s3,'put_object',kms_put_object)
+    blob = await container.upload_blob(io.BytesIO(b'encrypted'),blob_name='kms.txt')
+    assert blob.size == 9
+
+@pytest.mark.asyncio
+async def test_container_upload_multipart_md5_etag(multipart_storage,monkeypatch):
+    import hashlib
+    from aiocloudstorage.exceptions import CloudStorageError
+    container = await multipart_storage.create_container(random_container_name())
+    data = os.urandom(1024*1024*11)
+    blob = await container.upload_blob(io.BytesIO(data),blob_name=BINARY_STREAM_FILENAME)
+    part_digests = b''.join(hashlib.md5(data[start:start+5*1024*1024]).digest()
+                            for start in range(0,len(data),5*1024*1024))
+    assert blob.etag == hashlib.md5(part_digests).hexdigest() + '-3'
+
+    s3 = await multipart_storage._get_client()
+    complete = s3.complete_multipart_upload
+    async def corrupting_complete(**params):
+        response = await complete(**params)
+        response['ETag'] = '"%s-3"' % hashlib.md5(b'corrupted').hexdigest()
+        return response
+    monkeypatch.setattr(s3,'complete_multipart_upload',corrupting_complete)
+    with pytest.raises(CloudStorageError,match='does not match'):
+        await container.upload_blob(io.BytesIO(data),blob_name=BINARY_STREAM_FILENAME)
+    await blob.delete()
+    await container.delete()
+
+@pytest.mark.asyncio
+async def test_container_upload_sha256_mismatch(storage,container,monkeypatch):
+    import base64, hashlib
+    from aiocloudstorage.exceptions import CloudStorageError
+    storage.upload_checksum = 'sha256'
+    s3 = await storage._get_client()
+    put_object = s3.put_object
+    sent = []
+
+    async def corrupting_put_object(**params):
+        sent.append(params.get('ChecksumSHA256'))
+        response = await put_object(**params)
+        response['ChecksumSHA256'] = base64.b64encode(
+            hashlib.sha256(b'corrupted').digest()).decode()
+        return response
+    monkeypatch.setattr(s3,'put_object',corrupting_put_object)
+    data = b'integrity'
+    with pytest.raises(CloudStorageError,match='does not match'):
+        await container.upload_blob(io.BytesIO(data),blob_name='sha256.txt')
+    assert sent[0] == base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+@pytest.mark.asyncio
+async def test_container_upload_multipart_sha256(multipart_storage,temp_file):
+    multipart_storage.upload_checksum = 'sha256'
+    container = await multipart_storage.create_container(random_container_name())
+    data = os.urandom(1024*1024*11)
+    blob = await container.upload_blob(io.BytesIO(data),blob_name=BINARY_STREAM_FILENAME)
+    assert blob.size == len(data)
+    small = await container.upload_blob(io.BytesIO(b'small'),blob_name='small.txt')
+    assert small.size == 5
+    await blob.download(temp_file)
+    with open(temp_file,'rb') as f:
+        assert f.read() == data
+    await blob.delete()
+    await small.delete()
+    await container.delete()
+
+def test_stream_size_spooled_file_stays_in_memory():
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024*1024)
+    spooled.write(b'\x01'*100*1024)
+    spooled.seek(1024)
+    assert MinioDriver._stream_size(spooled) == 99*1024
+    assert not spooled._rolled
+    assert spooled.tell() == 1024
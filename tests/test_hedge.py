@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from aiocloudstorage.hedge import HedgePolicy
+
+
+def warmed_policy(latency=0.01, **kwargs):
+    kwargs.setdefault('min_samples', 10)
+    kwargs.setdefault('budget', 1)
+    policy = HedgePolicy(**kwargs)
+    for _ in range(kwargs['min_samples']):
+        policy.record('get_object', latency)
+    policy.requests = 100
+    return policy
+
+
+class Replies:
+    """Answer the n-th call after `delays[n]` seconds."""
+
+    def __init__(self, *delays):
+        self.delays = list(delays)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self, value):
+        delay = self.delays[self.calls]
+        self.calls += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return value
+
+
+def test_hedge_policy_delay():
+    policy = HedgePolicy(percentile=0.5, min_samples=4, budget=0.5)
+    assert policy.hedge_delay('head_object') is None
+    for latency in (0.01, 0.02, 0.03, 0.04):
+        policy.record('head_object', latency)
+    # No budget without requests
+    assert policy.hedge_delay('head_object') is None
+    policy.requests = 10
+    assert policy.hedge_delay('head_object') == 0.02
+    policy.hedged = 5
+    assert policy.hedge_delay('head_object') is None
+    assert HedgePolicy.from_config(None) is None
+    assert HedgePolicy.from_config(True).budget == 0.05
+    assert HedgePolicy.from_config({'percentile': 0.9}).percentile == 0.9
+
+
+@pytest.mark.asyncio
+async def test_hedge_policy_fast_request_not_hedged():
+    policy = warmed_policy(latency=0.5)
+    func = Replies(0)
+    assert await policy.call('get_object', func, 'ok') == 'ok'
+    assert func.calls == 1
+    assert policy.hedged == 0
+
+
+@pytest.mark.asyncio
+async def test_hedge_policy_hedge_wins():
+    policy = warmed_policy()
+    func = Replies(5, 0)
+    assert await policy.call('get_object', func, 'ok') == 'ok'
+    await asyncio.sleep(0)
+    assert func.calls == 2
+    assert func.cancelled == 1
+    assert policy.stats() == {'requests': 101, 'hedged': 1, 'hedge_wins': 1}
+
+
+@pytest.mark.asyncio
+async def test_hedge_policy_hedge_error_falls_back():
+    policy = warmed_policy()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        if len(calls) == 2:
+            raise ConnectionResetError()
+        await asyncio.sleep(0.05)
+        return 'first'
+
+    assert await policy.call('get_object', func) == 'first'
+    assert policy.hedged == 1
+    assert policy.hedge_wins == 0
+
+
+@pytest.mark.asyncio
+async def test_hedge_policy_original_wins():
+    policy = warmed_policy()
+    func = Replies(0.03, 5)
+    assert await policy.call('get_object', func, 'ok') == 'ok'
+    await asyncio.sleep(0)
+    assert func.cancelled == 1
+    assert policy.stats() == {'requests': 101, 'hedged': 1, 'hedge_wins': 0}
+
+
+@pytest.mark.asyncio
+async def test_hedge_policy_cancelled_copy_falls_back():
+    policy = warmed_policy()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(0.05)
+            # e.g. the request's connection was torn down
+            raise asyncio.CancelledError()
+        await asyncio.sleep(0.1)
+        return 'second'
+
+    assert await policy.call('get_object', func) == 'second'
+    assert policy.hedge_wins == 1
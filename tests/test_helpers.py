@@ -1,5 +1,7 @@
 import pytest
 import io
+import os
+import tempfile
 
 from aiocloudstorage.helpers import (
     file_checksum,
@@ -13,6 +15,11 @@ from aiocloudstorage.helpers import (
     is_file_url,
     parse_file_url,
     check_file_not_empty,
+    calculate_part_size,
+    coalesce_ranges,
+    copy_fd,
+    copy_stream,
+    upload_preflight,
 )
 from aiocloudstorage.exceptions import InvalidBucketError,InvalidFileURLError,FileEmptyError
 from tests.settings import *
@@ -142,3 +149,116 @@ def test_check_file_not_empty():
     with pytest.raises(FileEmptyError) as err:
         check_file_not_empty(UploadFile('random'))
 
+
+def test_calculate_part_size():
+    mib = 1024*1024
+    assert calculate_part_size(100*mib,8*mib) == 8*mib
+    assert calculate_part_size(10000*8*mib,8*mib) == 8*mib
+    part_size = calculate_part_size(100*1024*mib,8*mib)
+    assert part_size % mib == 0
+    assert part_size*10000 >= 100*1024*mib
+
+
+def test_copy_stream_file_objects(tmp_path):
+    data = os.urandom(3 * 1024 * 1024 + 7)
+    source_path = str(tmp_path / 'source')
+    with open(source_path, 'wb') as source:
+        source.write(data)
+
+    with open(source_path, 'rb') as source, \
+            open(str(tmp_path / 'dest'), 'w+b') as dest:
+        source.read(10)
+        dest.write(b'head')
+        assert copy_stream(source, dest) == len(data) - 10
+        assert source.tell() == len(data)
+        assert dest.tell() == len(data) - 6
+        dest.seek(0)
+        assert dest.read() == b'head' + data[10:]
+
+
+def test_copy_stream_in_memory():
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024)
+    spooled.write(b'spooled data')
+    spooled.seek(0)
+    dest = io.BytesIO()
+    assert copy_stream(spooled, dest) == 12
+    assert dest.getvalue() == b'spooled data'
+    # Copying must not roll the upload over to disk
+    assert not spooled._rolled
+
+
+def test_copy_stream_hasher(tmp_path):
+    import hashlib
+    data = os.urandom(100000)
+    source_path = str(tmp_path / 'source')
+    with open(source_path, 'wb') as source:
+        source.write(data)
+    for source in (io.BytesIO(data), open(source_path, 'rb')):
+        hasher = hashlib.md5()
+        dest = io.BytesIO()
+        with source:
+            assert copy_stream(source, dest, block_size=4096,
+                               hasher=hasher) == len(data)
+        assert hasher.hexdigest() == hashlib.md5(data).hexdigest()
+        assert dest.getvalue() == data
+
+
+def test_copy_fd_fallback(tmp_path, monkeypatch):
+    monkeypatch.delattr(os, 'copy_file_range', raising=False)
+    monkeypatch.delattr(os, 'sendfile', raising=False)
+    source_path = str(tmp_path / 'source')
+    with open(source_path, 'wb') as source:
+        source.write(b'x' * 100)
+    with open(source_path, 'rb') as source, \
+            open(str(tmp_path / 'dest'), 'wb') as dest:
+        os.lseek(source.fileno(), 40, os.SEEK_SET)
+        assert copy_fd(source.fileno(), dest.fileno(), 100) == 60
+    assert os.path.getsize(str(tmp_path / 'dest')) == 60
+
+
+def test_coalesce_ranges():
+    assert coalesce_ranges([]) == []
+    assert coalesce_ranges([(10000, 10), (150, 50), (0, 100)], max_gap=1024) == \
+        [(0, 200), (10000, 10)]
+    assert coalesce_ranges([(0, 100), (50, 10), (101, 5)], max_gap=0) == \
+        [(0, 100), (101, 5)]
+
+
+def test_upload_preflight_path(text_filename):
+    preflight = upload_preflight(text_filename)
+    assert preflight.name == TEXT_FILENAME
+    assert preflight.size == os.path.getsize(text_filename)
+    assert preflight.complete
+    assert preflight.content_type == 'text/plain'
+    assert preflight.hasher('md5').hexdigest() == TEXT_MD5_CHECKSUM
+
+
+def test_upload_preflight_stream():
+    stream = io.BytesIO(b'skipped' + b'\x01' * 100)
+    stream.seek(7)
+    preflight = upload_preflight(stream, head_size=32)
+    assert preflight.head == b'\x01' * 32
+    assert preflight.size == 100
+    assert preflight.position == 7
+    assert not preflight.complete
+    # Rewound to where it started
+    assert stream.tell() == 7
+
+
+def test_upload_preflight_spooled_file_stays_in_memory():
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    spooled.write(b'\x01' * 100 * 1024)
+    spooled.seek(0)
+    preflight = upload_preflight(spooled)
+    assert preflight.size == 100 * 1024
+    assert not spooled._rolled
+    assert spooled.tell() == 0
+
+
+def test_upload_preflight_empty(tmp_path):
+    empty = tmp_path / 'empty.txt'
+    empty.write_bytes(b'')
+    with pytest.raises(FileEmptyError):
+        upload_preflight(str(empty))
+    with pytest.raises(FileEmptyError):
+        upload_preflight(io.BytesIO())
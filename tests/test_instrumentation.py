@@ -0,0 +1,72 @@
+import io
+
+import pytest
+
+from aiocloudstorage import configure, download, get_metrics, upload
+from aiocloudstorage.drivers.local import LocalDriver
+from aiocloudstorage.exceptions import NotFoundError
+from aiocloudstorage.instrumentation import Instrument, MetricsCollector
+from tests.helpers import random_container_name
+from tests.settings import *
+
+
+class Recorder(Instrument):
+    def __init__(self):
+        self.events = []
+
+    def on_start(self, event):
+        self.events.append(('start', event.operation))
+
+    def on_finish(self, event):
+        self.events.append(('finish', event.operation, event.container,
+                            event.blob, event.bytes))
+
+    def on_error(self, event):
+        self.events.append(('error', event.operation,
+                            type(event.error).__name__))
+
+
+@pytest.mark.asyncio
+async def test_driver_instrument_events():
+    storage = LocalDriver(LOCAL_ENDPOINT, LOCAL_SECRET)
+    container = await storage.create_container(random_container_name())
+    recorder = Recorder()
+    storage.add_instrument(recorder)
+
+    blob = await container.upload_blob(io.BytesIO(b'x' * 100),blob_name='a.bin')
+    chunks = [chunk async for chunk in blob.stream(chunk_size=30)]
+    with pytest.raises(NotFoundError):
+        await container.get_blob('missing.bin')
+    storage.remove_instrument(recorder)
+    await blob.delete()
+    await container.delete()
+
+    # Uploads build the blob from what they wrote, without a get_blob
+    assert recorder.events == [
+        ('start', 'upload_blob'),
+        ('finish', 'upload_blob', container.name, 'a.bin', 100),
+        ('start', 'stream_blob'),
+        ('finish', 'stream_blob', container.name, 'a.bin', 100),
+        ('start', 'get_blob'),
+        ('error', 'get_blob', 'NotFoundError'),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_metrics_collector_prometheus(store_config, text_filename):
+    store_config['STORAGE_METRICS'] = True
+    await configure(store_config)
+    collector = get_metrics()
+    assert isinstance(collector, MetricsCollector)
+
+    blob = await upload(text_filename, destfilename='auto')
+    await download(blob.file_url, destfilename=io.BytesIO())
+    with pytest.raises(NotFoundError):
+        await download(blob.file_url + '.missing', destfilename=io.BytesIO())
+
+    text = collector.to_prometheus()
+    assert '# TYPE aiocloudstorage_operation_duration_seconds histogram' in text
+    assert 'aiocloudstorage_operation_duration_seconds_count{store="fs",operation="upload_blob"} 1' in text
+    assert 'aiocloudstorage_operation_bytes_total{store="fs",operation="download_blob"} %d' % blob.size in text
+    assert 'aiocloudstorage_operation_errors_total{store="fs",operation="get_blob",error="NotFoundError"} 1' in text
+    assert 'aiocloudstorage_operations_in_flight{store="fs",operation="upload_blob"} 0' in text
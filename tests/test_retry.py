@@ -0,0 +1,75 @@
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from aiocloudstorage.retry import RetryPolicy
+
+
+def client_error(code, status):
+    return ClientError({'Error': {'Code': code, 'Message': code},
+                        'ResponseMetadata': {'HTTPStatusCode': status}},
+                       'PutObject')
+
+
+class Flaky:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self, value):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return value
+
+
+@pytest.mark.asyncio
+async def test_retry_policy_retries_transient_errors():
+    policy = RetryPolicy(max_attempts=3, base_delay=0)
+    func = Flaky([client_error('SlowDown', 503), ConnectionResetError()])
+    rewinds = []
+    result = await policy.call('put_object', func, 'ok',
+                               before_retry=lambda: rewinds.append(1))
+    assert result == 'ok'
+    assert func.calls == 3
+    assert len(rewinds) == 2
+    assert policy.stats() == {'retries': {'put_object': 2}, 'exhausted': {}}
+
+
+@pytest.mark.asyncio
+async def test_retry_policy_gives_up():
+    policy = RetryPolicy(max_attempts=2, base_delay=0)
+    func = Flaky([client_error('InternalError', 500)] * 3)
+    with pytest.raises(ClientError):
+        await policy.call('get_object', func, 'ok')
+    assert func.calls == 2
+    assert policy.exhausted == {'get_object': 1}
+
+
+@pytest.mark.asyncio
+async def test_retry_policy_not_retryable():
+    policy = RetryPolicy(base_delay=0)
+    func = Flaky([client_error('NoSuchKey', 404)])
+    with pytest.raises(ClientError):
+        await policy.call('get_object', func, 'ok')
+    assert func.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_policy_idempotency():
+    policy = RetryPolicy(base_delay=0)
+    func = Flaky([client_error('SlowDown', 503)])
+    with pytest.raises(ClientError):
+        await policy.call('create_bucket', func, 'ok', idempotent=False)
+    # Requests that never reached the backend are always safe to repeat
+    func = Flaky([EndpointConnectionError(endpoint_url='http://localhost')])
+    assert await policy.call('create_bucket', func, 'ok',
+                             idempotent=False) == 'ok'
+
+
+def test_retry_policy_delay():
+    policy = RetryPolicy(base_delay=0.1, max_delay=1, jitter=False)
+    assert [policy.delay(retry) for retry in (1, 2, 3, 10)] == \
+        [0.1, 0.2, 0.4, 1]
+    policy = RetryPolicy(base_delay=0.1, max_delay=1)
+    assert 0 <= policy.delay(3) <= 0.4
+    assert RetryPolicy.from_config({'max_attempts': 5}).max_attempts == 5
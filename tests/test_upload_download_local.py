@@ -1,11 +1,12 @@
 import os
+import asyncio
 import pytest
 import io
 from aiocloudstorage.drivers.local import LocalDriver
 from tests.settings import *
 from tests.helpers import random_container_name, uri_validator,binary_iostreams
-from aiocloudstorage.exceptions import CloudStorageError,NotFoundError,InvalidFileURLError
-from aiocloudstorage import configure,upload,bulk_upload,download,bulk_download
+from aiocloudstorage.exceptions import CloudStorageError,ContainerNotFoundError,NotFoundError,InvalidFileURLError
+from aiocloudstorage import configure,upload,bulk_upload,download,bulk_download,iter_bulk_upload,iter_bulk_download,bulk_delete
 from aiocloudstorage.helpers import file_checksum,parse_file_url
 
 
@@ -109,6 +110,50 @@ async def test_upload_no_default_container(container,text_filename):
     assert blob.checksum == TEXT_MD5_CHECKSUM
     assert blob.file_url == FILE_URL%(LOCAL_NAME,container.name,blob.name)
 
+@pytest.mark.asyncio
+async def test_upload_container_cached(container,text_filename,monkeypatch):
+    blob = await upload(text_filename)
+    driver = blob.container.driver
+
+    async def fail_get_container(container_name):
+        raise AssertionError("container should come from the cache")
+    monkeypatch.setattr(driver,'get_container',fail_get_container)
+    second = await upload(text_filename)
+    assert second.container is blob.container
+
+    monkeypatch.undo()
+    await blob.delete()
+    await second.delete()
+    await blob.container.delete()
+    with pytest.raises(NotFoundError):
+        await upload(text_filename)
+    #stale entry was dropped, the container is looked up again
+    with pytest.raises(NotFoundError):
+        await upload(text_filename)
+    await driver.create_container(blob.container.name)
+
+@pytest.mark.asyncio
+async def test_download_missing_blob_keeps_container_cached(container,text_filename,monkeypatch):
+    blob = await upload(text_filename)
+    driver = blob.container.driver
+    missing_url = blob.file_url.replace(blob.name,'missing-'+blob.name)
+    with pytest.raises(NotFoundError):
+        await download(missing_url)
+
+    async def fail_get_container(container_name):
+        raise AssertionError("container should come from the cache")
+    monkeypatch.setattr(driver,'get_container',fail_get_container)
+    path = await download(blob.file_url)
+    os.remove(path)
+
+    monkeypatch.undo()
+    await blob.delete()
+    await blob.container.delete()
+    #the container itself is missing, so its cache entry is dropped
+    with pytest.raises(ContainerNotFoundError):
+        await download(blob.file_url)
+    await driver.create_container(blob.container.name)
+
 @pytest.mark.asyncio
 async def test_bulk_upload_no_file(container):
     files = await bulk_upload({})
@@ -150,6 +195,27 @@ async def test_bulk_upload_with_one_invalid(container):
         assert blob.name.startswith(destpath)
         assert blob.checksum == download_hash.hexdigest()
 
+@pytest.mark.asyncio
+async def test_iter_bulk_upload_bounded(container):
+    filecount = 10
+    max_concurrency = 3
+    iostreams = binary_iostreams(filecount)
+    pulled = []
+
+    async def pairs():
+        for key,stream in iostreams.items():
+            pulled.append(key)
+            yield key,stream
+
+    completed = 0
+    async for key,blob in iter_bulk_upload(pairs(),max_concurrency=max_concurrency):
+        completed += 1
+        assert len(pulled) - completed < max_concurrency
+        iostreams[key].seek(0)
+        upload_hash = file_checksum(iostreams[key],hash_type=container.driver.hash_type)
+        assert blob.checksum == upload_hash.hexdigest()
+    assert completed == filecount
+
 @pytest.mark.asyncio
 async def test_download_invalid_file_url():
     with pytest.raises(InvalidFileURLError) as err:
@@ -198,6 +264,13 @@ async def test_download_stream(binary_blob,temp_file):
     download_hash = file_checksum(temp_file, hash_type=hash_type)
     assert download_hash.hexdigest() == binary_blob.checksum
 
+@pytest.mark.asyncio
+async def test_download_byte_range(binary_blob,temp_file):
+    await download(binary_blob.file_url,temp_file,byte_range=(10,100))
+    with open(temp_file,'rb') as download_file:
+        assert download_file.read() == (await binary_blob.read_range(10,100))
+    assert os.path.getsize(temp_file) == 100
+
 @pytest.mark.asyncio
 async def test_download_without_destination(binary_blob):
     download_file = await download(binary_blob.file_url)
@@ -223,6 +296,36 @@ async def test_bulk_download(binary_blob_list):
         download_hash = file_checksum(path_dict[key], hash_type=hash_type)
         assert download_hash.hexdigest() == blob.checksum
 
+@pytest.mark.asyncio
+async def test_iter_bulk_download(binary_blob_list):
+    blobs_dict = {k:v for k,v in enumerate(binary_blob_list)}
+    fileurls = [(k,v.file_url) for k,v in enumerate(binary_blob_list)]
+    path_dict = {}
+    async for key,path in iter_bulk_download(iter(fileurls),max_concurrency=2,multi_container=False):
+        path_dict[key] = path
+    assert len(path_dict) == len(blobs_dict)
+    for key,blob in blobs_dict.items():
+        download_hash = file_checksum(path_dict[key], hash_type=blob.driver.hash_type)
+        assert download_hash.hexdigest() == blob.checksum
+
+@pytest.mark.asyncio
+async def test_bounded_as_completed_early_exit_awaits_pending():
+    from aiocloudstorage import _bounded_as_completed
+    started = []
+    async def work(key,value):
+        task = asyncio.current_task()
+        started.append(task)
+        await asyncio.sleep(value)
+        return key
+    results = _bounded_as_completed([(1,0),(2,10),(3,10)],work,3)
+    async for key,_ in results:
+        break
+    await results.aclose()
+    assert key == 1
+    # Pending work is cancelled and awaited, not left to be destroyed
+    assert len(started) == 3 and all(task.done() for task in started)
+    assert [task.cancelled() for task in started] == [False,True,True]
+
 @pytest.mark.asyncio
 async def test_bulk_download_multi_container(random_blob_list):
     blobs_dict = {k:v for k,v in enumerate(random_blob_list)}
@@ -236,6 +339,43 @@ async def test_bulk_download_multi_container(random_blob_list):
         download_hash = file_checksum(path_dict[key], hash_type=hash_type)
         assert download_hash.hexdigest() == blob.checksum
 
+@pytest.mark.asyncio
+async def test_bulk_download_resolves_container_once(binary_blob_list,random_blob_list,store_config,monkeypatch):
+    store_config['CONTAINER_CACHE_TTL'] = 0
+    await configure(store_config)
+    lookups = []
+    running = [0,0] # current, most at once
+    get_container = LocalDriver.get_container
+    async def counting_get_container(self,container_name):
+        lookups.append(container_name)
+        running[0] += 1
+        running[1] = max(running)
+        try:
+            await asyncio.sleep(0.01)
+            return await get_container(self,container_name)
+        finally:
+            running[0] -= 1
+    monkeypatch.setattr(LocalDriver,'get_container',counting_get_container)
+
+    blobs = binary_blob_list+random_blob_list
+    fileurls_dict = {k:v.file_url for k,v in enumerate(blobs)}
+    fileurls_dict['invalid'] = 'invalid-url'
+    path_dict = await bulk_download(fileurls_dict,max_concurrency=3,return_exceptions=True)
+    assert isinstance(path_dict.pop('invalid'),InvalidFileURLError)
+    assert len(path_dict) == len(blobs)
+    assert sorted(lookups) == sorted({blob.container.name for blob in blobs})
+    # Lookups are bounded by max_concurrency too
+    assert running[1] == 3
+    for key,blob in enumerate(blobs):
+        download_hash = file_checksum(path_dict[key], hash_type=blob.driver.hash_type)
+        assert download_hash.hexdigest() == blob.checksum
 
-
-
+@pytest.mark.asyncio
+async def test_bulk_delete(random_blob_list):
+    fileurls = [blob.file_url for blob in random_blob_list]
+    results = await bulk_delete(fileurls+['invalid-url'])
+    assert [results[fileurl] for fileurl in fileurls] == [None]*len(fileurls)
+    assert isinstance(results['invalid-url'],InvalidFileURLError)
+    for blob in random_blob_list:
+        with pytest.raises(NotFoundError):
+            await blob.container.get_blob(blob.name)